@@ -0,0 +1,84 @@
+"""
+Measures the throughput of :meth:`NexusClient.download_file` for different
+chunk sizes against a local HTTP server.
+
+Usage:
+  download_chunk_size.py [--size=<MiB>] [--repeat=<n>]
+
+Options:
+  --size=<MiB>    Size of the downloaded asset in MiB [default: 256]
+  --repeat=<n>    Downloads per chunk size; the best is reported [default: 3]
+"""
+import http.server
+import os
+import tempfile
+import threading
+import time
+
+from docopt import docopt
+
+import nexuscli.cli  # noqa: F401 (avoids nexus_client's circular import)
+from nexuscli.compat import ThreadingHTTPServer
+from nexuscli.nexus_client import MAX_CHUNK_SIZE, NexusClient
+from nexuscli.nexus_config import NexusConfig
+
+# None is the adaptive chunk size; 8192 was the hard-coded size before it
+# became configurable
+CHUNK_SIZES = [8192, 65536, 262144, 1048576, 4194304, MAX_CHUNK_SIZE, None]
+
+
+def _handler(payload):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *_):
+            pass
+
+        def do_GET(self):
+            body = payload if self.path == '/asset' else b'[]'
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            view = memoryview(body)
+            for offset in range(0, len(body), MAX_CHUNK_SIZE):
+                self.wfile.write(view[offset:offset + MAX_CHUNK_SIZE])
+
+    return Handler
+
+
+def run(size_mib, repeat):
+    payload = os.urandom(size_mib * 1024 ** 2)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _handler(payload))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/'
+
+    client = NexusClient(NexusConfig(url=url), segment_threshold=None)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        destination = os.path.join(tmp_dir, 'asset')
+        for chunk_size in CHUNK_SIZES:
+            client.download_chunk_size = chunk_size
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                client.download_file(url + 'asset', destination)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            results.append((chunk_size, size_mib / best))
+
+    server.shutdown()
+    return results
+
+
+def main(argv=None):
+    arguments = docopt(__doc__, argv=argv)
+    results = run(int(arguments['--size']), int(arguments['--repeat']))
+
+    print(f'{"chunk size":>12}  {"MiB/s":>8}')
+    for chunk_size, throughput in results:
+        label = 'adaptive' if chunk_size is None else str(chunk_size)
+        print(f'{label:>12}  {throughput:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
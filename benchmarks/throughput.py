@@ -0,0 +1,191 @@
+"""
+Measures the throughput of :class:`NexusClient` listings, downloads, uploads
+and deletes, its peak memory use and the CLI start-up time against a local
+:class:`~nexuscli.testing.FakeNexus`, for each combination of dataset size
+and concurrency. Results are saved as JSON; give the file saved by a previous
+version as <baseline> to compare with it.
+
+Usage:
+  throughput.py [--assets=<n>...] [--size=<bytes>] [--concurrency=<n>...]
+                [--latency=<seconds>] [--output=<file>] [--baseline=<file>]
+
+Options:
+  --assets=<n>          Number of assets in the dataset; repeat for several
+                        dataset sizes [default: 100 1000]
+  --size=<bytes>        Size of each asset [default: 65536]
+  --concurrency=<n>     Maximum concurrent operations; repeat for several
+                        settings [default: 1 8]
+  --latency=<seconds>   Delay added to every request by the server
+                        [default: 0]
+  --output=<file>       Where the results are saved [default: throughput.json]
+  --baseline=<file>     Results of a previous run to compare with
+"""
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import pkg_resources
+from docopt import docopt
+
+import nexuscli.cli  # noqa: F401 (avoids nexus_client's circular import)
+from nexuscli.concurrency import AdaptiveLimiter
+from nexuscli.nexus_client import NexusClient
+from nexuscli.nexus_config import NexusConfig
+from nexuscli.testing import FakeNexus
+
+COLD_START_RUNS = 5
+COLD_START_SCRIPT = 'from nexuscli import cli; cli.main(["--help"])'
+# higher is better for all metrics but these
+LOWER_IS_BETTER = ('peak_rss_mib', 'cold_start_seconds')
+
+
+def _peak_rss_mib():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere
+    if sys.platform == 'darwin':
+        return peak / 1024 ** 2
+    return peak / 1024
+
+
+def _timed(function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def run_client(url, repository, upload_repository, concurrency, size):
+    """Runs in a new process, so its peak memory use is measured alone"""
+    client = NexusClient(
+        NexusConfig(url=url), concurrency=AdaptiveLimiter.fixed(concurrency))
+    megabytes = size / 1000 ** 2
+
+    artefacts, elapsed = _timed(
+        lambda: list(client.list_raw(f'{repository}/')))
+    count = len(artefacts)
+    results = {'list_assets_per_second': count / elapsed}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        downloaded, elapsed = _timed(
+            client.download, f'{repository}/', f'{tmp_dir}/', nocache=True)
+        results['download_files_per_second'] = downloaded / elapsed
+        results['download_mb_per_second'] = \
+            downloaded * megabytes / elapsed
+
+        uploaded, elapsed = _timed(
+            client.upload, tmp_dir, f'{upload_repository}/bench/')
+        results['upload_files_per_second'] = uploaded / elapsed
+        results['upload_mb_per_second'] = uploaded * megabytes / elapsed
+
+    deleted, elapsed = _timed(client.delete, f'{upload_repository}/bench/')
+    results['deletes_per_second'] = deleted / elapsed
+    results['peak_rss_mib'] = _peak_rss_mib()
+    return results
+
+
+def cold_start_seconds():
+    """Median time to start the CLI and print its help"""
+    timings = []
+    for _ in range(COLD_START_RUNS):
+        _, elapsed = _timed(
+            subprocess.run, [sys.executable, '-c', COLD_START_SCRIPT],
+            stdout=subprocess.DEVNULL, check=True)
+        timings.append(elapsed)
+    return statistics.median(timings)
+
+
+def run(dataset_sizes, size, concurrency_settings, latency):
+    results = []
+    # spawn, so the client processes don't inherit the server's memory
+    context = multiprocessing.get_context('spawn')
+    for assets in dataset_sizes:
+        with FakeNexus(latency=latency, page_size=100) as nexus:
+            nexus.add_repository('dataset')
+            nexus.populate('dataset', assets, size=size)
+            for concurrency in concurrency_settings:
+                upload_repository = f'upload-{concurrency}'
+                nexus.add_repository(upload_repository)
+                with concurrent.futures.ProcessPoolExecutor(
+                        max_workers=1, mp_context=context) as executor:
+                    measured = executor.submit(
+                        run_client, nexus.url, 'dataset', upload_repository,
+                        concurrency, size).result()
+                results.append(dict(
+                    measured, assets=assets, asset_size=size,
+                    concurrency=concurrency))
+    return results
+
+
+def _version():
+    try:
+        return pkg_resources.get_distribution('nexus3-cli').version
+    except pkg_resources.DistributionNotFound:
+        return None
+
+
+def _key(result):
+    return result['assets'], result['asset_size'], result['concurrency']
+
+
+def print_results(report, baseline=None):
+    """Prints each metric and, with a baseline, its change in percent"""
+    previous = {}
+    if baseline is not None:
+        previous = {_key(result): result for result in baseline['results']}
+        previous[None] = baseline
+
+    def _line(label, value, before):
+        change = ''
+        if before:
+            change = f'{(value - before) / before * 100:+7.1f}%'
+        print(f'  {label:<28}{value:12.2f} {change}')
+
+    print(f'nexuscli {report["version"]}')
+    _line('cold_start_seconds', report['cold_start_seconds'],
+          previous.get(None, {}).get('cold_start_seconds'))
+    for result in report['results']:
+        print('assets={} asset_size={} concurrency={}'.format(*_key(result)))
+        before = previous.get(_key(result), {})
+        for name, value in result.items():
+            if name not in ('assets', 'asset_size', 'concurrency'):
+                _line(name, value, before.get(name))
+
+
+def main(argv=None):
+    arguments = docopt(__doc__, argv=argv)
+    dataset_sizes = [int(n) for value in arguments['--assets']
+                     for n in value.split()]
+    concurrency_settings = [int(n) for value in arguments['--concurrency']
+                            for n in value.split()]
+    size = int(arguments['--size'])
+    latency = float(arguments['--latency'])
+
+    report = {
+        'version': _version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'latency': latency,
+        'lower_is_better': list(LOWER_IS_BETTER),
+        'cold_start_seconds': cold_start_seconds(),
+        'results': run(dataset_sizes, size, concurrency_settings, latency),
+    }
+    with open(arguments['--output'], 'w') as fh:
+        json.dump(report, fh, indent=2)
+
+    baseline = None
+    if arguments['--baseline']:
+        with open(arguments['--baseline']) as fh:
+            baseline = json.load(fh)
+    print_results(report, baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -64,7 +64,7 @@ setup(
     include_package_data=True,
     entry_points={
         'console_scripts': [
-            'nexus3=nexuscli.cli:main',
+            'nexus3=nexuscli.daemon:main',
         ],
     },
     extras_require={'test': test_requires},
@@ -1,14 +1,21 @@
+import concurrent.futures
 import os
+import posixpath
 import semver
+import time
 from clint.textui import progress
 from urllib.parse import urlparse
 
+from nexuscli import archive, hooks, nexus_util
 from nexuscli.api.repository import validations, util, upload
+from nexuscli.concurrency import AdaptiveLimiter, run_concurrently
 
 DEFAULT_RECIPE = 'raw'
 DEFAULT_WRITE_POLICY = 'ALLOW'
 DEFAULT_BLOB_STORE_NAME = 'default'
 DEFAULT_STRICT_CONTENT = False
+# files hashed at the same time by Repository.upload_directory
+HASH_CONCURRENCY = os.cpu_count() or 1
 
 # https://issues.sonatype.org/browse/NEXUS-19525
 # https://github.com/thiagofigueiro/nexus3-cli/issues/77
@@ -318,12 +325,75 @@ class HostedRepository(Repository):
         except AttributeError:
             raise NotImplementedError(upload_method_name) from None
 
+        started = time.monotonic()
         upload_method(self, src_file, dst_dir, dst_file)
+        self._emit_transferred(dst_dir, dst_file, started, src_file=src_file)
 
-    def upload_directory(self, src_dir, dst_dir, recurse=True, flatten=False):
+    def upload_stream(self, fileobj, dst_dir, dst_file, size=None):
+        """
+        Uploads the content of a file object to the directory and file name
+        specified, as it's read; e.g. a download from another repository.
+
+        :param fileobj: binary file object with the content to be uploaded.
+        :param dst_dir: directory under dst_repo to place file in.
+        :param dst_file: destination file name.
+        :param size: size of the content, if known.
+        :type size: int
+        """
+        upload_method_name = f'upload_stream_{self.recipe_name}'
+        try:
+            # Find upload method in the upload module using naming convention
+            upload_method = getattr(upload, upload_method_name)
+        except AttributeError:
+            raise NotImplementedError(upload_method_name) from None
+
+        started = time.monotonic()
+        upload_method(self, fileobj, dst_dir, dst_file, size)
+        self._emit_transferred(dst_dir, dst_file, started, size=size)
+
+    def _repository_path(self, dst_dir, dst_file):
+        return posixpath.join(
+            self.name, (dst_dir or '').strip(posixpath.sep), dst_file)
+
+    def _emit_transferred(self, dst_dir, dst_file, started, size=None,
+                          src_file=None):
+        """Emit the ASSET_TRANSFERRED event for an upload"""
+        if self.nexus_client is not None:
+            if src_file is not None:
+                size = os.path.getsize(src_file)
+            self.nexus_client.hooks.emit(
+                hooks.ASSET_TRANSFERRED, direction='upload',
+                url=self._repository_path(dst_dir, dst_file), size=size,
+                elapsed=time.monotonic() - started)
+
+    def _existing_artefacts(self, dst_dir):
+        """Artefacts in dst_dir, by path"""
+        listing_path = posixpath.join(
+            self.name, (dst_dir or '').strip(posixpath.sep), '')
+        return {artefact['path'].lstrip(posixpath.sep): artefact
+                for artefact in self.nexus_client.list_raw(listing_path)}
+
+    def _is_uploaded(self, artefact, file_path):
+        """Whether an artefact has the content of a local file"""
+        if artefact.get('fileSize') is not None and \
+                artefact['fileSize'] != os.path.getsize(file_path):
+            return False
+        return nexus_util.has_same_hash(
+            artefact, file_path, self.nexus_client.hash_cache)
+
+    def upload_directory(self, src_dir, dst_dir, recurse=True, flatten=False,
+                         skip_existing=False):
         """
         Uploads all files in a directory to the specified destination directory
-        in this repository, honouring options flatten and recurse.
+        in this repository, honouring options flatten and recurse. Files are
+        uploaded as the directory is walked, concurrently, as allowed by the
+        ``concurrency`` limiter of :attr:`nexus_client`.
+
+        With skip_existing, files are uploaded through a pipeline: while the
+        directory is walked and the destination directory listed, up to
+        :data:`HASH_CONCURRENCY` files are hashed at a time and compared to
+        the artefacts listed, and the files that differ are uploaded, so
+        hashing and uploads of different files overlap.
 
         :param src_dir: path to local directory to be uploaded
         :param dst_dir: destination directory in dst_repo
@@ -331,21 +401,119 @@ class HostedRepository(Repository):
         :type recurse: bool
         :param flatten: when True, the source directory tree isn't replicated
             on the destination.
-        :return: number of files uploaded
+        :param skip_existing: when True, files with the same size and
+            checksum as the artefact at their destination aren't uploaded.
+            Hashes are looked up in the ``hash_cache`` of
+            :attr:`nexus_client`.
+        :type skip_existing: bool
+        :return: number of files uploaded or, with skip_existing, already
+            present
         :rtype: int
         """
-        file_set = util.get_files(src_dir, recurse)
-        file_count = len(file_set)
-        file_set = progress.bar(file_set, expected_size=file_count)
+        scanned_count = 0
+        existing = None
+
+        def _scan():
+            nonlocal scanned_count
+            for relative_filepath, _ in util.scan_files(src_dir, recurse):
+                scanned_count += 1
+                yield relative_filepath
 
-        for relative_filepath in file_set:
+        def _check(relative_filepath):
             file_path = os.path.join(src_dir, relative_filepath)
             sub_directory = util.get_upload_subdirectory(
                             dst_dir, file_path, flatten)
+            is_uploaded = False
+            if existing is not None:
+                target = posixpath.normpath(posixpath.join(
+                    sub_directory, os.path.basename(file_path)))
+                artefact = existing.result().get(
+                    target.lstrip(posixpath.sep))
+                is_uploaded = artefact is not None and self._is_uploaded(
+                    artefact, file_path)
+            return file_path, sub_directory, is_uploaded
+
+        def _upload(checked):
+            file_path, sub_directory, is_uploaded = checked
+            if is_uploaded:
+                self.nexus_client.metrics.increment('upload_skipped')
+                self.nexus_client.hooks.emit(
+                    hooks.ASSET_SKIPPED, direction='upload',
+                    url=self._repository_path(
+                        sub_directory, os.path.basename(file_path)),
+                    path=file_path)
+                return
             self.upload_file(file_path, sub_directory)
 
+        limiter = None
+        if self.nexus_client is not None:
+            limiter = self.nexus_client.concurrency
+
+        executor = None
+        if skip_existing and self.nexus_client is not None:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            existing = executor.submit(self._existing_artefacts, dst_dir)
+            checked = run_concurrently(
+                _check, _scan(), AdaptiveLimiter.fixed(HASH_CONCURRENCY))
+        else:
+            checked = (_check(relative_filepath)
+                       for relative_filepath in _scan())
+        # uploads start as soon as files are found; the progress bar total is
+        # the number of files found so far
+        results = run_concurrently(_upload, checked, limiter)
+
+        file_count = 0
+        try:
+            with progress.Bar(expected_size=0) as bar:
+                for _ in results:
+                    file_count += 1
+                    bar.show(file_count, count=scanned_count)
+        finally:
+            results.close()
+            checked.close()
+            if executor is not None:
+                executor.shutdown(wait=True)
+
         return file_count
 
+    def upload_archive(self, src_archive, dst_dir, recurse=True,
+                       flatten=False):
+        """
+        Uploads the files in a tar (optionally compressed) or zip archive to
+        the specified destination directory in this repository, without
+        extracting the archive, honouring options flatten and recurse as
+        :meth:`upload_directory` does for the archive's directory tree.
+
+        The archive is read in a single pass while its files are uploaded
+        concurrently, as allowed by the ``concurrency`` limiter of
+        :attr:`nexus_client`; see :func:`nexuscli.archive.read_archive`.
+
+        :param src_archive: path to local archive to be uploaded
+        :param dst_dir: destination directory in dst_repo
+        :param recurse: when False, only the files at the archive root are
+            uploaded.
+        :type recurse: bool
+        :param flatten: when True, the archive directory tree isn't replicated
+            on the destination.
+        :return: number of files uploaded
+        :rtype: int
+        """
+        def _upload(member):
+            name, size, fileobj = member
+            with fileobj:
+                sub_directory = util.get_upload_subdirectory(
+                                dst_dir, name, flatten).rstrip(posixpath.sep)
+                self.upload_stream(
+                    fileobj, sub_directory, posixpath.basename(name), size)
+
+        limiter = None
+        if self.nexus_client is not None:
+            limiter = self.nexus_client.concurrency
+        results = run_concurrently(
+            _upload, archive.read_archive(src_archive, recurse), limiter)
+
+        return sum(1 for _ in results)
+
 
 class MavenRepository(Repository):
     """
@@ -1,8 +1,138 @@
 """Methods to implement upload for specific repository formats (recipes)"""
+import io
 import os
+import uuid
 
 from nexuscli import exception
 from nexuscli.api.repository.validations import REMOTE_PATH_SEPARATOR
+from nexuscli.throttle import throttled
+
+MULTIPART_BLOCK_SIZE = 64 * 1024
+
+
+class MultipartReader:
+    """
+    A ``multipart/form-data`` request body with form fields and a single
+    file, read from a file object as the request is sent instead of being
+    loaded into memory.
+
+    The body can be rewound for a retry (see
+    :func:`~nexuscli.retry.body_rewinder`) when the file object is seekable.
+
+    :param fields: form field name to value.
+    :type fields: dict
+    :param file_field: form field name of the file.
+    :type file_field: str
+    :param file_name: file name sent for the file.
+    :type file_name: str
+    :param fileobj: binary file object with the file content.
+    :param size: size of the file content, when known; the body's length is
+        then available as the ``len`` attribute, which :py:mod:`requests` uses
+        to set the Content-Length.
+    :type size: int
+    """
+    def __init__(self, fields, file_field, file_name, fileobj, size=None):
+        boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        preamble = ''.join(
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f'{value}\r\n' for name, value in fields.items())
+        preamble += (
+            f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; '
+            f'filename="{file_name}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n')
+        preamble = preamble.encode()
+        epilogue = f'\r\n--{boundary}--\r\n'.encode()
+
+        self._fileobj = fileobj
+        self._file_start = fileobj.tell() if self.seekable() else None
+        self._parts = [io.BytesIO(preamble), fileobj, io.BytesIO(epilogue)]
+        self._index = 0
+        self._position = 0
+        if size is not None:
+            self.len = len(preamble) + size + len(epilogue)
+
+    def __iter__(self):
+        return iter(lambda: self.read(MULTIPART_BLOCK_SIZE), b'')
+
+    def read(self, size=-1):
+        data = bytearray()
+        while self._index < len(self._parts) and (
+                size is None or size < 0 or len(data) < size):
+            wanted = -1 if size is None or size < 0 else size - len(data)
+            chunk = self._parts[self._index].read(wanted)
+            if chunk:
+                data += chunk
+            else:
+                self._index += 1
+        self._position += len(data)
+        return bytes(data)
+
+    def seekable(self):
+        seekable = getattr(self._fileobj, 'seekable', None)
+        return bool(seekable and seekable())
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence != io.SEEK_SET or not self.seekable():
+            raise io.UnsupportedOperation('seek')
+        self._fileobj.seek(self._file_start)
+        self._parts[0].seek(0)
+        self._parts[2].seek(0)
+        self._index = 0
+        self._position = 0
+        while self._position < offset:
+            if not self.read(min(MULTIPART_BLOCK_SIZE,
+                                 offset - self._position)):
+                break
+        return self._position
+
+
+class SizedReader:
+    """
+    A request body read from a file object, whose size is known: it's
+    available as the ``len`` attribute, which :py:mod:`requests` uses to set
+    the Content-Length.
+
+    The body can be rewound for a retry (see
+    :func:`~nexuscli.retry.body_rewinder`) when the file object is seekable.
+
+    :param fileobj: binary file object with the content.
+    :param size: size of the content, from the current position of
+        ``fileobj``.
+    :type size: int
+    """
+    def __init__(self, fileobj, size):
+        self._fileobj = fileobj
+        self._file_start = fileobj.tell() if self.seekable() else None
+        self._position = 0
+        self.len = size
+
+    def __iter__(self):
+        return iter(lambda: self.read(MULTIPART_BLOCK_SIZE), b'')
+
+    def read(self, size=-1):
+        data = self._fileobj.read(size)
+        self._position += len(data)
+        return data
+
+    def seekable(self):
+        seekable = getattr(self._fileobj, 'seekable', None)
+        return bool(seekable and seekable())
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence != io.SEEK_SET or not self.seekable():
+            raise io.UnsupportedOperation('seek')
+        self._fileobj.seek(self._file_start + offset)
+        self._position = offset
+        return self._position
 
 
 def upload_file_raw(repository, src_file, dst_dir, dst_file):
@@ -19,17 +149,36 @@ def upload_file_raw(repository, src_file, dst_dir, dst_file):
         path.
     :raises exception.NexusClientAPIError: unknown response from Nexus API.
     """
+    with open(src_file, 'rb') as fh:
+        upload_stream_raw(repository, fh, dst_dir, dst_file,
+                          size=os.fstat(fh.fileno()).st_size)
+
+
+def upload_stream_raw(repository, fileobj, dst_dir, dst_file, size=None):
+    """
+    Upload the content of a file object to a raw repository, as it's read.
+
+    :param repository: repository instance used to access Nexus 3 service.
+    :type repository: nexuscli.api.repository.model.Repository
+    :param fileobj: binary file object with the content to be uploaded.
+    :param dst_dir: directory under dst_repo to place file in. When None,
+        the file is placed under the root of the raw repository
+    :param dst_file: destination file name.
+    :param size: size of the content, if known.
+    :type size: int
+    :raises exception.NexusClientAPIError: unknown response from Nexus API.
+    """
     dst_dir = os.path.normpath(dst_dir or REMOTE_PATH_SEPARATOR)
 
     params = {'repository': repository.name}
-    files = {'raw.asset1': open(src_file, 'rb').read()}
-    data = {
-        'raw.directory': dst_dir,
-        'raw.asset1.filename': dst_file,
-    }
+    bandwidth_limiter = repository.nexus_client.bandwidth_limiter
+    body = MultipartReader(
+        {'raw.directory': dst_dir, 'raw.asset1.filename': dst_file},
+        'raw.asset1', dst_file, throttled(fileobj, bandwidth_limiter), size)
 
     response = repository.nexus_client.http_post(
-        'components', files=files, data=data, params=params, stream=True)
+        'components', data=body, params=params, stream=True,
+        headers={'Content-Type': body.content_type})
 
     if response.status_code != 204:
         raise exception.NexusClientAPIError(
@@ -48,14 +197,35 @@ def upload_file_yum(repository, src_file, dst_dir, dst_file):
     :param dst_file: destination file name.
     :raises exception.NexusClientAPIError: unknown response from Nexus API.
     """
+    with open(src_file, 'rb') as fh:
+        upload_stream_yum(repository, fh, dst_dir, dst_file)
+
+
+def upload_stream_yum(repository, fileobj, dst_dir, dst_file, size=None):
+    """
+    Upload the content of a file object to a yum repository, as it's read.
+
+    :param repository: repository instance used to access Nexus 3 service.
+    :type repository: nexuscli.api.repository.model.Repository
+    :param fileobj: binary file object with the content to be uploaded.
+    :param dst_dir: directory under dst_repo to place file in.
+    :param dst_file: destination file name.
+    :param size: size of the content, if known; otherwise the content is
+        sent with chunked transfer encoding, unless ``fileobj`` is a regular
+        file.
+    :type size: int
+    :raises exception.NexusClientAPIError: unknown response from Nexus API.
+    """
     dst_dir = dst_dir or REMOTE_PATH_SEPARATOR
     repository_path = REMOTE_PATH_SEPARATOR.join(
         ['repository', repository.name, dst_dir, dst_file])
 
-    with open(src_file, 'rb') as fh:
-        response = repository.nexus_client.http_put(
-            repository_path, data=fh, stream=True,
-            service_url=repository.nexus_client.config.url)
+    data = throttled(fileobj, repository.nexus_client.bandwidth_limiter)
+    if size is not None:
+        data = SizedReader(data, size)
+    response = repository.nexus_client.http_put(
+        repository_path, data=data, stream=True,
+        service_url=repository.nexus_client.config.url)
 
     if response.status_code != 200:
         raise exception.NexusClientAPIError(
@@ -3,11 +3,54 @@ import os
 from nexuscli.api.repository.validations import REMOTE_PATH_SEPARATOR
 
 
+def scan_files(src_dir, recurse=True):
+    """
+    Walks the given directory, yielding its files as they are found, so they
+    can be processed before the whole directory is walked. If recurse option
+    is False, only the files on the root of the directory are yielded.
+
+    Like :func:`os.walk`, symbolic links to directories are not followed and
+    directories that can't be read are skipped.
+
+    :param src_dir: location of files
+    :param recurse: If false, only the files on the root of src_dir
+                    are yielded
+    :return: a generator yielding, for each file, its path relative to
+        ``src_dir`` and its :class:`os.DirEntry`, which caches the result of
+        :meth:`~os.DirEntry.stat`.
+    :rtype: typing.Iterator[tuple[str, os.DirEntry]]
+    """
+    pending = ['']
+    while pending:
+        relative_dir = pending.pop()
+        try:
+            entries = os.scandir(os.path.join(src_dir, relative_dir))
+        except OSError:
+            continue
+
+        sub_directories = []
+        with entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_dir, entry.name)
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    yield relative_path, entry
+                elif recurse and not entry.is_symlink():
+                    sub_directories.append(relative_path)
+
+        # walk sub directories in the order they were found
+        pending.extend(reversed(sub_directories))
+
+
 def get_files(src_dir, recurse=True):
     """
     Walks the given directory and collects files to be uploaded. If
     recurse option is False, only the files on the root of the directory
-    will be returned.
+    will be returned. See :func:`scan_files` to process the files as the
+    directory is walked.
 
     :param src_dir: location of files
     :param recurse: If false, only the files on the root of src_dir
@@ -15,16 +58,7 @@ def get_files(src_dir, recurse=True):
     :return: file set to be used with upload_directory
     :rtype: set
     """
-    source_files = set()
-    for dirname, dirnames, filenames in os.walk(src_dir):
-        if not recurse:
-            del dirnames[:]
-
-        source_files.update(
-            os.path.relpath(os.path.join(dirname, f), src_dir)
-            for f in filenames)
-
-    return source_files
+    return {relative_path for relative_path, _ in scan_files(src_dir, recurse)}
 
 
 def get_upload_subdirectory(dst_dir, file_path, flatten=False):
@@ -0,0 +1,317 @@
+"""Streams a directory of a Nexus repository as a tar or zip archive and
+reads local archives to upload their members"""
+import collections
+import concurrent.futures
+import datetime
+import hashlib
+import logging
+import posixpath
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+
+from nexuscli import exception, nexus_util
+
+LOG = logging.getLogger(__name__)
+
+ARCHIVE_FORMATS = ('tar', 'tar.gz', 'zip')
+# prefetched assets are kept in memory up to this size, then on disk
+SPOOL_SIZE = 8 * 1024 ** 2
+SPOOL_CHUNK_SIZE = 1024 ** 2
+# tar members read ahead of those being uploaded, so at most this many times
+# SPOOL_SIZE is held in memory
+READ_AHEAD = 4
+# earliest timestamp that can be stored in a zip file
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def archive_name(artefact, flatten=False):
+    """
+    Name of an artefact's entry in the archive; the same path (relative to
+    the archive root) as it would have when downloaded to a directory.
+
+    :param artefact: as returned by
+        :meth:`~nexuscli.nexus_client.NexusClient.list_raw`.
+    :type artefact: dict
+    :param flatten: if True, the remote directory isn't reproduced.
+    :type flatten: bool
+    :rtype: str
+    """
+    path = artefact['path'].lstrip('/')
+    return posixpath.basename(path) if flatten else path
+
+
+# formats of the lastModified attribute of assets, once normalised by _mtime
+TIMESTAMP_FORMATS = ('%Y-%m-%dT%H:%M:%S.%f%z', '%Y-%m-%dT%H:%M:%S%z')
+
+
+def _mtime(artefact):
+    """The lastModified time of ``artefact``, in seconds since the epoch; 0
+    if it's missing or invalid"""
+    try:
+        timestamp = artefact['lastModified']
+        if timestamp.endswith('Z'):
+            timestamp = timestamp[:-1] + '+0000'
+        elif timestamp[-3:-2] == ':':
+            # %z doesn't accept a colon in the UTC offset before Python 3.7
+            timestamp = timestamp[:-3] + timestamp[-2:]
+    except (KeyError, TypeError, AttributeError):
+        return 0
+    for timestamp_format in TIMESTAMP_FORMATS:
+        try:
+            return datetime.datetime.strptime(
+                timestamp, timestamp_format).timestamp()
+        except ValueError:
+            pass
+    return 0
+
+
+def _verified(chunks, artefact):
+    """Yields ``chunks``, checking they match the ``artefact`` checksum once
+    they have all been yielded"""
+    checksum = artefact.get('checksum') or {}
+    hashes = {name: hashlib.new(name) for name in ('sha1', 'sha256')
+              if name in checksum}
+    for chunk in chunks:
+        for hash_ in hashes.values():
+            hash_.update(chunk)
+        yield chunk
+
+    mismatches = nexus_util.checksum_mismatches(
+        artefact, {name: hash_.hexdigest() for name, hash_ in hashes.items()})
+    if mismatches:
+        raise exception.DownloadError(
+            f'Downloading from {artefact["downloadUrl"]}. Reason: '
+            f'{", ".join(mismatches)} mismatch')
+
+
+def _spool(chunks, spool=None):
+    """Write chunks to ``spool``, a new temporary file by default; used for
+    prefetching, for tar entries whose size isn't known in advance and for
+    members of local tar archives"""
+    if spool is None:
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    try:
+        for chunk in chunks:
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    size = spool.tell()
+    spool.seek(0)
+    return size, spool
+
+
+def _prefetch(nexus_client, artefact):
+    _, chunks = nexus_client.stream_file(artefact['downloadUrl'])
+    return _spool(_verified(chunks, artefact))
+
+
+def _iter_spool(spool):
+    try:
+        yield from iter(lambda: spool.read(SPOOL_CHUNK_SIZE), b'')
+    finally:
+        spool.close()
+
+
+def _assets(nexus_client, artefacts, prefetch):
+    """
+    Yields ``(artefact, size, chunks)`` for each artefact, in order. With
+    ``prefetch``, that many artefacts are downloaded in parallel ahead of the
+    one being yielded.
+    """
+    if not prefetch:
+        for artefact in artefacts:
+            size, chunks = nexus_client.stream_file(artefact['downloadUrl'])
+            yield artefact, size, _verified(chunks, artefact)
+        return
+
+    pending = collections.deque()
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=prefetch)
+    try:
+        artefacts = iter(artefacts)
+        while True:
+            for artefact in artefacts:
+                pending.append((artefact, executor.submit(
+                    _prefetch, nexus_client, artefact)))
+                if len(pending) > prefetch:
+                    break
+            if not pending:
+                return
+            artefact, future = pending.popleft()
+            size, spool = future.result()
+            yield artefact, size, _iter_spool(spool)
+    finally:
+        for _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        for _, future in pending:
+            if future.done() and not future.cancelled() and \
+                    future.exception() is None:
+                future.result()[1].close()
+
+
+def _write_tar(assets, fileobj, compression, flatten):
+    count = 0
+    with tarfile.open(fileobj=fileobj, mode=f'w|{compression}') as tar:
+        for artefact, size, chunks in assets:
+            if size is None:
+                size, spool = _spool(chunks)
+                chunks = _iter_spool(spool)
+
+            info = tarfile.TarInfo(archive_name(artefact, flatten))
+            info.size = size
+            info.mtime = _mtime(artefact)
+            info.mode = 0o644
+            reader = nexus_util.ChunkReader(chunks)
+            tar.addfile(info, reader)
+            if reader.read(1):
+                raise exception.DownloadError(
+                    f'Downloading from {artefact["downloadUrl"]}. Reason: '
+                    f'longer than its Content-Length {size}')
+            count += 1
+    return count
+
+
+def _write_zip(assets, fileobj, flatten):
+    count = 0
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for artefact, size, chunks in assets:
+            date_time = max(time.gmtime(_mtime(artefact))[:6], ZIP_EPOCH)
+            info = zipfile.ZipInfo(archive_name(artefact, flatten), date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            if size is not None:
+                info.file_size = size
+            with archive.open(
+                    info, 'w', force_zip64=size is None) as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+            count += 1
+    return count
+
+
+class _ReadAheadSpool(tempfile.SpooledTemporaryFile):
+    """A spooled tar member, holding one of the ``slots`` until closed"""
+    def __init__(self, slots):
+        super().__init__(max_size=SPOOL_SIZE)
+        self._slots = slots
+
+    def close(self):
+        if not self.closed:
+            self._slots.release()
+        super().close()
+
+
+def _member_name(name, recurse):
+    """Normalised archive member name or None, if it should be skipped"""
+    name = posixpath.normpath(name.lstrip(posixpath.sep))
+    if name.startswith('..') or (not recurse and posixpath.sep in name):
+        return None
+    return name
+
+
+def read_archive(archive_path, recurse=True):
+    """
+    Read the files in a tar (optionally compressed) or zip archive in a single
+    pass, without extracting them.
+
+    Each file object yielded is independent of the others and of the
+    generator, so they can be read concurrently; for tar archives, where
+    members must be read in order, the content is first copied to a temporary
+    file (in memory up to :data:`SPOOL_SIZE`). At most :data:`READ_AHEAD`
+    of those are open at a time: the generator waits for one to be closed
+    before reading the next member.
+
+    :param archive_path: the archive.
+    :param recurse: if False, only files at the root of the archive are read.
+    :type recurse: bool
+    :raises exception.NexusClientInvalidRepositoryPath: if ``archive_path``
+        isn't a supported archive.
+    :raises exception.DownloadError: if a tar archive is truncated or
+        corrupt.
+    :return: a generator yielding ``(name, size, fileobj)`` for each file,
+        where ``name`` uses ``/`` as separator. The caller must close
+        ``fileobj``.
+    :rtype: typing.Iterator[tuple[str, int, typing.BinaryIO]]
+    """
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                name = _member_name(info.filename, recurse)
+                if name is not None and not info.is_dir():
+                    yield name, info.file_size, archive.open(info)
+        return
+
+    try:
+        archive = tarfile.open(archive_path, mode='r|*')
+    except tarfile.TarError as e:
+        raise exception.NexusClientInvalidRepositoryPath(
+            f'Not a tar or zip archive: {archive_path}: {e}') from None
+
+    slots = threading.BoundedSemaphore(READ_AHEAD)
+    with archive:
+        try:
+            for member in archive:
+                name = _member_name(member.name, recurse)
+                if name is None or not member.isfile():
+                    continue
+                member_file = archive.extractfile(member)
+                slots.acquire()
+                size, spool = _spool(
+                    iter(lambda: member_file.read(SPOOL_CHUNK_SIZE), b''),
+                    _ReadAheadSpool(slots))
+                yield name, size, spool
+        except (tarfile.TarError, OSError, EOFError) as e:
+            raise exception.DownloadError(
+                f'Reading {archive_path}. Reason: {e}') from None
+
+
+def write_archive(nexus_client, source, fileobj, archive_format='tar',
+                  flatten=False, prefetch=0):
+    """
+    Write the artefacts in a repository path to a tar or zip archive, as they
+    are downloaded; nothing is written to disk, except prefetched artefacts
+    that don't fit in memory.
+
+    Only the artefact being written is held in memory, in chunks, unless
+    ``prefetch`` is given: that many artefacts are then downloaded in
+    parallel into temporary files (in memory up to :data:`SPOOL_SIZE`).
+
+    :param nexus_client: the client used to list and download artefacts.
+    :type nexus_client: nexuscli.nexus_client.NexusClient
+    :param source: location of artefact or directory on the repository
+        service, as given to
+        :meth:`~nexuscli.nexus_client.NexusClient.download`.
+    :type source: str
+    :param fileobj: binary file object the archive is written to; it doesn't
+        need to be seekable (e.g. ``sys.stdout.buffer``).
+    :param archive_format: one of :data:`ARCHIVE_FORMATS`.
+    :type archive_format: str
+    :param flatten: if True, the remote directories aren't reproduced in the
+        archive.
+    :type flatten: bool
+    :param prefetch: number of artefacts downloaded ahead of the one being
+        written.
+    :type prefetch: int
+    :raises exception.DownloadError: if the format isn't supported or an
+        artefact can't be downloaded or doesn't match its checksum; the
+        archive is then incomplete.
+    :return: number of artefacts written.
+    :rtype: int
+    """
+    if archive_format not in ARCHIVE_FORMATS:
+        raise exception.DownloadError(
+            f'Unsupported archive format {archive_format}; expected one of: '
+            f'{", ".join(ARCHIVE_FORMATS)}')
+
+    assets = _assets(nexus_client, nexus_client.list_raw(source), prefetch)
+    try:
+        if archive_format == 'zip':
+            return _write_zip(assets, fileobj, flatten)
+        compression = 'gz' if archive_format == 'tar.gz' else ''
+        return _write_tar(assets, fileobj, compression, flatten)
+    finally:
+        assets.close()
@@ -6,8 +6,27 @@ Usage:
   nexus3 login
   nexus3 (list|ls) <repository_path>
   nexus3 (upload|up) <from_src> <to_repository> [--flatten] [--norecurse]
+         [--extract] [--watch] [--settle=<seconds>] [--skip-existing]
+         [--max-rate=<bytes>] [--max-rps=<n>]
+         [--metrics-file=<path>] [--metrics-port=<port>]
   nexus3 (download|dl) <from_repository> <to_dst> [--flatten] [--nocache]
-  nexus3 (delete|del) <repository_path>
+         [--max-rate=<bytes>] [--max-rps=<n>] [--segment-threshold=<bytes>]
+         [--store=<dir>] [--store-size=<bytes>]
+         [--archive=<format>] [--prefetch=<n>]
+         [--metrics-file=<path>] [--metrics-port=<port>]
+  nexus3 (delete|del) <repository_path> [--max-rps=<n>]
+         [--metrics-file=<path>] [--metrics-port=<port>]
+  nexus3 (copy|cp) <from_repository> <to_repository> [--flatten] [--nocache]
+         [--max-rate=<bytes>] [--max-rps=<n>]
+         [--metrics-file=<path>] [--metrics-port=<port>]
+  nexus3 sync <from_src> <to_dst> [--delete] [--dry-run]
+         [--max-rate=<bytes>] [--max-rps=<n>]
+         [--metrics-file=<path>] [--metrics-port=<port>]
+  nexus3 replicate <from_repository> <to_repository> --to-config=<path>
+         [--from-config=<path>] [--checkpoint=<file>] [--nocache]
+         [--max-rate=<bytes>] [--max-rps=<n>]
+         [--metrics-file=<path>] [--metrics-port=<port>]
+  nexus3 daemon [--socket=<path>]
   nexus3 <subcommand> [<arguments>...]
 
 Options:
@@ -16,28 +35,107 @@ Options:
   --version             Show the Nexus3 CLI version and exit
   --flatten             Flatten directory structure on `nexus3` transfers
                         [default: False]
-  --nocache             Force download even if local copy is up-to-date
-                        [default: False]
+  --nocache             Force download (or copy) even if the local copy (or
+                        destination artefact) is up-to-date [default: False]
   --norecurse           Don't process subdirectories on `nexus3 up` transfers
                         [default: False]
+  --extract             Upload the files in the tar, tar.gz or zip archive
+                        <from_src>, without extracting it, instead of the
+                        archive itself [default: False]
+  --watch               Keep uploading the files created or changed in the
+                        <from_src> directory, until interrupted. Files already
+                        in the directory aren't uploaded [default: False]
+  --settle=<seconds>    With --watch, upload files once they haven't changed
+                        for this many seconds [default: 2]
+  --skip-existing       Don't upload files of a directory that are already in
+                        the repository with the same checksum. Files are
+                        hashed in parallel with uploads [default: False]
+  --to-config=<path>    Configuration file (as written by `nexus3 login`) of
+                        the Nexus service `nexus3 replicate` copies to
+  --from-config=<path>  Configuration file of the Nexus service `nexus3
+                        replicate` copies from; defaults to ~/.nexus-cli
+  --checkpoint=<file>   Record the artefacts replicated in this file and skip
+                        them when `nexus3 replicate` is run again
+  --delete              Delete files in the `nexus3 sync` destination that
+                        aren't in the source [default: False]
+  --dry-run             Show the changes `nexus3 sync` would make, without
+                        making them [default: False]
+  --max-rate=<bytes>    Limit artefact transfers to this many bytes per
+                        second, across all concurrent transfers. Accepts K, M
+                        and G suffixes (e.g.: 10M)
+  --max-rps=<n>         Limit requests to the Nexus service to this many per
+                        second
+  --segment-threshold=<bytes>
+                        Download artefacts of this size or larger as byte
+                        ranges fetched in parallel [default: 256M]
+  --store=<dir>         Keep downloaded artefacts in this content-addressed
+                        store, shared by all downloads using it, and restore
+                        them from there instead of downloading them again
+  --store-size=<bytes>  Remove the least recently used artefacts from the
+                        store when it's larger than this. Accepts K, M and G
+                        suffixes (e.g.: 10G)
+  --archive=<format>    Download to a tar, tar.gz or zip archive written to
+                        <to_dst>; use - as <to_dst> for stdout. Writing to
+                        stdout defaults to tar
+  --prefetch=<n>        When downloading to an archive, download this many
+                        artefacts in parallel ahead of the one being written
+                        [default: 0]
+  --metrics-file=<path>
+                        Write request latencies, errors and retries per
+                        endpoint, and the assets and bytes transferred, to
+                        this file when the command ends; in the Prometheus
+                        text format read by the node_exporter textfile
+                        collector
+  --metrics-port=<port>
+                        Serve the same metrics, in the OpenMetrics or
+                        Prometheus text format, at /metrics on this port while
+                        the command runs; on 127.0.0.1 unless given as
+                        <address>:<port>, e.g. 0.0.0.0:9100
+  --socket=<path>       Unix socket `nexus3 daemon` listens on; defaults to
+                        $NEXUS3_SOCKET or ~/.nexus-cli.sock
+
+Global options, accepted before or after any command or sub-command:
+  --stats               At exit, print to stderr the time spent on the network,
+                        hashing, JSON decoding and disk writes, and the
+                        requests made
+  --profile=<file>      Write a cProfile dump of the command, including its
+                        threads, to this file; read it with `python -m pstats`
+  --record=<archive>    Record the requests made to the Nexus service and their
+                        responses, with credentials redacted, to this zip file
+  --replay=<archive>    Answer requests with the responses recorded in this
+                        file, instead of using the Nexus service
+  --replay-latency=<factor>
+                        Multiply the recorded response times by this factor
+                        when replaying; 0 to answer immediately [default: 1]
 
 Commands:
   login         Test login and save credentials to ~/.nexus-cli
   list          List all files within a path in the repository
-  upload        Upload file(s) to designated repository
+  upload        Upload file(s) to designated repository; use - as <from_src>
+                to upload stdin to the <to_repository> file
   download      Download an artefact or a directory to local file system
   delete        Delete artefact(s) from repository
+  copy          Copy artefact(s) to another repository path, without using
+                local disk
+  replicate     Copy missing artefact(s) to another Nexus service
+  sync          Mirror a repository directory to a local directory or, if
+                <from_src> is a local directory, the reverse
+  daemon        Keep a client connected to the Nexus service and run the
+                commands of other `nexus3` calls with it, until interrupted;
+                restart it after `nexus3 login`
 
 Sub-commands:
   cleanup_policy  Cleanup Policy management.
   repository      Repository management.
   script          Script management.
 """
+import functools
 import pkg_resources
 import sys
+import time
 from docopt import docopt, DocoptExit
 
-from nexuscli import exception
+from nexuscli import exception, recording, stats
 from nexuscli.cli import errors, util
 
 
@@ -47,6 +145,14 @@ def _is_root_command(maybe):
     return True
 
 
+# options accepted by all commands and sub-commands; see _pop_global_options
+GLOBAL_FLAGS = ('--stats',)
+GLOBAL_OPTIONS = ('--profile', '--record', '--replay', '--replay-latency')
+# command aliases, normalised in metric labels
+COMMAND_ALIASES = {'ls': 'list', 'up': 'upload', 'dl': 'download',
+                   'del': 'delete', 'cp': 'copy'}
+
+
 def _find_root_command(arguments):
     for command, value in arguments.items():
         if _is_root_command(command):
@@ -61,14 +167,18 @@ def _run_root_commands(arguments):
     # root commands are handled by methods named `root_commands.cmd_COMMAND`,
     # where COMMAND is the first argument given by the user
     from nexuscli.cli import root_commands
-    command_method = getattr(root_commands, _find_root_command(arguments))
+    method_name = _find_root_command(arguments)
+    command_method = getattr(root_commands, method_name)
 
     # don't show "missing config" error when the user is creating a config
     client = None
     if not arguments['login']:
         client = util.get_client()
 
-    return command_method(client, arguments)
+    command = method_name[len('cmd_'):]
+    with util.export_metrics(
+            client, COMMAND_ALIASES.get(command, command), arguments):
+        return command_method(client, arguments)
 
 
 def _run_subcommand(arguments, subcommand):
@@ -91,14 +201,92 @@ def _run_subcommand(arguments, subcommand):
     return subcommand_method(argv)
 
 
+def _pop_global_options(argv):
+    """
+    Removes the global options, which docopt would only accept where the usage
+    patterns list them, from the command line.
+
+    :return: the remaining arguments and the global options, by name, with
+        their value (True for flags) or None if they weren't given.
+    :rtype: tuple[list, dict]
+    """
+    remaining = []
+    options = dict.fromkeys(GLOBAL_FLAGS + GLOBAL_OPTIONS)
+    argv = iter(argv)
+    for argument in argv:
+        name, equals, value = argument.partition('=')
+        if argument == '--':
+            remaining.append(argument)
+            remaining.extend(argv)
+        elif argument in GLOBAL_FLAGS:
+            options[argument] = True
+        elif argument in GLOBAL_OPTIONS:
+            options[argument] = next(argv, None)
+            if options[argument] is None:
+                raise DocoptExit(f'{argument} requires a value')
+        elif equals and name in GLOBAL_OPTIONS:
+            options[name] = value
+        else:
+            remaining.append(argument)
+    return remaining, options
+
+
+def _open_transport(options):
+    """The transport given by the --record or --replay options, if any"""
+    if options['--record']:
+        return recording.Recorder(options['--record'])
+    if options['--replay']:
+        return recording.ReplayTransport(
+            options['--replay'],
+            latency_scale=float(options['--replay-latency'] or 1))
+    return None
+
+
 def main(argv=None):
     """Entrypoint for the setuptools CLI console script"""
+    if argv is None:
+        argv = sys.argv[1:]
+    argv, options = _pop_global_options(argv)
+    if not any(options.values()):
+        return _main(argv)
+
+    profile_path = options['--profile']
+    phase_stats = stats.enable() if options['--stats'] else None
+    profiler = stats.ThreadProfiler() if profile_path else None
+    transport = _open_transport(options)
+    util.set_transport(transport)
+    started = time.monotonic()
+    try:
+        if profiler is not None:
+            profiler.start()
+        return _main(argv)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            profiler.dump(profile_path)
+            sys.stderr.write(f'Profile written to {profile_path}\n')
+        if phase_stats is not None:
+            stats.disable()
+            sys.stderr.write(phase_stats.report(time.monotonic() - started))
+        if transport is not None:
+            util.set_transport(None)
+            transport.close()
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_arguments(argv):
+    # cached, as parsing the usage takes longer than many commands run by
+    # `nexus3 daemon`
     try:
-        arguments = docopt(__doc__, argv=argv)
+        return docopt(__doc__, argv=argv)
     except DocoptExit:
         # FIXME: it's time to ditch docopt for something that supports
         #   subcommands natively
-        arguments = docopt(__doc__, argv=argv, options_first=True)
+        return docopt(__doc__, argv=argv, options_first=True)
+
+
+def _main(argv):
+    arguments = dict(_parse_arguments(tuple(argv)))
 
     if arguments.get('--version'):
         print(pkg_resources.get_distribution('nexus3-cli').version)
@@ -9,6 +9,7 @@ class CliReturnCode(Enum):
     CONNECTION_ERROR = 3
     DOWNLOAD_ERROR = 4
     INVALID_CREDENTIALS = 5
+    CONFIG_NOT_FOUND = 6
     INVALID_SUBCOMMAND = 10
     SUBCOMMAND_ERROR = 11
     POLICY_NOT_FOUND = 20
@@ -1,11 +1,15 @@
 """Handles base/root commands (as opposed to subcommands)"""
 import getpass
 import inflect
+import os
 import sys
 import types
 
-from nexuscli import nexus_config
+from nexuscli import (
+    archive, daemon, exception, nexus_config, remote_copy, replicate, sync,
+    watch)
 from nexuscli.nexus_client import NexusClient
+from nexuscli.store import ArtefactStore
 from nexuscli.cli import errors, util
 
 
@@ -88,17 +92,58 @@ def _cmd_up_down_errors(count, action):
         sys.exit(errors.CliReturnCode.API_ERROR.value)
 
 
+def _upload_watch(nexus_client, source, destination, args):
+    """Performs ``nexus3 upload --watch`` until interrupted"""
+    if not os.path.isdir(source):
+        raise exception.NexusClientInvalidRepositoryPath(
+            'Only a directory can be watched')
+    repo, directory, filename = nexus_client.split_component_path(destination)
+    if filename is not None:
+        raise exception.NexusClientInvalidRepositoryPath(
+            'Not allowed to upload a directory to a file')
+
+    repository = nexus_client.repositories.get_by_name(repo)
+    sys.stderr.write(f'Watching {source} for uploads to {destination}\n')
+    uploads = watch.watch(
+        repository, source, directory, flatten=args.get('--flatten'),
+        recurse=(not args.get('--norecurse')),
+        settle=float(args.get('--settle') or watch.SETTLE_TIME))
+
+    upload_count = 0
+    try:
+        for file_path in uploads:
+            upload_count += 1
+            sys.stderr.write(f'Uploaded {file_path}\n')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        uploads.close()
+
+    file = PLURAL('file', upload_count)
+    sys.stderr.write(f'Uploaded {upload_count} {file} to {destination}\n')
+    return errors.CliReturnCode.SUCCESS.value
+
+
 def cmd_upload(nexus_client, args):
     """Performs ``nexus3 upload``"""
     source = args['<from_src>']
     destination = args['<to_repository>']
 
+    util.set_rate_limits(nexus_client, args)
+    if args.get('--watch'):
+        return _upload_watch(nexus_client, source, destination, args)
     sys.stderr.write(f'Uploading {source} to {destination}\n')
 
-    upload_count = nexus_client.upload(
-                    source, destination,
-                    flatten=args.get('--flatten'),
-                    recurse=(not args.get('--norecurse')))
+    if source == '-':
+        upload_count = nexus_client.upload_stream(
+            sys.stdin.buffer, destination)
+    else:
+        upload_count = nexus_client.upload(
+                        source, destination,
+                        flatten=args.get('--flatten'),
+                        recurse=(not args.get('--norecurse')),
+                        extract=args.get('--extract'),
+                        skip_existing=args.get('--skip-existing'))
 
     _cmd_up_down_errors(upload_count, 'upload')
 
@@ -112,17 +157,45 @@ def cmd_up(*args, **kwargs):
     return cmd_upload(*args, **kwargs)
 
 
+def _download_archive(nexus_client, source, destination, args):
+    """Performs ``nexus3 download`` to an archive; ``-`` is stdout"""
+    archive_format = args.get('--archive') or 'tar'
+    kwargs = {'archive_format': archive_format,
+              'flatten': args.get('--flatten'),
+              'prefetch': int(args.get('--prefetch') or 0)}
+    sys.stderr.write(
+        f'Downloading {source} as {archive_format} to {destination}\n')
+
+    if destination == '-':
+        return archive.write_archive(
+            nexus_client, source, sys.stdout.buffer, **kwargs)
+    with open(destination, 'wb') as fileobj:
+        return archive.write_archive(nexus_client, source, fileobj, **kwargs)
+
+
 def cmd_download(nexus_client, args):
     """Performs ``nexus3 download``"""
     source = args['<from_repository>']
     destination = args['<to_dst>']
 
-    sys.stderr.write(f'Downloading {source} to {destination}\n')
-
-    download_count = nexus_client.download(
-                        source, destination,
-                        flatten=args.get('--flatten'),
-                        nocache=args.get('--nocache'))
+    util.set_rate_limits(nexus_client, args)
+    if args.get('--segment-threshold'):
+        nexus_client.segment_threshold = util.parse_size(
+            args['--segment-threshold'])
+    if args.get('--store'):
+        max_size = args.get('--store-size')
+        nexus_client.store = ArtefactStore(
+            args['--store'], max_size=max_size and util.parse_size(max_size))
+
+    if destination == '-' or args.get('--archive'):
+        download_count = _download_archive(
+            nexus_client, source, destination, args)
+    else:
+        sys.stderr.write(f'Downloading {source} to {destination}\n')
+        download_count = nexus_client.download(
+                            source, destination,
+                            flatten=args.get('--flatten'),
+                            nocache=args.get('--nocache'))
 
     _cmd_up_down_errors(download_count, 'download')
 
@@ -137,9 +210,93 @@ def cmd_dl(*args, **kwargs):
     return cmd_download(*args, **kwargs)
 
 
+def cmd_copy(nexus_client, args):
+    """Performs ``nexus3 copy``"""
+    source = args['<from_repository>']
+    destination = args['<to_repository>']
+
+    util.set_rate_limits(nexus_client, args)
+    sys.stderr.write(f'Copying {source} to {destination}\n')
+    copy_count = remote_copy.copy(
+        nexus_client, source, destination, flatten=args.get('--flatten'),
+        nocache=args.get('--nocache'))
+
+    _cmd_up_down_errors(copy_count, 'copy')
+
+    file_word = PLURAL('file', copy_count)
+    sys.stderr.write(f'Copied {copy_count} {file_word} to {destination}\n')
+    return errors.CliReturnCode.SUCCESS.value
+
+
+def cmd_cp(*args, **kwargs):
+    """Alias for :func:`cmd_copy`"""
+    return cmd_copy(*args, **kwargs)
+
+
+def cmd_replicate(nexus_client, args):
+    """Performs ``nexus3 replicate``"""
+    source = args['<from_repository>']
+    destination = args['<to_repository>']
+
+    # the metrics exported are collected from the default client's hooks
+    client_hooks = nexus_client.hooks
+    if args.get('--from-config'):
+        nexus_client = util.get_client(args['--from-config'], required=True)
+    target_client = util.get_client(args['--to-config'], required=True)
+    for client in [nexus_client, target_client]:
+        client.hooks = client_hooks
+        util.set_rate_limits(client, args)
+
+    sys.stderr.write(f'Replicating {source} from {nexus_client.config.url} '
+                     f'to {destination} on {target_client.config.url}\n')
+    count = replicate.replicate(
+        nexus_client, target_client, source, destination,
+        checkpoint_path=args.get('--checkpoint'),
+        nocache=args.get('--nocache'))
+
+    _cmd_up_down_errors(count, 'replicate')
+
+    skipped = nexus_client.metrics.total('copy_skipped')
+    sys.stderr.write(
+        f'Replicated {count - skipped} {PLURAL("file", count - skipped)}; '
+        f'{skipped} already present\n')
+    return errors.CliReturnCode.SUCCESS.value
+
+
+def cmd_sync(nexus_client, args):
+    """Performs ``nexus3 sync``"""
+    source = args['<from_src>']
+    destination = args['<to_dst>']
+
+    util.set_rate_limits(nexus_client, args)
+    sync_plan = sync.plan(
+        nexus_client, source, destination, delete=args.get('--delete'))
+
+    if args.get('--dry-run'):
+        for line in sync_plan.describe():
+            print(line)
+        return errors.CliReturnCode.SUCCESS.value
+
+    sys.stderr.write(f'Syncing {source} to {destination}\n')
+    sync.execute(nexus_client, sync_plan)
+
+    transferred = len(sync_plan.transfers)
+    sys.stderr.write(
+        f'Transferred {transferred} {PLURAL("file", transferred)}, deleted '
+        f'{len(sync_plan.deletions)}, {sync_plan.unchanged} up-to-date\n')
+    return errors.CliReturnCode.SUCCESS.value
+
+
+def cmd_daemon(nexus_client, args):
+    """Performs ``nexus3 daemon``"""
+    daemon.serve(nexus_client, args.get('--socket'))
+    return errors.CliReturnCode.SUCCESS.value
+
+
 def cmd_delete(nexus_client, options):
     """Performs ``nexus3 delete``"""
     repository_path = options['<repository_path>']
+    util.set_rate_limits(nexus_client, options)
     delete_count = nexus_client.delete(repository_path)
 
     _cmd_up_down_errors(delete_count, 'delete')
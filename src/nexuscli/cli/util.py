@@ -1,9 +1,15 @@
+import contextlib
 import os
+import re
 import sys
 from subprocess import CalledProcessError
 
+from nexuscli import exception, stats
+from nexuscli.hash_cache import HashCache
+from nexuscli.hooks import ClientHooks
 from nexuscli.nexus_client import NexusClient
 from nexuscli.nexus_config import NexusConfig
+from nexuscli.openmetrics import JobMetrics
 
 
 try:
@@ -12,6 +18,12 @@ try:
 except (ValueError, CalledProcessError):
     TTY_MAX_WIDTH = 80
 
+SIZE_SUFFIXES = {'': 1, 'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+# transport of the clients returned by get_client; see set_transport
+_transport = None
+# client returned by get_client for the default configuration; see share_client
+_shared_client = None
+
 
 def find_cmd_method(arguments, methods):
     """
@@ -35,21 +47,69 @@ def find_cmd_method(arguments, methods):
     return None
 
 
-def get_client():
+def get_client(config_path=None, required=False):
     """
-    Returns a Nexus Client instance. Prints a warning if a configuration file
-    isn't file.
+    Returns a Nexus Client instance, or the client given to
+    :func:`share_client` for the default configuration. Prints a warning if a
+    configuration file isn't file. The client uses the default
+    :class:`~nexuscli.hash_cache.HashCache` and the transport given to
+    :func:`set_transport`, and its requests are counted by the active
+    :class:`~nexuscli.stats.PhaseStats`, if any.
 
+    :param config_path: configuration file; defaults to
+        :data:`~nexuscli.nexus_config.DEFAULT_CONFIG`.
+    :type config_path: str
+    :param required: if True, a missing configuration file is an error
+        instead of a warning.
+    :type required: bool
+    :raises exception.NexusClientConfigNotFound: if ``required`` and the
+        configuration file doesn't exist.
     :rtype: nexuscli.nexus_client.NexusClient
     """
-    config = NexusConfig()
+    if config_path is None and _shared_client is not None:
+        return _shared_client
+    config = NexusConfig(config_path=config_path)
     try:
         config.load()
     except FileNotFoundError:
+        if required:
+            raise exception.NexusClientConfigNotFound(
+                f'Configuration not found: {config.config_file}') from None
         sys.stderr.write(
             'Warning: configuration not found; proceeding with defaults.\n'
             'To remove this warning, please run `nexus3 login`\n')
-    return NexusClient(config=config)
+    client_hooks = ClientHooks()
+    phase_stats = stats.active()
+    if phase_stats is not None:
+        phase_stats.attach(client_hooks)
+    return NexusClient(
+        config=config, hash_cache=HashCache(), hooks=client_hooks,
+        transport=_transport)
+
+
+def set_transport(transport):
+    """
+    Set the transport of the clients returned by :func:`get_client`; e.g. a
+    :class:`~nexuscli.recording.Recorder` for the ``--record`` option.
+
+    :param transport: see :class:`~nexuscli.nexus_client.NexusClient`. None
+        for the default.
+    """
+    global _transport
+    _transport = transport
+
+
+def share_client(nexus_client):
+    """
+    Make :func:`get_client` return the given client for the default
+    configuration, instead of a new client; e.g. the warm client of
+    ``nexus3 daemon``.
+
+    :param nexus_client: None to return new clients again.
+    :type nexus_client: Union[nexuscli.nexus_client.NexusClient,None]
+    """
+    global _shared_client
+    _shared_client = nexus_client
 
 
 def input_with_default(prompt, default=None):
@@ -66,3 +126,81 @@ def input_with_default(prompt, default=None):
         return str(value)
 
     return str(default)
+
+
+def parse_size(value):
+    """
+    Converts a human-readable size to a number of bytes. The optional suffix
+    is case-insensitive and uses powers of 1024; e.g.: ``512``, ``64k``,
+    ``10M``, ``1GiB``.
+
+    :param value: the size to be converted.
+    :type value: str
+    :return: number of bytes.
+    :rtype: int
+    :raises ValueError: if value isn't a valid size.
+    """
+    match = re.fullmatch(
+        r'\s*(\d+(?:\.\d+)?)\s*([kmg]?)(?:i?b)?\s*', str(value),
+        flags=re.IGNORECASE)
+    if match is None:
+        raise ValueError(f'Invalid size: {value}')
+
+    number, suffix = match.groups()
+    return int(float(number) * SIZE_SUFFIXES[suffix.lower()])
+
+
+def set_rate_limits(nexus_client, args):
+    """
+    Applies the ``--max-rate`` and ``--max-rps`` command-line options to the
+    given client.
+
+    :param nexus_client: the client used by the command.
+    :type nexus_client: nexuscli.nexus_client.NexusClient
+    :param args: the return of :py:func:`docopt.docopt`.
+    """
+    max_rate = args.get('--max-rate')
+    max_rps = args.get('--max-rps')
+    nexus_client.set_rate_limits(
+        max_rate=parse_size(max_rate) if max_rate else None,
+        max_rps=float(max_rps) if max_rps else None)
+
+
+@contextlib.contextmanager
+def export_metrics(nexus_client, command, args):
+    """
+    Applies the ``--metrics-file`` and ``--metrics-port`` command-line
+    options: collects the statistics of the given client (and of clients
+    sharing its :attr:`~nexuscli.nexus_client.NexusClient.hooks`) while the
+    context is active, serving them over HTTP, and writes them to a file when
+    it exits, even if the command fails.
+
+    :param nexus_client: the client used by the command; None if it doesn't
+        use one.
+    :type nexus_client: nexuscli.nexus_client.NexusClient
+    :param command: the command name, used as a metric label.
+    :type command: str
+    :param args: the return of :py:func:`docopt.docopt`.
+    :return: a context manager yielding the
+        :class:`~nexuscli.openmetrics.JobMetrics` or None, without options.
+    """
+    metrics_file = args.get('--metrics-file')
+    metrics_port = args.get('--metrics-port')
+    if nexus_client is None or not (metrics_file or metrics_port):
+        yield None
+        return
+
+    job_metrics = JobMetrics(command)
+    job_metrics.attach(nexus_client.hooks)
+    if metrics_port:
+        # only exposed beyond this host when an address is given
+        address, _, port = metrics_port.rpartition(':')
+        address = address or '127.0.0.1'
+        port = job_metrics.serve(int(port), address)
+        sys.stderr.write(f'Serving metrics on {address}:{port}\n')
+    try:
+        yield job_metrics
+    finally:
+        job_metrics.close()
+        if metrics_file:
+            job_metrics.write(metrics_file)
@@ -0,0 +1,10 @@
+"""Standard library features missing from the older Python versions supported
+by nexus3-cli"""
+import http.server
+import socketserver
+
+
+class ThreadingHTTPServer(socketserver.ThreadingMixIn,
+                          http.server.HTTPServer):
+    """:class:`http.server.ThreadingHTTPServer`, added in Python 3.7"""
+    daemon_threads = True
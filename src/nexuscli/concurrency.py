@@ -0,0 +1,215 @@
+"""Concurrency control for bulk operations against the Nexus service"""
+import collections
+import concurrent.futures
+import contextlib
+import logging
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+OVERLOAD_STATUSES = frozenset([429, 503])
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of the given values.
+
+    :param values: a non-empty collection of numbers.
+    :param fraction: the percentile as a fraction; e.g. 0.95 for p95.
+    :rtype: float
+    """
+    ordered = sorted(values)
+    rank = int(round(fraction * len(ordered)))
+    index = min(len(ordered) - 1, max(0, rank - 1))
+    return ordered[index]
+
+
+class AdaptiveLimiter:
+    """
+    Limits how many operations run at the same time, adjusting the limit
+    according to how the Nexus service is coping with the load
+    (additive-increase/multiplicative-decrease).
+
+    The limit grows by one every time ``limit`` consecutive requests complete
+    while the p95 latency stays within ``latency_tolerance`` times the
+    baseline (the lowest p95 observed, slowly drifting towards the current
+    p95). The limit is multiplied by ``backoff_ratio`` when the service
+    responds with 429 or 503 or when the p95 latency rises above the
+    tolerance. Every change is logged at the INFO level.
+
+    :param initial: initial limit.
+    :type initial: int
+    :param minimum: the limit never goes below this.
+    :type minimum: int
+    :param maximum: the limit never goes above this.
+    :type maximum: int
+    :param backoff_ratio: multiplier applied to the limit on overload.
+    :type backoff_ratio: float
+    :param latency_tolerance: how many times the baseline latency the p95 may
+        reach before it's considered an overload.
+    :type latency_tolerance: float
+    :param window: number of recent request latencies used to calculate p95.
+    :type window: int
+    :param cooldown: seconds after a decrease during which further overload
+        signals are ignored; requests in flight at the time of a decrease
+        would otherwise decrease it again.
+    :type cooldown: float
+    """
+    def __init__(self, initial=4, minimum=1, maximum=32, backoff_ratio=0.5,
+                 latency_tolerance=2.0, window=20, cooldown=1.0):
+        if not minimum <= initial <= maximum:
+            raise ValueError(
+                f'Expected minimum <= initial <= maximum; got {minimum}, '
+                f'{initial}, {maximum}')
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self._limit = initial
+        self._in_flight = 0
+        self._condition = threading.Condition()
+        self._latencies = collections.deque(maxlen=window)
+        self._baseline = None
+        self._successes = 0
+        self._last_decrease = None
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(limit={self._limit}, '
+                f'minimum={self.minimum}, maximum={self.maximum})')
+
+    @classmethod
+    def fixed(cls, limit):
+        """A limiter that always allows ``limit`` concurrent operations"""
+        return cls(initial=limit, minimum=limit, maximum=limit)
+
+    @property
+    def limit(self):
+        """Current maximum number of concurrent operations"""
+        return self._limit
+
+    def acquire(self):
+        """Block until there's capacity for one more operation"""
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self):
+        """Signal that an operation started with :meth:`acquire` finished"""
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self):
+        """Context manager for :meth:`acquire` and :meth:`release`"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _set_limit(self, limit, reason):
+        limit = max(self.minimum, min(self.maximum, limit))
+        if limit != self._limit:
+            LOG.info('Concurrency limit %d -> %d: %s',
+                     self._limit, limit, reason)
+            self._limit = limit
+            self._condition.notify_all()
+        self._successes = 0
+
+    def _decrease(self, reason):
+        now = time.monotonic()
+        if (self._last_decrease is not None and
+                now - self._last_decrease < self.cooldown):
+            return
+        self._last_decrease = now
+        self._latencies.clear()
+        self._set_limit(int(self._limit * self.backoff_ratio), reason)
+
+    def record(self, latency, status_code):
+        """
+        Feed the outcome of a request to the limiter.
+
+        :param latency: seconds until the response headers were received.
+        :type latency: float
+        :param status_code: HTTP status code of the response.
+        :type status_code: int
+        """
+        with self._condition:
+            if status_code in OVERLOAD_STATUSES:
+                self._decrease(f'service responded {status_code}')
+                return
+
+            self._latencies.append(latency)
+            p95 = percentile(self._latencies, 0.95)
+            if self._baseline is None or p95 < self._baseline:
+                self._baseline = p95
+            else:
+                self._baseline += (p95 - self._baseline) * 0.05
+
+            if (len(self._latencies) == self._latencies.maxlen and
+                    p95 > self._baseline * self.latency_tolerance):
+                self._decrease(f'p95 latency {p95:.3f}s above baseline '
+                               f'{self._baseline:.3f}s')
+                return
+
+            self._successes += 1
+            if self._successes >= self._limit:
+                self._set_limit(self._limit + 1,
+                                f'p95 latency {p95:.3f}s is stable')
+
+
+def run_concurrently(function, items, limiter=None):
+    """
+    Call ``function`` for each of the given items, concurrently, as allowed
+    by the ``limiter``.
+
+    Only a bounded number of items is consumed from ``items`` ahead of the
+    operations in progress, so it can be a (long) generator. When the
+    returned generator is closed, operations not yet started are cancelled.
+
+    :param function: callable taking a single item as argument.
+    :param items: iterable with the arguments for ``function``.
+    :param limiter: decides how many calls to ``function`` run at the same
+        time. When None, items are processed sequentially in the calling
+        thread.
+    :type limiter: AdaptiveLimiter
+    :return: a generator yielding the value returned by ``function`` for each
+        item, in completion order. Exceptions raised by ``function`` are
+        re-raised when its result would be yielded.
+    :rtype: typing.Iterator
+    """
+    if limiter is None:
+        for item in items:
+            yield function(item)
+        return
+
+    def _task(item):
+        with limiter.slot():
+            return function(item)
+
+    backlog = limiter.maximum * 2
+    pending = set()
+    executor = concurrent.futures.ThreadPoolExecutor(
+        max_workers=limiter.maximum)
+    try:
+        for item in items:
+            pending.add(executor.submit(_task, item))
+            if len(pending) >= backlog:
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,337 @@
+"""A long-running ``nexus3 daemon`` that runs the commands of other ``nexus3``
+calls with a warm :class:`~nexuscli.nexus_client.NexusClient`, and the
+``nexus3`` console script that forwards commands to it.
+
+The daemon keeps the client, its configuration, its connection pool and its
+concurrency limits between commands, so a forwarded command doesn't pay for
+importing the CLI, loading the configuration, listing the repositories or
+connecting to the Nexus service. Commands are sent over a unix socket, one
+JSON line per command, and run one at a time, in the working directory of the
+caller. Their output, including progress bars, is sent back as JSON lines as
+it's written, followed by their exit code.
+
+This module only imports the standard library at the top level, so forwarding
+a command stays cheap; the CLI is imported by the daemon, or when the command
+can't be forwarded.
+"""
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+LOG = logging.getLogger(__name__)
+
+SOCKET_ENV = 'NEXUS3_SOCKET'
+DEFAULT_SOCKET = '~/.nexus-cli.sock'
+# commands that prompt for input or serve until interrupted
+LOCAL_COMMANDS = ('login', 'daemon')
+# options that affect the process running the command, or use its terminal
+LOCAL_OPTIONS = ('--stats', '--profile', '--record', '--replay',
+                 '--replay-latency', '--watch')
+
+
+def socket_path(path=None):
+    """
+    The unix socket of the daemon.
+
+    :param path: if given, this path instead of the default: the
+        ``NEXUS3_SOCKET`` environment variable or ``~/.nexus-cli.sock``.
+    :type path: str
+    :rtype: str
+    """
+    path = path or os.environ.get(SOCKET_ENV) or DEFAULT_SOCKET
+    return os.path.expanduser(path)
+
+
+def forwardable(argv):
+    """
+    Whether the daemon can run a command: the command doesn't read stdin,
+    write binary data to stdout, prompt for input or use the
+    :data:`LOCAL_OPTIONS`.
+
+    :param argv: the command line arguments, without the program name.
+    :type argv: list
+    :rtype: bool
+    """
+    if not argv or argv[0] in LOCAL_COMMANDS:
+        return False
+    for argument in argv:
+        if argument == '-' or argument.partition('=')[0] in LOCAL_OPTIONS:
+            return False
+    # repository deletion asks for confirmation without --force
+    if argv[0] == 'repository' and {'delete', 'del'} & set(argv) and \
+            '--force' not in argv:
+        return False
+    return True
+
+
+def forward(argv, path=None):
+    """
+    Send a command to the daemon and print its output until it has run.
+
+    :param argv: the command line arguments, without the program name.
+    :type argv: list
+    :param path: the daemon's socket; see :func:`socket_path`.
+    :type path: str
+    :return: the command's exit code, or None if the daemon isn't running.
+    :rtype: Union[int,None]
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path(path))
+    except OSError:
+        sock.close()
+        return None
+
+    request = {'argv': list(argv), 'cwd': os.getcwd(),
+               'tty': sys.stderr.isatty()}
+    streams = {'stdout': sys.stdout, 'stderr': sys.stderr}
+    with sock, sock.makefile('rwb') as channel:
+        channel.write(json.dumps(request).encode() + b'\n')
+        channel.flush()
+        for line in channel:
+            message = json.loads(line)
+            if 'exit_code' in message:
+                return message['exit_code']
+            for name, text in message.items():
+                streams[name].write(text)
+                streams[name].flush()
+
+    # the command may have run, so it isn't run again here
+    from nexuscli.cli import errors
+    sys.stderr.write('nexus3 daemon exited while running the command\n')
+    return errors.CliReturnCode.UNKNOWN_ERROR.value
+
+
+def main(argv=None):
+    """
+    Entrypoint for the setuptools CLI console script: the command is run by
+    the daemon when it's running and :func:`forwardable`, and by
+    :func:`nexuscli.cli.main` otherwise.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if forwardable(argv):
+        exit_code = forward(argv)
+        if exit_code is not None:
+            return exit_code
+
+    from nexuscli import cli
+    return cli.main(argv)
+
+
+def _exit_code(error):
+    """The exit code of a command that raised SystemExit, e.g. docopt"""
+    if error.code is None or isinstance(error.code, int):
+        return error.code or 0
+    sys.stderr.write(f'{error.code}\n')
+    return 1
+
+
+def reset_client(nexus_client):
+    """
+    Undo the changes a command makes to the settings of a client: rate limits,
+    segment threshold, artefact store, hooks and metrics. Its configuration,
+    connections and concurrency limits are kept.
+
+    :type nexus_client: nexuscli.nexus_client.NexusClient
+    """
+    from nexuscli import nexus_client as nexus_client_module
+    from nexuscli.hooks import ClientHooks
+    from nexuscli.metrics import ClientMetrics
+
+    nexus_client.set_rate_limits()
+    nexus_client.segment_threshold = \
+        nexus_client_module.DEFAULT_SEGMENT_THRESHOLD
+    nexus_client.store = None
+    nexus_client.hooks = ClientHooks()
+    nexus_client.metrics = ClientMetrics()
+
+
+class _OutputStream(io.TextIOBase):
+    """A text stream sending what's written to the caller of a command as
+    ``{name: text}`` JSON lines. Writes are discarded once the caller has
+    gone, so the command isn't interrupted."""
+    def __init__(self, name, channel, lock, tty=False):
+        super().__init__()
+        self.name = name
+        self._channel = channel
+        self._lock = lock
+        self._tty = tty
+
+    def isatty(self):
+        # progress bars are only shown on terminals
+        return self._tty
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        message = json.dumps({self.name: text}).encode() + b'\n'
+        with self._lock:
+            if self._channel is not None:
+                try:
+                    self._channel.write(message)
+                except OSError:
+                    LOG.warning('The caller of the command has gone')
+                    self._channel = None
+        return len(text)
+
+
+class _CommandHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        lock = threading.Lock()
+        stdout, stderr = (
+            _OutputStream(name, self.wfile, lock, request.get('tty', False))
+            for name in ('stdout', 'stderr'))
+        exit_code = self.server.run(
+            request['argv'], request['cwd'], stdout, stderr)
+        with lock:
+            self.wfile.write(
+                json.dumps({'exit_code': exit_code}).encode() + b'\n')
+
+
+class CommandServer(socketserver.UnixStreamServer):
+    """
+    Runs the commands received on a unix socket, one at a time, with
+    :func:`nexuscli.cli.main` and a shared client. The socket is only
+    accessible to the current user.
+
+    :param path: the socket; created by the server.
+    :type path: str
+    :param nexus_client: the client returned by
+        :func:`nexuscli.cli.util.get_client` for the default configuration.
+    :type nexus_client: nexuscli.nexus_client.NexusClient
+    """
+    def __init__(self, path, nexus_client):
+        self.nexus_client = nexus_client
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, _CommandHandler)
+        finally:
+            os.umask(umask)
+
+    def run(self, argv, cwd, stdout, stderr):
+        """
+        Run a command in the directory ``cwd``, with an empty stdin.
+
+        :param argv: the command line arguments, without the program name.
+        :type argv: list
+        :type cwd: str
+        :param stdout: text stream the command's output is written to.
+        :param stderr: text stream the command's errors and progress bars are
+            written to.
+        :return: the command's exit code.
+        :rtype: int
+        """
+        from clint.textui import progress
+        from nexuscli import cli
+        from nexuscli.cli import errors, util
+
+        LOG.info('Running %s in %s', argv, cwd)
+        previous_cwd, stdin = os.getcwd(), sys.stdin
+        # clint writes progress bars to the stderr it was imported with
+        progress_stream = progress.STREAM
+        exit_code = errors.CliReturnCode.UNKNOWN_ERROR.value
+        reset_client(self.nexus_client)
+        util.share_client(self.nexus_client)
+        try:
+            with contextlib.redirect_stdout(stdout), \
+                    contextlib.redirect_stderr(stderr):
+                try:
+                    os.chdir(cwd)
+                    sys.stdin = io.StringIO()
+                    progress.STREAM = stderr
+                    exit_code = cli.main(argv)
+                except SystemExit as e:
+                    exit_code = _exit_code(e)
+                except Exception as e:
+                    LOG.exception('Command %s failed', argv)
+                    sys.stderr.write(f'nexus3 daemon: {e}\n')
+        finally:
+            progress.STREAM = progress_stream
+            sys.stdin = stdin
+            util.share_client(None)
+            os.chdir(previous_cwd)
+        return exit_code
+
+    def handle_error(self, request, client_address):
+        # e.g. the caller was interrupted before the command's end
+        LOG.warning('Command channel error', exc_info=True)
+
+
+def _session(nexus_client):
+    """A session keeping as many connections as the client's concurrency"""
+    import requests
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_maxsize=nexus_client.concurrency.maximum)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _remove_stale_socket(path):
+    from nexuscli import exception
+
+    if not os.path.exists(path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except OSError:
+            os.remove(path)
+            return
+    raise exception.NexusClientDaemonError(
+        f'nexus3 daemon is already running on {path}')
+
+
+def serve(nexus_client, path=None):
+    """
+    Run the commands sent by :func:`forward` until interrupted (SIGINT or
+    SIGTERM). Unless it has one, the client is given a
+    :class:`requests.Session` transport, to reuse connections between
+    commands.
+
+    :param nexus_client: the warm client used by commands.
+    :type nexus_client: nexuscli.nexus_client.NexusClient
+    :param path: the socket to listen on; see :func:`socket_path`.
+    :type path: str
+    :raises exception.NexusClientDaemonError: if a daemon is already
+        listening on the socket.
+    """
+    import signal
+
+    path = socket_path(path)
+    _remove_stale_socket(path)
+    session = None
+    if nexus_client.transport is None:
+        session = nexus_client.transport = _session(nexus_client)
+    server = CommandServer(path, nexus_client)
+    previous_handler = signal.signal(
+        signal.SIGTERM, signal.default_int_handler)
+    sys.stderr.write(f'nexus3 daemon listening on {path}\n')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        if session is not None:
+            nexus_client.transport = None
+            session.close()
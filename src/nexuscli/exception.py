@@ -27,6 +27,11 @@ class NexusClientInvalidCredentials(NexusClientBaseError):
     DEFAULT_CLI_RETURN_CODE = CliReturnCode.INVALID_CREDENTIALS
 
 
+class NexusClientConfigNotFound(NexusClientBaseError):
+    """A required configuration file does not exist."""
+    DEFAULT_CLI_RETURN_CODE = CliReturnCode.CONFIG_NOT_FOUND
+
+
 class NexusClientInvalidRepositoryPath(NexusClientBaseError):
     """
     Used when an operation against the Nexus service uses an invalid or
@@ -58,3 +63,8 @@ class NexusClientCreateCleanupPolicyError(NexusClientBaseError):
 class DownloadError(NexusClientBaseError):
     """Error retrieving artefact from Nexus service."""
     DEFAULT_CLI_RETURN_CODE = CliReturnCode.DOWNLOAD_ERROR
+
+
+class NexusClientDaemonError(NexusClientBaseError):
+    """The ``nexus3 daemon`` can't be started."""
+    pass
@@ -0,0 +1,133 @@
+"""Persistent cache of local file hashes"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+LOG = logging.getLogger(__name__)
+
+
+def _default_cache_path():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or Path.home().joinpath(
+        '.cache')
+    return str(Path(cache_home).joinpath('nexus3-cli', 'hashes.sqlite3'))
+
+
+DEFAULT_HASH_CACHE = _default_cache_path()
+
+
+class HashCache:
+    """
+    Remembers the hashes calculated for local files so they don't need to be
+    read again to be compared with the checksum of a Nexus asset.
+
+    An entry is only valid while the size and modification time of the file
+    are the same as when its hashes were stored. The cache is a SQLite
+    database, created on first use, and can be shared by threads and
+    processes. If the database can't be created, read or written (e.g. the
+    cache directory isn't writable), a warning is logged once and nothing is
+    cached.
+
+    :param path: location of the cache database.
+    :type path: str
+    """
+    def __init__(self, path=DEFAULT_HASH_CACHE):
+        self.path = str(path)
+        self._connection = None
+        self._lock = threading.Lock()
+        self._disabled = False
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.path!r})'
+
+    def _connect(self):
+        if self._connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, check_same_thread=False,
+                isolation_level=None)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS files ('
+                'path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, '
+                'hashes TEXT)')
+        return self._connection
+
+    @staticmethod
+    def _key(file_path):
+        file_path = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        return file_path, stat.st_size, stat.st_mtime_ns
+
+    def _get_hashes(self, path, size, mtime_ns):
+        row = self._connect().execute(
+            'SELECT hashes FROM files WHERE path = ? AND size = ? AND '
+            'mtime_ns = ?', (path, size, mtime_ns)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _disable(self, error):
+        # called with the lock held
+        LOG.warning('Not caching file hashes: %s: %s', self.path, error)
+        self._disabled = True
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def get(self, file_path, hash_name):
+        """
+        Cached hash for a file.
+
+        :param file_path: local file.
+        :param hash_name: name of the hash algorithm in hashlib.
+        :type hash_name: str
+        :return: the hash or None, if not cached or the file has changed since
+            it was cached.
+        :rtype: Union[str,None]
+        """
+        try:
+            key = self._key(file_path)
+        except OSError:
+            return None
+
+        with self._lock:
+            if self._disabled:
+                return None
+            try:
+                return self._get_hashes(*key).get(hash_name)
+            except (OSError, sqlite3.Error) as e:
+                self._disable(e)
+                return None
+
+    def put(self, file_path, hashes):
+        """
+        Store hashes for a file, in addition to any hashes already cached for
+        the same version of the file.
+
+        :param file_path: local file.
+        :param hashes: hash algorithm name to hexadecimal digest.
+        :type hashes: dict
+        """
+        try:
+            key = self._key(file_path)
+        except OSError:
+            return
+
+        with self._lock:
+            if self._disabled:
+                return
+            try:
+                cached = self._get_hashes(*key)
+                cached.update(hashes)
+                self._connect().execute(
+                    'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)',
+                    key + (json.dumps(cached, sort_keys=True),))
+            except (OSError, sqlite3.Error) as e:
+                self._disable(e)
+
+    def close(self):
+        """Close the database connection; it's re-opened when required"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,123 @@
+"""Events emitted by :class:`~nexuscli.nexus_client.NexusClient`, so callers
+can attach their own metrics, tracing or logging"""
+import logging
+import threading
+
+LOG = logging.getLogger(__name__)
+
+#: before each attempt of a request; fields: ``method``, ``url``,
+#: ``attempt``.
+REQUEST_START = 'request_start'
+#: after each attempt of a request; fields: ``method``, ``url``, ``attempt``,
+#: ``status`` (None if no response was received), ``elapsed`` (seconds until
+#: the response headers were received), ``bytes_sent`` and
+#: ``bytes_received`` (the request body and response ``Content-Length``
+#: sizes; None when unknown) and ``error`` (the exception raised, if any).
+REQUEST_END = 'request_end'
+#: before a failed request or interrupted transfer is retried; fields:
+#: ``method``, ``url``, ``attempt`` (the attempt that failed), ``reason`` and
+#: ``backoff`` (seconds waited before the next attempt).
+RETRY = 'retry'
+#: after each page of a paginated listing is received; fields:
+#: ``endpoint``, ``page`` (starting at 1), ``items`` (number of items in the
+#: page) and ``elapsed`` (seconds to receive and decode the page).
+PAGE_FETCHED = 'page_fetched'
+#: after an asset is downloaded or uploaded; fields: ``direction``
+#: (``download`` or ``upload``), ``url`` (download URL or repository path),
+#: ``size`` (bytes transferred; None when unknown) and ``elapsed`` (seconds).
+ASSET_TRANSFERRED = 'asset_transferred'
+#: when an asset isn't transferred because the destination is up-to-date;
+#: fields: ``direction``, ``url`` and ``path`` (the local file).
+ASSET_SKIPPED = 'asset_skipped'
+
+EVENTS = (REQUEST_START, REQUEST_END, RETRY, PAGE_FETCHED,
+          ASSET_TRANSFERRED, ASSET_SKIPPED)
+
+
+class ClientHooks:
+    """
+    Callbacks called for the events in :data:`EVENTS`, e.g.:
+
+    >>> hooks = ClientHooks()
+    >>> def on_end(event, method, url, status, elapsed, **_):
+    ...     print(event, method, url, status)
+    >>> hooks.add(REQUEST_END, on_end)
+    >>> hooks.emit(REQUEST_END, method='get', url='http://nexus/',
+    ...            status=200, elapsed=0.1)
+    request_end get http://nexus/ 200
+
+    Callbacks are called, in the order they were added, by the thread that
+    emits the event and with the event name followed by its fields as keyword
+    arguments. New fields may be added to events, so callbacks should accept
+    arbitrary keyword arguments. Exceptions raised by a callback are logged
+    and otherwise ignored.
+
+    Emitting an event without callbacks costs a dictionary look-up.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # event to a tuple of callbacks; replaced, not modified, when a
+        # callback is added or removed so emit doesn't need the lock
+        self._callbacks = {}
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({sorted(self._callbacks)!r})'
+
+    def __contains__(self, event):
+        """Whether ``event`` has callbacks"""
+        return event in self._callbacks
+
+    @staticmethod
+    def _validate(event):
+        if event not in EVENTS:
+            raise ValueError(
+                f'Unknown event {event}; expected one of: '
+                f'{", ".join(EVENTS)}')
+
+    def add(self, event, callback):
+        """
+        Call ``callback`` whenever ``event`` is emitted.
+
+        :param event: one of :data:`EVENTS`.
+        :type event: str
+        :param callback: called as ``callback(event, **fields)``.
+        :type callback: typing.Callable
+        :raises ValueError: if the event is unknown.
+        """
+        self._validate(event)
+        with self._lock:
+            self._callbacks[event] = self._callbacks.get(event, ()) + (
+                callback,)
+
+    def remove(self, event, callback):
+        """
+        Stop calling a callback added with :meth:`add`.
+
+        :raises ValueError: if the callback wasn't added for this event.
+        """
+        self._validate(event)
+        with self._lock:
+            callbacks = list(self._callbacks.get(event, ()))
+            callbacks.remove(callback)
+            if callbacks:
+                self._callbacks[event] = tuple(callbacks)
+            else:
+                del self._callbacks[event]
+
+    def emit(self, event, **fields):
+        """
+        Call the callbacks added for ``event``.
+
+        :param event: one of :data:`EVENTS`.
+        :type event: str
+        :param fields: the event fields, as documented for each event.
+        """
+        callbacks = self._callbacks.get(event)
+        if not callbacks:
+            return
+        for callback in callbacks:
+            try:
+                callback(event, **fields)
+            except Exception:
+                LOG.warning('Error in %s callback %r', event, callback,
+                            exc_info=True)
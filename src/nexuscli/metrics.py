@@ -0,0 +1,76 @@
+"""Counters collected by :class:`~nexuscli.nexus_client.NexusClient`"""
+import collections
+import threading
+
+
+class ClientMetrics:
+    """
+    Thread-safe counters describing the activity of a
+    :class:`~nexuscli.nexus_client.NexusClient` instance.
+
+    Each counter is identified by a name and an optional set of labels, e.g.:
+
+    >>> metrics = ClientMetrics()
+    >>> metrics.increment('retries', method='get', reason='503')
+    >>> metrics.get('retries', method='get', reason='503')
+    1
+    >>> metrics.total('retries')
+    1
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = collections.Counter()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def increment(self, name, value=1, **labels):
+        """
+        Add ``value`` to the counter identified by ``name`` and ``labels``.
+
+        :param name: counter name.
+        :type name: str
+        :param value: amount to be added to the counter.
+        :type value: int
+        :param labels: free-form labels to further identify the counter.
+        """
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] += value
+
+    def get(self, name, **labels):
+        """
+        Current value for the counter identified by ``name`` and ``labels``.
+
+        :rtype: int
+        """
+        with self._lock:
+            return self._counters[self._key(name, labels)]
+
+    def total(self, name):
+        """
+        Sum of all counters named ``name``, regardless of their labels.
+
+        :rtype: int
+        """
+        with self._lock:
+            return sum(value for (counter_name, _), value
+                       in self._counters.items() if counter_name == name)
+
+    def to_list(self):
+        """
+        All counters as a list of ``(name, labels, value)`` tuples, where
+        labels is a :py:obj:`dict`.
+
+        :rtype: list[tuple[str, dict, int]]
+        """
+        with self._lock:
+            items = sorted(self._counters.items())
+        return [(name, dict(labels), value)
+                for (name, labels), value in items]
+
+    def reset(self):
+        """Set all counters back to zero."""
+        with self._lock:
+            self._counters.clear()
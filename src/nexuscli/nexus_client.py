@@ -1,21 +1,144 @@
+import hashlib
 import json
 import logging
+import math
 import os
 import pathlib
 import requests
 import semver
-import sys
+import time
+import urllib3
 from clint.textui import progress
 from urllib.parse import urljoin
 
 from nexuscli.nexus_config import NexusConfig
-from nexuscli import exception, nexus_util
+from nexuscli import exception, hooks, nexus_util, stats
+from nexuscli.concurrency import AdaptiveLimiter, run_concurrently
+from nexuscli.hooks import ClientHooks
+from nexuscli.metrics import ClientMetrics
+from nexuscli.retry import NO_RETRY, RetryPolicy, body_rewinder
+from nexuscli.store import link_file
+from nexuscli.throttle import TokenBucket
 from nexuscli.api.cleanup_policy import CleanupPolicyCollection
 from nexuscli.api.repository import validations, RepositoryCollection
 from nexuscli.api.script import ScriptCollection
 
 LOG = logging.getLogger(__name__)
 
+PARTIAL_SUFFIX = '.part'
+# hashes calculated while downloading, when present in the asset checksum
+STREAM_HASHES = ('sha1', 'sha256')
+DEFAULT_SEGMENT_THRESHOLD = 256 * 1024 ** 2
+DEFAULT_SEGMENT_COUNT = 8
+MIN_SEGMENT_SIZE = 16 * 1024 ** 2
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 ** 2
+# adaptive chunks are sized to take about this long to be received
+CHUNK_TARGET_SECONDS = 0.05
+# hashes identifying artefacts with the same content, in order of preference
+DEDUPLICATE_HASHES = ('sha256', 'sha1')
+# how duplicate artefacts are created from the first one downloaded; not
+# hardlinks, so modifying one of them doesn't modify the others
+DEDUPLICATE_LINK_MODES = ('reflink', 'copy')
+# exceptions raised when a transfer is interrupted and can be resumed, in
+# addition to exception.NexusClientConnectionError (not referenced here as
+# nexuscli.exception may not be fully imported yet)
+INTERRUPTED_ERRORS = (
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    urllib3.exceptions.ProtocolError,
+    urllib3.exceptions.ReadTimeoutError,
+)
+
+
+def adapt_chunk_size(chunk_size, received, elapsed):
+    """
+    Calculates the size of the next chunk read by an adaptive download: it's
+    doubled or halved, within ``MIN_CHUNK_SIZE`` and ``MAX_CHUNK_SIZE``, so
+    that receiving a chunk takes about ``CHUNK_TARGET_SECONDS``.
+
+    :param chunk_size: size requested for the last chunk.
+    :type chunk_size: int
+    :param received: bytes received for the last chunk.
+    :type received: int
+    :param elapsed: seconds it took to receive the last chunk.
+    :type elapsed: float
+    :return: the size for the next chunk.
+    :rtype: int
+    """
+    if received < chunk_size:
+        # short reads happen at the end of the content and say nothing about
+        # the throughput
+        return chunk_size
+
+    if elapsed <= 0 or received / elapsed * CHUNK_TARGET_SECONDS > \
+            chunk_size * 2:
+        return min(MAX_CHUNK_SIZE, chunk_size * 2)
+    if received / elapsed * CHUNK_TARGET_SECONDS < chunk_size / 2:
+        return max(MIN_CHUNK_SIZE, chunk_size // 2)
+    return chunk_size
+
+
+def _update_hashes(hashes, file_path):
+    """Update the given hash objects with the content of file_path"""
+    if not hashes:
+        return
+    with stats.timed(stats.HASHING), open(file_path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1024 * 1024), b''):
+            for hash_ in hashes.values():
+                hash_.update(block)
+
+
+def group_by_checksum(artefacts):
+    """
+    Group artefacts with the same content, as given by their sha256 or sha1
+    checksum. Artefacts without either are in a group of their own.
+
+    :param artefacts: as returned by :meth:`NexusClient.list_raw`.
+    :return: lists of artefacts, in the order of their first occurrence.
+    :rtype: list
+    """
+    groups = {}
+    for index, artefact in enumerate(artefacts):
+        checksum = artefact.get('checksum') or {}
+        key = next(((name, checksum[name]) for name in DEDUPLICATE_HASHES
+                    if checksum.get(name)), index)
+        groups.setdefault(key, []).append(artefact)
+    return list(groups.values())
+
+
+def partial_path(destination):
+    """
+    Location of the partial file used while downloading to ``destination``.
+
+    :param destination: download destination.
+    :type destination: Union[str,pathlib.Path]
+    :rtype: str
+    """
+    return f'{destination}{PARTIAL_SUFFIX}'
+
+
+def request_body_size(request_kwargs):
+    """
+    Size of the ``data`` body in the given :py:func:`requests.request` keyword
+    arguments.
+
+    :return: the size in bytes, 0 without a body or None if it can't be
+        determined without reading it (e.g.: a stream or multipart ``files``).
+    :rtype: Union[int,None]
+    """
+    if request_kwargs.get('files'):
+        return None
+    data = request_kwargs.get('data')
+    if data is None:
+        return 0
+    if isinstance(data, str):
+        data = data.encode()
+    if isinstance(data, bytes):
+        return len(data)
+    return None
+
 
 class NexusClient(object):
     """
@@ -28,9 +151,75 @@ class NexusClient(object):
     Args:
         config (NexusConfig): instance containing the configuration for the
             Nexus service used by this instance.
+        retry_policy (RetryPolicy): decides which failed requests are retried
+            and how long to wait between attempts. Defaults to
+            :class:`~nexuscli.retry.RetryPolicy` with its default settings; use
+            :data:`~nexuscli.retry.NO_RETRY` to disable retries.
+        concurrency (AdaptiveLimiter): limits the number of concurrent
+            transfers in bulk operations (:meth:`download`, :meth:`delete` and
+            directory uploads). Defaults to
+            :class:`~nexuscli.concurrency.AdaptiveLimiter` with its default
+            settings; use :meth:`AdaptiveLimiter.fixed(1)
+            <nexuscli.concurrency.AdaptiveLimiter.fixed>` for sequential
+            transfers.
+        max_rate (int): maximum bytes per second transferred by artefact
+            downloads and uploads, across all concurrent transfers. None for
+            no limit.
+        max_rps (float): maximum number of requests per second sent to the
+            Nexus service, across all threads. None for no limit.
+        hash_cache (HashCache): where the hashes of downloaded files are
+            stored and looked-up when deciding whether a local copy is
+            up-to-date. None to always calculate hashes from file contents.
+        segment_threshold (int): assets of this size in bytes or larger are
+            downloaded in up to :attr:`segment_count` byte ranges fetched in
+            parallel, when the service supports range requests. None to
+            always download assets over a single connection.
+        download_chunk_size (int): size in bytes of the chunks read from
+            download responses. None to adapt the size to the throughput of
+            each download (see :func:`adapt_chunk_size`).
+        store (ArtefactStore): a content-addressed store shared with other
+            downloads; artefacts found there are materialised instead of
+            downloaded, and downloaded artefacts are added to it. None to
+            always download artefacts.
+        hooks (ClientHooks): callbacks for the events emitted by this
+            instance; e.g. to share them with another instance. Defaults to a
+            new :class:`~nexuscli.hooks.ClientHooks`.
+        transport: sends the HTTP requests; any object with a
+            ``request(method, url, **kwargs)`` method like
+            :py:func:`requests.request`, e.g. a
+            :class:`~nexuscli.recording.Recorder`. Defaults to the
+            :py:mod:`requests` module.
+
+    Attributes:
+        metrics (ClientMetrics): counters for the requests and retries made by
+            this instance.
+        bandwidth_limiter (TokenBucket): enforces ``max_rate``; None when there
+            is no limit.
+        request_limiter (TokenBucket): enforces ``max_rps``; None when there is
+            no limit.
+        hooks (ClientHooks): callbacks called for requests, retries, pages
+            fetched and assets transferred or skipped; see
+            :mod:`nexuscli.hooks` for the events and their fields.
     """
-    def __init__(self, config=None):
+    def __init__(self, config=None, retry_policy=None, concurrency=None,
+                 max_rate=None, max_rps=None, hash_cache=None,
+                 segment_threshold=DEFAULT_SEGMENT_THRESHOLD,
+                 download_chunk_size=None, store=None, hooks=None,
+                 transport=None):
         self.config = config or NexusConfig()
+        self.download_chunk_size = download_chunk_size
+        self.hash_cache = hash_cache
+        self.store = store
+        self.segment_threshold = segment_threshold
+        self.segment_count = DEFAULT_SEGMENT_COUNT
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.concurrency = concurrency or AdaptiveLimiter()
+        self.metrics = ClientMetrics()
+        self.hooks = hooks or ClientHooks()
+        self.transport = transport
+        self.bandwidth_limiter = None
+        self.request_limiter = None
+        self.set_rate_limits(max_rate, max_rps)
         self._local_sep = os.sep
         self._remote_sep = validations.REMOTE_PATH_SEPARATOR
         self._server_version = None
@@ -41,6 +230,19 @@ class NexusClient(object):
 
         self.repositories.refresh()
 
+    def set_rate_limits(self, max_rate=None, max_rps=None):
+        """
+        Replace the current bandwidth and request rate limits.
+
+        :param max_rate: maximum bytes per second transferred by artefact
+            downloads and uploads. None for no limit.
+        :type max_rate: Union[int,None]
+        :param max_rps: maximum requests per second. None for no limit.
+        :type max_rps: Union[float,None]
+        """
+        self.bandwidth_limiter = TokenBucket(max_rate) if max_rate else None
+        self.request_limiter = TokenBucket(max_rps) if max_rps else None
+
     @property
     def server_version(self):
         """
@@ -120,11 +322,17 @@ class NexusClient(object):
         url = urljoin(self.config.url, 'service/rest/')
         return urljoin(url, self.config.api_version + '/')
 
-    def http_request(self, method, endpoint, service_url=None, **kwargs):
+    def http_request(self, method, endpoint, service_url=None,
+                     retry_policy=None, **kwargs):
         """
         Performs a HTTP request to the Nexus REST API on the specified
         endpoint.
 
+        Failed requests are retried according to :attr:`retry_policy` and each
+        retry is counted in :attr:`metrics`. Each attempt emits the
+        :data:`~nexuscli.hooks.REQUEST_START` and
+        :data:`~nexuscli.hooks.REQUEST_END` events to :attr:`hooks`.
+
         :param method: one of ``get``, ``put``, ``post``, ``delete``.
         :type endpoint: str
         :param endpoint: URI path to be appended to the service URL.
@@ -132,18 +340,62 @@ class NexusClient(object):
         :param service_url: override the default URL to use for the request,
             which is created by joining :attr:`rest_url` and ``endpoint``.
         :type service_url: str
+        :param retry_policy: override :attr:`retry_policy` for this request;
+            e.g. :data:`~nexuscli.retry.NO_RETRY` when the caller retries.
+        :type retry_policy: nexuscli.retry.RetryPolicy
         :param kwargs: as per :py:func:`requests.request`.
         :rtype: requests.Response
         """
+        retry_policy = retry_policy or self.retry_policy
         service_url = service_url or self.rest_url
         url = urljoin(service_url, endpoint)
+        rewind_body = body_rewinder(kwargs)
+        retry_number = 0
 
-        try:
-            response = requests.request(
-                method=method, auth=self.config.auth, url=url,
-                verify=self.config.x509_verify, **kwargs)
-        except requests.exceptions.ConnectionError as e:
-            raise exception.NexusClientConnectionError(str(e)) from None
+        while True:
+            retry_number += 1
+            if self.request_limiter is not None:
+                self.request_limiter.consume()
+            self.metrics.increment('requests', method=method)
+            self.hooks.emit(hooks.REQUEST_START, method=method, url=url,
+                            attempt=retry_number)
+            started = time.monotonic()
+            try:
+                response = (self.transport or requests).request(
+                    method=method, auth=self.config.auth, url=url,
+                    verify=self.config.x509_verify, **kwargs)
+            except (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout) as e:
+                self._emit_request_end(
+                    method, url, retry_number, started, kwargs, error=e)
+                if not self._should_retry(retry_policy, method, retry_number,
+                                          rewind_body, error=e):
+                    raise exception.NexusClientConnectionError(
+                        str(e)) from None
+                reason = e.__class__.__name__
+                backoff = retry_policy.get_backoff(retry_number)
+            else:
+                self.concurrency.record(
+                    time.monotonic() - started, response.status_code)
+                self._emit_request_end(
+                    method, url, retry_number, started, kwargs,
+                    response=response)
+                if not self._should_retry(retry_policy, method, retry_number,
+                                          rewind_body, response=response):
+                    break
+                reason = str(response.status_code)
+                backoff = retry_policy.get_backoff(retry_number, response)
+                response.close()
+
+            self.metrics.increment('retries', method=method, reason=reason)
+            self.hooks.emit(hooks.RETRY, method=method, url=url,
+                            attempt=retry_number, reason=reason,
+                            backoff=backoff)
+            LOG.warning('Retrying %s %s in %.1fs (%s); retry %d of %d',
+                        method.upper(), url, backoff, reason, retry_number,
+                        retry_policy.total)
+            time.sleep(backoff)
+            rewind_body()
 
         if response.status_code == 401:
             raise exception.NexusClientInvalidCredentials(
@@ -151,6 +403,35 @@ class NexusClient(object):
 
         return response
 
+    def _emit_request_end(self, method, url, attempt, started, request_kwargs,
+                          response=None, error=None):
+        """Helper for http_request"""
+        if hooks.REQUEST_END not in self.hooks:
+            return
+        bytes_received = None
+        status = None
+        if response is not None:
+            status = response.status_code
+            bytes_received = response.headers.get('Content-Length')
+            if bytes_received is not None:
+                bytes_received = int(bytes_received)
+        self.hooks.emit(
+            hooks.REQUEST_END, method=method, url=url, attempt=attempt,
+            status=status, elapsed=time.monotonic() - started,
+            bytes_sent=request_body_size(request_kwargs),
+            bytes_received=bytes_received, error=error)
+
+    @staticmethod
+    def _should_retry(retry_policy, method, retry_number, rewind_body,
+                      **kwargs):
+        """
+        Helper for http_request. A request can only be retried if the policy
+        allows it and its body, if any, can be sent again.
+        """
+        if rewind_body is None:
+            return False
+        return retry_policy.is_retryable(method, retry_number, **kwargs)
+
     def http_get(self, endpoint):
         """
         Performs a HTTP GET request on the given endpoint.
@@ -182,22 +463,32 @@ class NexusClient(object):
         response have been yielded, a new request is made and the process
         repeated.
 
+        Each page received emits the :data:`~nexuscli.hooks.PAGE_FETCHED`
+        event to :attr:`hooks`.
+
         :param request_kwargs: passed verbatim to the _request() method, except
             for the argument needed to paginate requests.
         :return: a generator that yields on response item at a time.
         :rtype: typing.Iterator[dict]
         """
+        page = 1
+        started = time.monotonic()
         response = self.http_request('get', endpoint, **request_kwargs)
         if response.status_code == 404:
             raise exception.NexusClientAPIError(response.reason)
 
         try:
-            content = response.json()
+            with stats.timed(stats.JSON_DECODING):
+                content = response.json()
         except json.decoder.JSONDecodeError:
             raise exception.NexusClientAPIError(response.content)
 
         while True:
-            for item in content.get('items'):
+            items = content.get('items')
+            self.hooks.emit(hooks.PAGE_FETCHED, endpoint=endpoint, page=page,
+                            items=len(items),
+                            elapsed=time.monotonic() - started)
+            for item in items:
                 yield item
 
             continuation_token = content.get('continuationToken')
@@ -206,10 +497,13 @@ class NexusClient(object):
 
             request_kwargs['params'].update(
                 {'continuationToken': continuation_token})
+            page += 1
+            started = time.monotonic()
             response = self.http_request('get', endpoint, **request_kwargs)
 
             try:
-                content = response.json()
+                with stats.timed(stats.JSON_DECODING):
+                    content = response.json()
             except json.decoder.JSONDecodeError:
                 raise exception.NexusClientAPIError(response.content)
 
@@ -402,7 +696,7 @@ class NexusClient(object):
         return repository, directory, filename
 
     def _upload_dir_or_file(self, file_or_dir, dst_repo, dst_dir, dst_file,
-                            **kwargs):
+                            extract=False, skip_existing=False, **kwargs):
         """
         Helper for self.upload() to call the correct upload method according to
         the source given by the user.
@@ -411,27 +705,41 @@ class NexusClient(object):
         :param dst_repo: destination repository in Nexus.
         :param dst_dir: destination directory in dst_repo.
         :param dst_file: destination file name.
+        :param extract: whether file_or_dir is an archive whose files are
+            uploaded.
+        :param skip_existing: whether files of a directory already uploaded
+            are skipped.
         :return: number of files uploaded.
         """
         repository = self.repositories.get_by_name(dst_repo)
 
+        if extract:
+            if dst_file is not None:
+                raise exception.NexusClientInvalidRepositoryPath(
+                    'Not allowed to upload an archive to a file')
+
+            return repository.upload_archive(file_or_dir, dst_dir, **kwargs)
+
         if os.path.isdir(file_or_dir):
             src_file = file_or_dir
             if dst_file is not None:
                 raise exception.NexusClientInvalidRepositoryPath(
                     'Not allowed to upload a directory to a file')
 
-            return repository.upload_directory(src_file, dst_dir, **kwargs)
+            return repository.upload_directory(
+                src_file, dst_dir, skip_existing=skip_existing, **kwargs)
 
         src_dir = file_or_dir
         repository.upload_file(src_dir, dst_dir, dst_file)
         return 1
 
-    def upload(self, source, destination, recurse=True, flatten=False):
+    def upload(self, source, destination, recurse=True, flatten=False,
+               extract=False, skip_existing=False):
         """
         Process an upload. The source must be either a local file name or
         directory. The flatten and recurse options are honoured for
-        directory uploads.
+        directory uploads and for the directory tree of archives uploaded
+        with extract.
 
         The destination must be a valid Nexus 3 repository path, including the
         repository name as the first component of the path.
@@ -447,15 +755,50 @@ class NexusClient(object):
         :param flatten: Flatten directory structure by not reproducing local
                         directory structure remotely
         :type flatten: bool
+        :param extract: upload the files in the tar or zip archive source,
+            without extracting it locally, instead of the archive itself.
+        :type extract: bool
+        :param skip_existing: for directory uploads, don't upload files that
+            are already in the repository with the same checksum; see
+            :meth:`~nexuscli.api.repository.model.Repository.upload_directory`.
+        :type skip_existing: bool
         :return: number of files uploaded.
         """
         repo, directory, filename = self.split_component_path(destination)
         upload_count = self._upload_dir_or_file(
-            source, repo, directory, filename,
-            recurse=recurse, flatten=flatten)
+            source, repo, directory, filename, extract=extract,
+            skip_existing=skip_existing, recurse=recurse, flatten=flatten)
 
         return upload_count
 
+    def upload_stream(self, fileobj, destination, size=None):
+        """
+        Upload the content read from a file object, such as standard input
+        or a pipe, as it's read; nothing is written to disk.
+
+        When ``size`` isn't given, the content is sent with chunked transfer
+        encoding, so the upload can't be retried if the connection fails.
+
+        :param fileobj: binary file object with the content to be uploaded.
+        :param destination: destination path in Nexus, including repository
+            name, directory name (if required) and file name.
+        :type destination: str
+        :param size: size of the content, if known.
+        :type size: int
+        :raises exception.NexusClientInvalidRepositoryPath: if
+            ``destination`` doesn't have a file name.
+        :return: number of files uploaded.
+        :rtype: int
+        """
+        repo, directory, filename = self.split_component_path(destination)
+        if filename is None:
+            raise exception.NexusClientInvalidRepositoryPath(
+                'A file name is required to upload from a stream')
+
+        repository = self.repositories.get_by_name(repo)
+        repository.upload_stream(fileobj, directory, filename, size)
+        return 1
+
     def _remote_path_to_local(
             self, remote_src, local_dst, flatten, create=True):
         """
@@ -506,49 +849,489 @@ class NexusClient(object):
 
         return local_path.absolute()
 
-    @staticmethod
-    def _should_skip_download(download_url, download_path, artefact, nocache):
+    def _should_skip_download(
+            self, download_url, download_path, artefact, nocache):
         """False when nocache is set or local file is out-of-date"""
         if nocache:
-            try:
-                LOG.debug('Removing {} because nocache is set\n'.format(
-                    download_path))
-                os.remove(download_path)
-            except FileNotFoundError:
-                pass
+            for path in [download_path, partial_path(download_path)]:
+                try:
+                    LOG.debug('Removing {} because nocache is set\n'.format(
+                        path))
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            return False
+
+        if not os.path.isfile(download_path):
             return False
 
-        if nexus_util.has_same_hash(artefact, download_path):
+        if nexus_util.has_same_hash(
+                artefact, download_path, self.hash_cache):
             LOG.debug(f'Skipping {download_url} because local copy '
                       f'{download_path} is up-to-date\n')
+            self.hooks.emit(hooks.ASSET_SKIPPED, direction='download',
+                            url=download_url, path=str(download_path))
             return True
 
         return False
 
-    def download_file(self, download_url, destination):
+    def _download_part(self, download_url, part_path, hash_names):
+        """
+        Helper for :meth:`download_file`. Downloads ``download_url`` to
+        ``part_path``, resuming from the end of an existing ``part_path``.
+
+        The hashes named in ``hash_names`` are calculated as the content is
+        written; the content of a resumed part file is read once to
+        initialise them.
+
+        :return: hash name to hash object for the complete part file or None
+            if the part file needs to be downloaded again.
+        :rtype: Union[dict,None]
+        :raises exception.DownloadError: when the service refuses the request.
+        """
+        hashes = {name: hashlib.new(name) for name in hash_names}
+
+        try:
+            offset = os.path.getsize(part_path)
+        except FileNotFoundError:
+            offset = 0
+
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        # retried by _download_part_with_retries, within the same policy
+        response = self.http_request(
+            'get', download_url, stream=True, headers=headers,
+            retry_policy=NO_RETRY)
+
+        if response.status_code == 416 and offset:
+            # the part file is as long as (or longer than) the asset
+            response.close()
+            total = response.headers.get('Content-Range', '').split('/')[-1]
+            if total == str(offset):
+                _update_hashes(hashes, part_path)
+                return hashes
+            LOG.debug('Discarding %s; size mismatch', part_path)
+            os.remove(part_path)
+            return None
+
+        if response.status_code == 206:
+            content_range = response.headers.get('Content-Range', '')
+            if not content_range.startswith(f'bytes {offset}-'):
+                response.close()
+                raise exception.DownloadError(
+                    f'Downloading from {download_url}. Reason: unexpected '
+                    f'Content-Range {content_range} for offset {offset}')
+            mode = 'ab'
+            _update_hashes(hashes, part_path)
+            LOG.debug('Resuming %s from byte %d', download_url, offset)
+        elif response.status_code == 200:
+            size = self._segmented_size(response)
+            if size is not None:
+                self._download_segmented(
+                    download_url, part_path, response, size)
+                _update_hashes(hashes, part_path)
+                return hashes
+            mode = 'wb'
+        else:
+            LOG.debug('Response: %s', response.__dict__)
+            response.close()
+            self._raise_for_retry(response)
+            raise exception.DownloadError(
+                f'Downloading from {download_url}. '
+                f'Reason: {response.reason}')
+
+        with open(part_path, mode) as fd:
+            LOG.debug('Writing %s to %s', download_url, part_path)
+            for chunk in self._iter_chunks(response):
+                if self.bandwidth_limiter is not None:
+                    self.bandwidth_limiter.consume(len(chunk))
+                with stats.timed(stats.HASHING):
+                    for hash_ in hashes.values():
+                        hash_.update(chunk)
+                with stats.timed(stats.DISK_WRITES):
+                    fd.write(chunk)
+
+        return hashes
+
+    def _iter_chunks(self, response):
+        """
+        Helper for download methods. Yields the content of a streamed
+        response in chunks of :attr:`download_chunk_size` bytes or of an
+        adaptive size.
+
+        Content without a ``Content-Encoding`` is read directly into a
+        buffer that's reused for every chunk; the chunks yielded are then
+        views of this buffer and must be consumed before the next chunk is
+        requested.
+
+        :param response: a response returned by :meth:`http_request` with
+            ``stream=True``.
+        :type response: requests.Response
+        :rtype: typing.Iterator[Union[bytes,memoryview]]
+        """
+        adaptive = self.download_chunk_size is None
+        chunk_size = self.download_chunk_size or MIN_CHUNK_SIZE
+        readinto = getattr(getattr(response, 'raw', None), 'readinto', None)
+
+        if readinto is None or \
+                response.headers.get('Content-Encoding', 'identity') != \
+                'identity':
+            if adaptive:
+                chunk_size = MAX_CHUNK_SIZE
+            chunks = response.iter_content(chunk_size=chunk_size)
+            while True:
+                with stats.timed(stats.NETWORK):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    return
+                yield chunk
+
+        buffer = memoryview(bytearray(
+            MAX_CHUNK_SIZE if adaptive else chunk_size))
+        while True:
+            started = time.monotonic()
+            with stats.timed(stats.NETWORK):
+                received = readinto(buffer[:chunk_size])
+            if not received:
+                return
+            yield buffer[:received]
+            if adaptive:
+                chunk_size = adapt_chunk_size(
+                    chunk_size, received, time.monotonic() - started)
+
+    def stream_file(self, download_url):
+        """
+        Stream the content of an asset without writing it to a file. The
+        transfer isn't resumed when interrupted.
+
+        :param download_url: fully-qualified URL to the asset.
+        :type download_url: str
+        :raises exception.DownloadError: if the service refuses the request.
+        :return: the size in bytes of the asset, or None if unknown, and an
+            iterator of its content in chunks; each chunk must be consumed
+            before the next is requested.
+        :rtype: tuple[Union[int,None], typing.Iterator]
+        """
+        response = self.http_request(
+            'get', download_url, stream=True,
+            headers={'Accept-Encoding': 'identity'})
+        if response.status_code != 200:
+            response.close()
+            raise exception.DownloadError(
+                f'Downloading from {download_url}. '
+                f'Reason: {response.reason}')
+
+        size = response.headers.get('Content-Length')
+        if response.headers.get('Content-Encoding', 'identity') != 'identity':
+            size = None
+
+        def _chunks():
+            started = time.monotonic()
+            received = 0
+            try:
+                for chunk in self._iter_chunks(response):
+                    if self.bandwidth_limiter is not None:
+                        self.bandwidth_limiter.consume(len(chunk))
+                    received += len(chunk)
+                    yield chunk
+                self.hooks.emit(
+                    hooks.ASSET_TRANSFERRED, direction='download',
+                    url=download_url, size=received,
+                    elapsed=time.monotonic() - started)
+            except (exception.NexusClientConnectionError,
+                    *INTERRUPTED_ERRORS) as e:
+                raise exception.DownloadError(
+                    f'Downloading from {download_url}. Reason: {e}')
+            finally:
+                response.close()
+
+        return (int(size) if size is not None else None), _chunks()
+
+    def _download_part_with_retries(self, download_url, part_path,
+                                    hash_names):
+        """
+        Helper for :meth:`download_file`. Calls :meth:`_download_part` until
+        the part file is complete, resuming interrupted transfers as allowed
+        by :attr:`retry_policy`.
+
+        :return: hash name to hexadecimal digest of the part file.
+        :rtype: dict
+        """
+        retry_number = 0
+        while True:
+            try:
+                hashes = self._download_part(
+                    download_url, part_path, hash_names)
+                if hashes is not None:
+                    return {name: hash_.hexdigest()
+                            for name, hash_ in hashes.items()}
+            except (exception.NexusClientConnectionError,
+                    *INTERRUPTED_ERRORS) as e:
+                retry_number += 1
+                self._wait_to_resume(download_url, retry_number, e)
+            except requests.exceptions.HTTPError as e:
+                retry_number += 1
+                self._wait_to_resume(
+                    download_url, retry_number, response=e.response)
+
+    def _raise_for_retry(self, response):
+        """
+        Helper for download methods, whose requests aren't retried by
+        :meth:`http_request`.
+
+        :raises requests.exceptions.HTTPError: when the response status can be
+            retried according to :attr:`retry_policy`.
+        """
+        if response.status_code in self.retry_policy.statuses:
+            raise requests.exceptions.HTTPError(
+                response.reason, response=response)
+
+    def _wait_to_resume(self, download_url, retry_number, error=None,
+                        response=None):
+        """
+        Helper for download methods. Sleeps before resuming an interrupted
+        transfer, or retrying a retryable ``response``, as allowed by
+        :attr:`retry_policy`.
+
+        :raises exception.DownloadError: when the transfer can't be resumed.
+        """
+        if not self.retry_policy.is_retryable(
+                'get', retry_number, response=response, error=error):
+            reason = error if response is None else response.reason
+            raise exception.DownloadError(
+                f'Downloading from {download_url}. Reason: {reason}') from None
+
+        backoff = self.retry_policy.get_backoff(retry_number, response)
+        reason = 'interrupted' if response is None else \
+            str(response.status_code)
+        self.metrics.increment('retries', method='get', reason=reason)
+        self.hooks.emit(hooks.RETRY, method='get', url=download_url,
+                        attempt=retry_number, reason=reason,
+                        backoff=backoff)
+        LOG.warning('Resuming %s in %.1fs; retry %d of %d', download_url,
+                    backoff, retry_number, self.retry_policy.total)
+        time.sleep(backoff)
+
+    def _segmented_size(self, response):
+        """
+        Helper for :meth:`_download_part`. Decides whether the asset in the
+        given response should be downloaded in segments.
+
+        :return: the asset size if it should be downloaded in segments; None
+            otherwise.
+        :rtype: Union[int,None]
+        """
+        if self.segment_threshold is None or not hasattr(os, 'pwrite'):
+            return None
+        headers = response.headers
+        if headers.get('Accept-Ranges') != 'bytes' or \
+                headers.get('Content-Encoding', 'identity') != 'identity':
+            return None
+        try:
+            size = int(headers['Content-Length'])
+        except (KeyError, ValueError):
+            return None
+        if size < max(self.segment_threshold, 2 * MIN_SEGMENT_SIZE):
+            return None
+        return size
+
+    def _download_segmented(self, download_url, part_path, response, size):
+        """
+        Helper for :meth:`_download_part`. Downloads an asset of the given
+        size as byte ranges fetched in parallel and written at their position
+        in a pre-allocated ``part_path``. The first range is read from the
+        (full content) ``response`` already received.
+
+        A partial file can't be resumed by a later download as its size
+        doesn't reflect its progress, so it's removed if any range fails.
+
+        :raises exception.DownloadError: if any range can't be downloaded.
+        """
+        count = max(1, min(self.segment_count, size // MIN_SEGMENT_SIZE))
+        segment_size = math.ceil(size / count)
+        segments = [(start, min(start + segment_size, size) - 1, None)
+                    for start in range(segment_size, size, segment_size)]
+        segments.insert(0, (0, segment_size - 1, response))
+        LOG.debug('Downloading %s in %d segments', download_url, count)
+
+        fd = os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            try:
+                os.posix_fallocate(fd, 0, size)
+            except (AttributeError, OSError):
+                # not available on this platform or file system
+                os.ftruncate(fd, size)
+
+            def _segment(segment):
+                self._download_segment(download_url, fd, *segment)
+
+            for _ in run_concurrently(
+                    _segment, segments, AdaptiveLimiter.fixed(count)):
+                pass
+        except BaseException:
+            os.close(fd)
+            os.remove(part_path)
+            raise
+        os.close(fd)
+
+    def _download_segment(self, download_url, fd, start, end, response=None):
+        """
+        Helper for :meth:`_download_segmented`. Writes bytes ``start`` to
+        ``end`` (inclusive) of the asset to ``fd``, resuming interrupted
+        transfers as allowed by :attr:`retry_policy`.
+
+        :param response: a response whose content starts at ``start``. When
+            None, a range request is made.
+        """
+        position = start
+        retry_number = 0
+        while position <= end:
+            try:
+                if response is None:
+                    response = self.http_request(
+                        'get', download_url, stream=True,
+                        headers={'Range': f'bytes={position}-{end}'},
+                        retry_policy=NO_RETRY)
+                    if response.status_code != 206:
+                        self._raise_for_retry(response)
+                        raise exception.DownloadError(
+                            f'Downloading from {download_url}. Reason: '
+                            f'{response.reason} (range {position}-{end})')
+
+                for chunk in self._iter_chunks(response):
+                    chunk = chunk[:end - position + 1]
+                    if self.bandwidth_limiter is not None:
+                        self.bandwidth_limiter.consume(len(chunk))
+                    with stats.timed(stats.DISK_WRITES):
+                        os.pwrite(fd, chunk, position)
+                    position += len(chunk)
+                    if position > end:
+                        break
+
+                if position <= end:
+                    raise requests.exceptions.ChunkedEncodingError(
+                        f'Response ended at byte {position} of {end}')
+            except (exception.NexusClientConnectionError,
+                    *INTERRUPTED_ERRORS) as e:
+                retry_number += 1
+                self._wait_to_resume(download_url, retry_number, e)
+            except requests.exceptions.HTTPError as e:
+                retry_number += 1
+                self._wait_to_resume(
+                    download_url, retry_number, response=e.response)
+            finally:
+                if response is not None:
+                    response.close()
+                    response = None
+
+    def download_file(self, download_url, destination, artefact=None):
         """Download an asset from Nexus artefact repository to local
         file system.
 
+        The asset is first written to a partial file, named as the
+        ``destination`` with a ``.part`` suffix, which is renamed to
+        ``destination`` once the download is complete. Interrupted transfers
+        are resumed using HTTP range requests, as allowed by
+        :attr:`retry_policy`; an existing partial file from a previous
+        download is also resumed.
+
+        Assets larger than :attr:`segment_threshold` are downloaded as byte
+        ranges fetched in parallel; their hashes are calculated once the
+        download is complete.
+
+        When :attr:`store` is set and it has a file matching the ``artefact``
+        checksum, ``destination`` is created from that file and nothing is
+        downloaded. Otherwise, the downloaded file is added to the store.
+
         :param download_url: fully-qualified URL to asset being downloaded.
         :type download_url: str
         :param destination: file or directory location to save downloaded
             asset. Must be an existing directory; any exiting file in this
             location will be overwritten.
         :type destination: str
+        :param artefact: the asset being downloaded, as returned by
+            :meth:`list_raw`. When given, the downloaded file must match its
+            checksum. The sha1 and sha256 hashes are calculated while the
+            content is written and, if :attr:`hash_cache` is set, stored there
+            so the file doesn't need to be read again to be compared with the
+            asset checksum.
+        :type artefact: dict
+        :raises exception.DownloadError: if the asset can't be downloaded or
+            its content doesn't match the checksum.
         :return:
         """
-        response = self.http_get(download_url)
+        part_path = partial_path(destination)
+        checksum = (artefact or {}).get('checksum') or {}
+        if self._materialize_from_store(checksum, destination, part_path):
+            return
+
+        started = time.monotonic()
+        resumed = os.path.isfile(part_path)
+        hash_names = [name for name in STREAM_HASHES if name in checksum]
+        if not hash_names and (
+                self.hash_cache is not None or self.store is not None):
+            hash_names = STREAM_HASHES[:1]
+
+        hashes = self._download_part_with_retries(
+            download_url, part_path, hash_names)
+
+        if checksum:
+            mismatches = nexus_util.checksum_mismatches(artefact, hashes)
+            if mismatches is None:
+                # the checksum has none of the hashes calculated on the fly
+                mismatches = [] if nexus_util.has_same_hash(
+                    artefact, part_path) else ['checksum']
+            if mismatches:
+                os.remove(part_path)
+                if resumed:
+                    # the partial file may be from a previous asset version
+                    LOG.warning('Checksum mismatch after resuming %s; '
+                                'restarting', download_url)
+                    return self.download_file(
+                        download_url, destination, artefact)
+                raise exception.DownloadError(
+                    f'Downloading from {download_url}. Reason: '
+                    f'{", ".join(mismatches)} mismatch')
+
+        os.replace(part_path, destination)
+        if hooks.ASSET_TRANSFERRED in self.hooks:
+            self.hooks.emit(
+                hooks.ASSET_TRANSFERRED, direction='download',
+                url=download_url, size=os.path.getsize(destination),
+                elapsed=time.monotonic() - started)
+        if self.hash_cache is not None and hashes:
+            self.hash_cache.put(destination, hashes)
+        if self.store is not None and hashes:
+            self.store.add(destination, hashes)
+
+    def _materialize_from_store(self, checksum, destination, part_path):
+        """
+        Helper for :meth:`download_file`.
 
-        if response.status_code != 200:
-            sys.stderr.write(response.__dict__)
-            raise exception.DownloadError(
-                f'Downloading from {download_url}. '
-                f'Reason: {response.reason}')
+        :return: True if ``destination`` was created from :attr:`store`.
+        :rtype: bool
+        """
+        if self.store is None or not checksum:
+            return False
 
-        with open(destination, 'wb') as fd:
-            LOG.debug('Writing %s to %s', download_url, destination)
-            for chunk in response.iter_content(chunk_size=8192):
-                fd.write(chunk)
+        if not self.store.materialize(checksum, destination):
+            self.metrics.increment('store', result='miss')
+            return False
+
+        self.metrics.increment('store', result='hit')
+        LOG.debug('Restored %s from %s', destination, self.store)
+        try:
+            os.remove(part_path)
+        except FileNotFoundError:
+            pass
+        self._cache_checksum(destination, checksum)
+        return True
+
+    def _cache_checksum(self, file_path, checksum):
+        """Store the hashes of a file known to match ``checksum``"""
+        if self.hash_cache is not None:
+            self.hash_cache.put(file_path, {
+                name: checksum[name] for name in STREAM_HASHES
+                if name in checksum})
 
     def download(self, source, destination, flatten=False, nocache=False):
         """Process a download. The source must be a valid Nexus 3
@@ -581,30 +1364,95 @@ class NexusClient(object):
                 not (destination.endswith('.') or destination.endswith('..')):
             destination += self._local_sep
 
-        artefacts = self.list_raw(source)
+        groups = group_by_checksum(self.list_raw(source))
+
+        def _download(group):
+            return self._download_group(group, destination, flatten, nocache)
 
-        artefacts = progress.bar(
-                [a for a in artefacts], label='Downloading')
+        results = run_concurrently(_download, groups, self.concurrency)
+        for downloaded in progress.bar(
+                results, expected_size=len(groups), label='Downloading'):
+            download_count += downloaded
+
+        if self.store is not None:
+            self.store.evict()
+
+        return download_count
+
+    def _download_group(self, artefacts, destination, flatten, nocache):
+        """
+        Helper for :meth:`download`, run concurrently for each group of
+        artefacts with the same content. Only the first artefact is
+        downloaded; the others are copied from it. If it can't be downloaded,
+        the next one is tried, and so on.
 
+        :return: number of artefacts downloaded, copied or up-to-date.
+        :rtype: int
+        """
+        source = None
+        count = 0
         for artefact in artefacts:
-            download_url = artefact['downloadUrl']
-            artefact_path = artefact['path']
-            download_path = self._remote_path_to_local(
-                artefact_path, destination, flatten)
+            if source is None:
+                if self._download_artefact(
+                        artefact, destination, flatten, nocache):
+                    source = self._local_download_path(
+                        artefact, destination, flatten)
+                    count += 1
+                continue
 
+            download_path = self._local_download_path(
+                artefact, destination, flatten)
             if self._should_skip_download(
-                    download_url, download_path, artefact, nocache):
-                download_count += 1
+                    artefact['downloadUrl'], download_path, artefact,
+                    nocache):
+                count += 1
                 continue
 
             try:
-                self.download_file(download_url, download_path)
-                download_count += 1
-            except exception.DownloadError:
-                LOG.warning('Error downloading %s', download_url)
+                link_file(
+                    source, download_path, DEDUPLICATE_LINK_MODES)
+            except OSError as e:
+                LOG.debug('Unable to copy %s to %s: %s', source,
+                          download_path, e)
+                count += self._download_artefact(
+                    artefact, destination, flatten, nocache)
                 continue
 
-        return download_count
+            LOG.debug('Copied %s to %s', source, download_path)
+            self.metrics.increment('deduplicated')
+            self._cache_checksum(download_path, artefact['checksum'])
+            count += 1
+
+        return count
+
+    def _local_download_path(self, artefact, destination, flatten):
+        download_path = self._remote_path_to_local(
+            artefact['path'], destination, flatten, create=False)
+        download_path.parent.mkdir(parents=True, exist_ok=True)
+        return download_path
+
+    def _download_artefact(self, artefact, destination, flatten, nocache):
+        """
+        Helper for :meth:`_download_group`.
+
+        :return: 1 if the artefact was downloaded or is up-to-date, else 0.
+        :rtype: int
+        """
+        download_url = artefact['downloadUrl']
+        download_path = self._local_download_path(
+            artefact, destination, flatten)
+
+        if self._should_skip_download(
+                download_url, download_path, artefact, nocache):
+            return 1
+
+        try:
+            self.download_file(download_url, download_path, artefact)
+        except exception.DownloadError:
+            LOG.warning('Error downloading %s', download_url)
+            return 0
+
+        return 1
 
     def delete(self, repository_path):
         """
@@ -617,22 +1465,27 @@ class NexusClient(object):
         """
 
         delete_count = 0
-        death_row = self.list_raw(repository_path)
-
-        death_row = progress.bar([a for a in death_row], label='Deleting')
+        death_row = [a for a in self.list_raw(repository_path)]
 
-        for artefact in death_row:
-            id_ = artefact['id']
-            artefact_path = artefact['path']
+        results = run_concurrently(
+            self._delete_artefact, death_row, self.concurrency)
 
-            response = self.http_delete(f'assets/{id_}')
-            LOG.info('Deleted: %s (%s)', artefact_path, id_)
+        for response in progress.bar(
+                results, expected_size=len(death_row), label='Deleting'):
             delete_count += 1
             if response.status_code == 404:
                 LOG.warning('File disappeared while deleting')
                 LOG.debug(response.reason)
             elif response.status_code != 204:
                 LOG.error(response.reason)
+                results.close()
                 return -1
 
         return delete_count
+
+    def _delete_artefact(self, artefact):
+        """Helper for :meth:`delete`, run concurrently for each artefact."""
+        id_ = artefact['id']
+        response = self.http_delete(f'assets/{id_}')
+        LOG.info('Deleted: %s (%s)', artefact['path'], id_)
+        return response
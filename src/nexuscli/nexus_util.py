@@ -4,6 +4,8 @@ import mmap
 import os
 import pkg_resources
 
+from nexuscli import stats
+
 
 def _resource_filename(resource_name):
     """wrapper for pkg_resources.resource_filename"""
@@ -122,14 +124,15 @@ def calculate_hash(hash_name, file_path_or_handle):
             h.update(m)
         return h.hexdigest()
 
-    if hasattr(file_path_or_handle, 'read'):
-        return _hash(file_path_or_handle)
-    else:
-        with open(file_path_or_handle, 'rb') as fd:
-            return _hash(fd)
+    with stats.timed(stats.HASHING):
+        if hasattr(file_path_or_handle, 'read'):
+            return _hash(file_path_or_handle)
+        else:
+            with open(file_path_or_handle, 'rb') as fd:
+                return _hash(fd)
 
 
-def has_same_hash(artefact, filepath):
+def has_same_hash(artefact, filepath, hash_cache=None):
     """
     Checks if a Nexus artefact has the same hash as a local filepath.
 
@@ -137,6 +140,9 @@ def has_same_hash(artefact, filepath):
         :py:meth:`~nexuscli.nexus_client.NexusClient.list_raw`
     :type artefact: dict
     :param filepath: local file path
+    :param hash_cache: when given, hashes are looked-up here before being
+        calculated and calculated hashes are stored here.
+    :type hash_cache: nexuscli.hash_cache.HashCache
     :return: True if artefact and filepath have the same hash.
     :rtype: bool
     """
@@ -145,12 +151,39 @@ def has_same_hash(artefact, filepath):
         if remote_hash is None:
             continue
 
-        local_hash = calculate_hash(hash_name, filepath)
+        local_hash = None
+        if hash_cache is not None:
+            local_hash = hash_cache.get(filepath, hash_name)
+        if local_hash is None:
+            local_hash = calculate_hash(hash_name, filepath)
+            if hash_cache is not None:
+                hash_cache.put(filepath, {hash_name: local_hash})
         return local_hash == remote_hash
 
     return False
 
 
+def checksum_mismatches(artefact, hashes):
+    """
+    Compares hashes calculated for a local copy of an artefact with the
+    checksum of the artefact.
+
+    :param artefact:  as returned by
+        :py:meth:`~nexuscli.nexus_client.NexusClient.list_raw`
+    :type artefact: dict
+    :param hashes: hash algorithm name to hexadecimal digest.
+    :type hashes: dict
+    :return: names of the hash algorithms that don't match, or None if none
+        of the given hashes is present in the artefact checksum.
+    :rtype: Union[list,None]
+    """
+    checksum = artefact.get('checksum') or {}
+    compared = [name for name in hashes if checksum.get(name) is not None]
+    if not compared:
+        return None
+    return [name for name in compared if checksum[name] != hashes[name]]
+
+
 def ensure_exists(path, is_dir=False):
     """
     Ensures a path exists.
@@ -165,3 +198,43 @@ def ensure_exists(path, is_dir=False):
         path.mkdir(exist_ok=True)
     else:
         path.touch()
+
+
+class ChunkReader:
+    """
+    A binary file-like object reading from an iterator of chunks (e.g. from
+    :meth:`~nexuscli.nexus_client.NexusClient.stream_file`), so a download
+    can be given to code expecting a file. Reads return exactly the size
+    requested, until the end of the content.
+
+    :param chunks: iterator of bytes-like objects.
+    :param size: total size of the content, when known; it's then available
+        as the ``len`` attribute, used by :py:mod:`requests` to set the
+        Content-Length of a request body.
+    :type size: int
+    :param throttled_by: the bucket the chunks were already throttled by, if
+        any; :func:`~nexuscli.throttle.throttled` doesn't throttle the reader
+        with the same bucket again.
+    :type throttled_by: Union[nexuscli.throttle.TokenBucket,None]
+    """
+    def __init__(self, chunks, size=None, throttled_by=None):
+        self._chunks = iter(chunks)
+        self._buffer = bytearray()
+        self.throttled_by = throttled_by
+        if size is not None:
+            self.len = size
+
+    def __iter__(self):
+        return iter(lambda: self.read(64 * 1024), b'')
+
+    def read(self, size=-1):
+        while size is None or size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size is None or size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
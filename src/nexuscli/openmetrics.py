@@ -0,0 +1,281 @@
+"""Exports the activity of :class:`~nexuscli.nexus_client.NexusClient`
+instances as `OpenMetrics <https://openmetrics.io>`_ or Prometheus text, to a
+file (e.g. for the node_exporter textfile collector) or over HTTP"""
+import bisect
+import http.server
+import logging
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+from nexuscli import hooks
+from nexuscli.compat import ThreadingHTTPServer
+from nexuscli.metrics import ClientMetrics
+
+LOG = logging.getLogger(__name__)
+
+PREFIX = 'nexus3_'
+# upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0, 30.0)
+OPENMETRICS_CONTENT_TYPE = \
+    'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# name (without prefix) to type and help of the metrics exported
+METRICS = {
+    'job_start_time_seconds': (
+        'gauge', 'Time the job started, in seconds since the epoch'),
+    'job_duration_seconds': ('gauge', 'Seconds since the job started'),
+    'request_duration_seconds': (
+        'histogram', 'Seconds until the response headers are received'),
+    'request_errors': (
+        'counter', 'Requests that failed or got an error status'),
+    'retries': ('counter', 'Requests and transfers retried'),
+    'pages': ('counter', 'Pages of paginated listings fetched'),
+    'assets': ('counter', 'Assets transferred or skipped as up-to-date'),
+    'transferred_bytes': ('counter', 'Bytes of assets transferred'),
+}
+
+
+def endpoint_of(url):
+    """
+    A low cardinality name for the endpoint of a request URL: the first path
+    component after the REST API version (e.g. ``assets``, ``search``),
+    ``repository`` for repository content or ``other``.
+
+    :param url: the request URL.
+    :type url: str
+    :rtype: str
+    """
+    path = urlparse(url).path
+    _, rest_api, rest_path = path.partition('/service/rest/')
+    if rest_api:
+        # the first component is the API version; e.g. v1 or beta
+        components = rest_path.split('/')
+        return components[1] if len(components) > 1 and components[1] \
+            else 'other'
+    if '/repository/' in path:
+        return 'repository'
+    return 'other'
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace(
+        '"', r'\"')
+
+
+def _sample(name, labels, value):
+    if labels:
+        label_text = ','.join(f'{key}="{_escape(label)}"'
+                              for key, label in sorted(labels.items()))
+        name = f'{name}{{{label_text}}}'
+    return f'{name} {value!r}'
+
+
+class _Histogram:
+    """Cumulative histogram of observations, by labels"""
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # labels to [bucket counts..., +Inf count] and sum
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        counts, total = self._series.get(key, ([0] * (
+            len(self.buckets) + 1), 0.0))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._series[key] = counts, total + value
+
+    def samples(self, name):
+        for key, (counts, total) in sorted(self._series.items()):
+            labels = dict(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                yield _sample(f'{name}_bucket', dict(labels, le=str(bound)),
+                              cumulative)
+            yield _sample(f'{name}_count', labels, cumulative)
+            yield _sample(f'{name}_sum', labels, total)
+
+
+class JobMetrics:
+    """
+    Statistics of a bulk job (e.g. ``nexus3 download``) collected from the
+    :class:`~nexuscli.hooks.ClientHooks` of the clients it uses: request
+    latency histograms, errors and retries per endpoint, assets transferred
+    or skipped and bytes transferred.
+
+    :param command: the job's command (e.g. ``download``); the ``command``
+        label of the ``job_*`` metrics.
+    :type command: str
+    """
+    def __init__(self, command):
+        self.command = command
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._counters = ClientMetrics()
+        self._latency = _Histogram(LATENCY_BUCKETS)
+        self._server = None
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.command!r})'
+
+    def attach(self, client_hooks):
+        """
+        Collect the events emitted to the given hooks; e.g. the
+        :attr:`~nexuscli.nexus_client.NexusClient.hooks` of a client.
+
+        :type client_hooks: nexuscli.hooks.ClientHooks
+        """
+        client_hooks.add(hooks.REQUEST_END, self._on_request_end)
+        client_hooks.add(hooks.RETRY, self._on_retry)
+        client_hooks.add(hooks.PAGE_FETCHED, self._on_page_fetched)
+        client_hooks.add(hooks.ASSET_TRANSFERRED, self._on_transferred)
+        client_hooks.add(hooks.ASSET_SKIPPED, self._on_skipped)
+
+    def _on_request_end(self, _, method, url, status, elapsed, error,
+                        **__):
+        endpoint = endpoint_of(url)
+        with self._lock:
+            self._latency.observe(elapsed, method=method, endpoint=endpoint)
+        if error is not None:
+            reason = error.__class__.__name__
+        elif status >= 400:
+            reason = str(status)
+        else:
+            return
+        self._counters.increment(
+            'request_errors', method=method, endpoint=endpoint, reason=reason)
+
+    def _on_retry(self, _, url, reason, **__):
+        self._counters.increment(
+            'retries', endpoint=endpoint_of(url), reason=reason)
+
+    def _on_page_fetched(self, _, endpoint, **__):
+        self._counters.increment(
+            'pages', endpoint=endpoint.strip('/').split('/')[0])
+
+    def _on_transferred(self, _, direction, size, **__):
+        self._counters.increment(
+            'assets', direction=direction, result='transferred')
+        if size:
+            self._counters.increment(
+                'transferred_bytes', size, direction=direction)
+
+    def _on_skipped(self, _, direction, **__):
+        self._counters.increment(
+            'assets', direction=direction, result='skipped')
+
+    def render(self, openmetrics=True):
+        """
+        The metrics collected so far.
+
+        :param openmetrics: if True, in the OpenMetrics text format; the
+            Prometheus text format otherwise, as read by the node_exporter
+            textfile collector.
+        :type openmetrics: bool
+        :rtype: str
+        """
+        counters = {}
+        for name, labels, value in self._counters.to_list():
+            counters.setdefault(name, []).append((labels, value))
+        with self._lock:
+            latency = list(self._latency.samples(
+                f'{PREFIX}request_duration_seconds'))
+        job = {'command': self.command}
+
+        lines = []
+        for name, (metric_type, help_text) in METRICS.items():
+            family = f'{PREFIX}{name}'
+            sample_name = family
+            if metric_type == 'counter':
+                sample_name = f'{family}_total'
+                if not openmetrics:
+                    # the Prometheus format names counters with the suffix
+                    family = sample_name
+            lines.append(f'# HELP {family} {help_text}.')
+            lines.append(f'# TYPE {family} {metric_type}')
+            if name == 'job_start_time_seconds':
+                lines.append(_sample(sample_name, job, self.started))
+            elif name == 'job_duration_seconds':
+                lines.append(_sample(
+                    sample_name, job, time.time() - self.started))
+            elif name == 'request_duration_seconds':
+                lines.extend(latency)
+            else:
+                lines.extend(_sample(sample_name, labels, value)
+                             for labels, value in counters.get(name, []))
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """
+        Write the metrics to a file, in the Prometheus text format. The file
+        is replaced atomically, so it's never read incomplete.
+
+        :param path: e.g. ``nexus3.prom`` in the node_exporter textfile
+            directory.
+        :type path: str
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix='.nexus3-metrics.')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+                fh.write(self.render(openmetrics=False))
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def serve(self, port, address='127.0.0.1'):
+        """
+        Serve the metrics at ``/metrics`` over HTTP, from a background thread,
+        until :meth:`close` is called. The OpenMetrics format is used when the
+        request accepts it.
+
+        :param port: TCP port; 0 for any available port.
+        :type port: int
+        :param address: address to listen on; the loopback interface by
+            default. Use ``0.0.0.0`` to listen on all interfaces.
+        :type address: str
+        :return: the port listened on.
+        :rtype: int
+        """
+        job_metrics = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                openmetrics = 'application/openmetrics-text' in \
+                    self.headers.get('Accept', '')
+                body = job_metrics.render(openmetrics).encode()
+                self.send_response(200)
+                self.send_header(
+                    'Content-Type', OPENMETRICS_CONTENT_TYPE if openmetrics
+                    else PROMETHEUS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format_, *args):
+                LOG.debug(format_, *args)
+
+        self._server = ThreadingHTTPServer((address, port), Handler)
+        threading.Thread(
+            target=self._server.serve_forever, daemon=True).start()
+        return self._server.server_address[1]
+
+    def close(self):
+        """Stop serving the metrics"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
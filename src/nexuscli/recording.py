@@ -0,0 +1,393 @@
+"""Records the HTTP requests of a :class:`~nexuscli.nexus_client.NexusClient`
+to an archive and replays them without a Nexus service, e.g. to profile a
+command offline.
+
+A transport is an object with a ``request(method, url, **kwargs)`` method
+returning a :class:`requests.Response`, like the :py:mod:`requests` module
+(the default transport) or a :class:`requests.Session`; it's given to the
+client as its :attr:`~nexuscli.nexus_client.NexusClient.transport`.
+"""
+import collections
+import hashlib
+import io
+import json
+import logging
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+LOG = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+INDEX_NAME = 'index.json'
+BODIES_DIR = 'bodies'
+REDACTED = '<redacted>'
+# headers whose value isn't recorded
+SENSITIVE_HEADERS = ('authorization', 'proxy-authorization', 'cookie',
+                     'set-cookie')
+
+
+def _prepared_url(method, url, params):
+    """The URL requested, including the query parameters given separately"""
+    return requests.Request(method, url, params=params).prepare().url
+
+
+def _redact_url(url):
+    """Remove credentials from a URL"""
+    parts = urlsplit(url)
+    netloc = parts.netloc.rpartition('@')[2]
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+def _range(headers):
+    """The Range header of a request, if any"""
+    return CaseInsensitiveDict(headers or {}).get('Range')
+
+
+def _key(method, url, range_=None):
+    """What identifies a request: its method, path, query and range, for
+    resumed and segmented downloads; the service replayed may have a
+    different scheme, host or port"""
+    parts = urlsplit(url)
+    return (method.upper(),
+            urlunsplit(('', '', parts.path, parts.query, '')), range_)
+
+
+def _error_class(name, default):
+    """The requests exception recorded as ``name``, or ``default``"""
+    error_class = getattr(requests.exceptions, name, None)
+    if not isinstance(error_class, type) or not issubclass(
+            error_class, requests.exceptions.RequestException):
+        return default
+    return error_class
+
+
+def _redact_headers(headers):
+    return {name: REDACTED if name.lower() in SENSITIVE_HEADERS else value
+            for name, value in headers.items()}
+
+
+class _RecordedBody:
+    """
+    The raw body of a streamed response, spooled (decoded) to a temporary file
+    as the caller reads it. ``finish`` is called with the spool, the time
+    spent receiving the body and the error that interrupted it, if any, once
+    the body has been read or closed.
+    """
+    def __init__(self, raw, finish):
+        self._raw = raw
+        self._finish = finish
+        self._spool = tempfile.TemporaryFile()
+        self._seconds = 0.0
+
+    def _receive(self, read):
+        started = time.monotonic()
+        try:
+            chunk = read()
+        except Exception as e:
+            self.finish(e)
+            raise
+        finally:
+            self._seconds += time.monotonic() - started
+        if not chunk:
+            self.finish()
+        elif self._spool is not None:
+            self._spool.write(chunk)
+        return chunk
+
+    def stream(self, amt=2 ** 16, decode_content=None):
+        """As :meth:`urllib3.response.HTTPResponse.stream`; always decoded"""
+        if hasattr(self._raw, 'stream'):
+            chunks = self._raw.stream(amt, decode_content=True)
+            return iter(lambda: self._receive(lambda: next(chunks, b'')), b'')
+        return iter(lambda: self.read(amt), b'')
+
+    def read(self, amt=None, decode_content=None):
+        """As :meth:`urllib3.response.HTTPResponse.read`; always decoded"""
+        if hasattr(self._raw, 'stream'):
+            return self._receive(
+                lambda: self._raw.read(amt, decode_content=True))
+        return self._receive(lambda: self._raw.read(amt))
+
+    def release_conn(self):
+        release_conn = getattr(self._raw, 'release_conn', None)
+        if release_conn is not None:
+            release_conn()
+
+    def close(self):
+        self.finish()
+        self._raw.close()
+
+    def finish(self, error=None):
+        """Record the body received so far, once"""
+        if self._spool is None:
+            return
+        spool, self._spool = self._spool, None
+        with spool:
+            spool.seek(0)
+            self._finish(spool, self._seconds, error)
+
+
+class Recorder:
+    """
+    A transport recording the requests sent through another transport, and
+    their responses, to a zip archive. Response bodies are stored once per
+    distinct content; request bodies aren't stored. Credentials in headers
+    and URLs are redacted.
+
+    The body of a streamed response is written to the archive as it's read,
+    through a temporary file, and its request recorded once the body has been
+    read or the response closed; bodies not read by then are recorded when
+    the recorder is closed.
+
+    :param path: the archive; written when the recorder is closed.
+    :type path: str
+    :param transport: the transport used to send requests.
+    """
+    def __init__(self, path, transport=requests):
+        self.path = path
+        self.transport = transport
+        self._lock = threading.Lock()
+        self._archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        self._bodies = set()
+        self._entries = []
+        self._streamed = set()
+        self._started = time.monotonic()
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.path!r})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _add_body(self, body):
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            if digest not in self._bodies:
+                self._archive.writestr(f'{BODIES_DIR}/{digest}', body)
+                self._bodies.add(digest)
+        return digest
+
+    def _add_spooled_body(self, spool):
+        """Like _add_body, for a body in a file"""
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: spool.read(2 ** 16), b''):
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        with self._lock:
+            if digest not in self._bodies:
+                spool.seek(0)
+                with self._archive.open(f'{BODIES_DIR}/{digest}', 'w',
+                                        force_zip64=True) as fh:
+                    shutil.copyfileobj(spool, fh)
+                self._bodies.add(digest)
+        return digest
+
+    def request(self, method, url, **kwargs):
+        """Send a request through :attr:`transport` and record it"""
+        url = _prepared_url(method, url, kwargs.pop('params', None))
+        entry = {'method': method.upper(), 'url': _redact_url(url),
+                 'range': _range(kwargs.get('headers')),
+                 'offset': time.monotonic() - self._started}
+        started = time.monotonic()
+        try:
+            response = self.transport.request(method=method, url=url,
+                                              **kwargs)
+        except requests.exceptions.RequestException as e:
+            entry.update(elapsed=time.monotonic() - started,
+                         error=e.__class__.__name__)
+            self._add_entry(entry)
+            raise
+        entry['elapsed'] = time.monotonic() - started
+        request_headers = getattr(response.request, 'headers', None) or {}
+        entry.update(
+            status=response.status_code, reason=response.reason,
+            request_headers=_redact_headers(request_headers))
+
+        if not kwargs.get('stream'):
+            # the transport has read the body already
+            body = response.content
+            entry['body_seconds'] = 0
+            self._add_response_body(entry, response, len(body))
+            entry['body'] = self._add_body(body) if body else None
+            self._add_entry(entry)
+            return response
+
+        def finish(spool, seconds, error):
+            self._streamed.discard(raw)
+            size = spool.seek(0, io.SEEK_END)
+            spool.seek(0)
+            entry['body_seconds'] = seconds
+            self._add_response_body(entry, response, size)
+            entry['body'] = self._add_spooled_body(spool) if size else None
+            if error is not None:
+                entry['body_error'] = error.__class__.__name__
+            self._add_entry(entry)
+
+        raw = response.raw = _RecordedBody(response.raw, finish)
+        self._streamed.add(raw)
+        return response
+
+    @staticmethod
+    def _add_response_body(entry, response, size):
+        """Record the headers of a response whose body has ``size`` bytes"""
+        headers = dict(response.headers)
+        # the body recorded is decoded
+        if headers.pop('Content-Encoding', 'identity') != 'identity':
+            headers['Content-Length'] = str(size)
+        entry['headers'] = _redact_headers(headers)
+
+    def _add_entry(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+
+    def close(self):
+        """Write the index of requests and close the archive"""
+        for raw in list(self._streamed):
+            raw.finish()
+        with self._lock:
+            if self._archive is None:
+                return
+            self._entries.sort(key=lambda entry: entry['offset'])
+            self._archive.writestr(INDEX_NAME, json.dumps({
+                'version': ARCHIVE_VERSION, 'requests': self._entries}))
+            self._archive.close()
+            self._archive = None
+
+
+class _ReplayBody(io.BytesIO):
+    """A recorded body, read no faster than it was received, and interrupted
+    by ``error`` (an exception) after its last byte, if given"""
+    def __init__(self, body, seconds, error=None):
+        super().__init__(body)
+        self._seconds_per_byte = seconds / len(body) if body else 0
+        self._error = error
+
+    def _wait(self, size):
+        if self._seconds_per_byte and size:
+            time.sleep(size * self._seconds_per_byte)
+
+    def _interrupt(self, size):
+        if self._error is not None and size != 0:
+            raise self._error
+
+    def read(self, size=-1):
+        data = super().read(size)
+        if not data:
+            self._interrupt(size)
+        self._wait(len(data))
+        return data
+
+    def readinto(self, buffer):
+        received = super().readinto(buffer)
+        if not received:
+            self._interrupt(len(buffer))
+        self._wait(received)
+        return received
+
+
+class ReplayTransport:
+    """
+    A transport answering requests with the responses recorded by
+    :class:`Recorder`, after the same delays scaled by ``latency_scale``.
+
+    Requests are matched on their method, path, query and Range header, so a
+    recording can be replayed with any service URL. A request recorded
+    several times gets the recorded responses in order, then the last one
+    again; a request that wasn't recorded gets a 404 response.
+
+    :param path: an archive written by :class:`Recorder`.
+    :type path: str
+    :param latency_scale: multiplies the recorded time to receive each
+        response and its body; 0 to answer immediately.
+    :type latency_scale: float
+    :raises ValueError: if the archive isn't a recording.
+    """
+    def __init__(self, path, latency_scale=1.0):
+        self.path = path
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._archive = zipfile.ZipFile(path)
+        try:
+            index = json.loads(self._archive.read(INDEX_NAME))
+        except (KeyError, ValueError) as e:
+            raise ValueError(f'Not a recording: {path}: {e}') from None
+        if index.get('version') != ARCHIVE_VERSION:
+            raise ValueError(
+                f'Unsupported recording version {index.get("version")}')
+        self._responses = collections.defaultdict(collections.deque)
+        for entry in index['requests']:
+            self._responses[_key(
+                entry['method'], entry['url'], entry.get('range'))].append(
+                entry)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.path!r})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _next_entry(self, key):
+        with self._lock:
+            entries = self._responses.get(key)
+            if not entries:
+                return None
+            if len(entries) > 1:
+                return entries.popleft()
+            return entries[0]
+
+    def request(self, method, url, stream=False, **kwargs):
+        """Answer a request with its recorded response"""
+        url = _prepared_url(method, url, kwargs.get('params'))
+        entry = self._next_entry(
+            _key(method, url, _range(kwargs.get('headers'))))
+        if entry is None:
+            LOG.warning('Not recorded: %s %s', method.upper(), url)
+            entry = {'status': 404, 'reason': 'Not recorded', 'headers': {},
+                     'elapsed': 0, 'body': None}
+
+        time.sleep(entry['elapsed'] * self.latency_scale)
+        if 'error' in entry:
+            error_class = _error_class(
+                entry['error'], requests.exceptions.ConnectionError)
+            raise error_class(f'Recorded {entry["error"]}')
+
+        body = b''
+        if entry['body'] is not None:
+            with self._lock:
+                body = self._archive.read(f'{BODIES_DIR}/{entry["body"]}')
+
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry['reason']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.url = url
+        response.encoding = requests.utils.get_encoding_from_headers(
+            response.headers)
+        error = None
+        if 'body_error' in entry:
+            # raised by iter_content, which doesn't wrap read's exceptions
+            error = _error_class(
+                entry['body_error'], requests.exceptions.ChunkedEncodingError)(
+                f'Recorded {entry["body_error"]}')
+        response.raw = _ReplayBody(
+            body, entry.get('body_seconds', 0) * self.latency_scale, error)
+        if not stream:
+            # read the body now, as requests does
+            response.content
+        return response
+
+    def close(self):
+        self._archive.close()
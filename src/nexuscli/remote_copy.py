@@ -0,0 +1,116 @@
+"""Copies artefacts between Nexus repositories without writing them to disk"""
+import logging
+import posixpath
+
+from nexuscli import exception, nexus_util
+from nexuscli.concurrency import run_concurrently
+
+LOG = logging.getLogger(__name__)
+
+
+def _relative_path(artefact, directory, flatten):
+    path = artefact['path'].lstrip(posixpath.sep)
+    if flatten:
+        return posixpath.basename(path)
+    prefix = f'{directory}{posixpath.sep}' if directory else ''
+    if path.startswith(prefix):
+        return path[len(prefix):]
+    return path
+
+
+def _is_same(checksum, existing_checksum):
+    """Whether two artefact checksums have the same sha256 or sha1"""
+    checksum = checksum or {}
+    existing_checksum = existing_checksum or {}
+    for name in ('sha256', 'sha1'):
+        if checksum.get(name) and existing_checksum.get(name):
+            return checksum[name] == existing_checksum[name]
+    return False
+
+
+def copy(nexus_client, source, destination, flatten=False, nocache=False,
+         target_client=None, checkpoint=None):
+    """
+    Copy artefacts from one repository path to another, possibly in another
+    repository of a different format. Each artefact is downloaded and
+    uploaded at the same time, with no temporary files; artefacts are
+    copied concurrently, as allowed by the ``concurrency`` limiter of
+    ``nexus_client``.
+
+    Like :meth:`~nexuscli.nexus_client.NexusClient.download`, ``source`` is
+    an artefact or a directory ending in ``/``. The path of the artefacts
+    relative to the ``source`` directory is reproduced under the
+    ``destination`` directory, unless ``flatten`` is set. A ``destination``
+    not ending in ``/`` renames a single artefact.
+
+    :param nexus_client: the client used for downloads and, unless
+        ``target_client`` is given, uploads.
+    :type nexus_client: nexuscli.nexus_client.NexusClient
+    :param source: repository path of an artefact or directory.
+    :type source: str
+    :param destination: repository path of the destination directory or file.
+    :type destination: str
+    :param flatten: if True, the source directory tree isn't reproduced.
+    :type flatten: bool
+    :param nocache: if True, artefacts are copied even if the destination
+        already has an artefact with the same checksum.
+    :type nocache: bool
+    :param target_client: the client used for uploads, to copy to another
+        Nexus service.
+    :type target_client: nexuscli.nexus_client.NexusClient
+    :param checkpoint: artefacts already copied, which are skipped; copied
+        artefacts are added to it.
+    :type checkpoint: nexuscli.replicate.Checkpoint
+    :raises exception.NexusClientInvalidRepositoryPath: if ``source`` is a
+        directory and ``destination`` a file.
+    :raises exception.NexusClientBaseError: if an artefact can't be copied;
+        copies in progress are completed, the others are abandoned.
+    :return: number of artefacts copied or already present.
+    :rtype: int
+    """
+    _, src_dir, src_file = nexus_client.split_component_path(source)
+    dst_repo, dst_dir, dst_file = nexus_client.split_component_path(
+        destination)
+    if src_file is None and dst_file is not None:
+        raise exception.NexusClientInvalidRepositoryPath(
+            'Not allowed to copy a directory to a file')
+    target_client = target_client or nexus_client
+    repository = target_client.repositories.get_by_name(dst_repo)
+    if src_file is not None:
+        flatten = True
+
+    existing = {}
+    if not nocache:
+        listing_path = posixpath.join(dst_repo, dst_dir or '', '')
+        existing = {
+            artefact['path'].lstrip(posixpath.sep): artefact.get('checksum')
+            for artefact in target_client.list_raw(listing_path)}
+
+    def _copy(artefact):
+        relative_path = _relative_path(artefact, src_dir, flatten)
+        sub_directory, file_name = posixpath.split(relative_path)
+        target_dir = posixpath.join(
+            dst_dir or '', sub_directory).rstrip(posixpath.sep)
+        file_name = dst_file or file_name
+        target = posixpath.join(target_dir, file_name)
+
+        if _is_same(artefact.get('checksum'), existing.get(target)) or (
+                checkpoint is not None and artefact in checkpoint):
+            LOG.debug('Skipping %s; %s is the same', artefact['path'], target)
+            nexus_client.metrics.increment('copy_skipped')
+            return
+
+        size, chunks = nexus_client.stream_file(artefact['downloadUrl'])
+        # the download is throttled; the upload is throttled too only when
+        # the target's client has its own limit
+        repository.upload_stream(
+            nexus_util.ChunkReader(
+                chunks, size, throttled_by=nexus_client.bandwidth_limiter),
+            target_dir, file_name, size)
+        LOG.info('Copied %s to %s/%s', artefact['path'], dst_repo, target)
+        if checkpoint is not None:
+            checkpoint.add(artefact)
+
+    results = run_concurrently(
+        _copy, nexus_client.list_raw(source), nexus_client.concurrency)
+    return sum(1 for _ in results)
@@ -0,0 +1,127 @@
+"""Replicates repository content from one Nexus service to another"""
+import json
+import logging
+import threading
+from pathlib import Path
+
+from nexuscli import remote_copy
+
+LOG = logging.getLogger(__name__)
+
+
+class Checkpoint:
+    """
+    A record of the artefacts already replicated, kept in a file so an
+    interrupted replication resumes where it stopped; e.g. a long initial
+    replication or one that runs while the target service is still indexing
+    the artefacts uploaded.
+
+    An artefact is identified by its path and checksum, so it's replicated
+    again if it changes. Each replicated artefact is appended to the file as
+    a JSON line as soon as it's uploaded.
+
+    :param path: the checkpoint file; created on first use.
+    :type path: str
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._file = None
+        self._entries = set()
+        try:
+            with self.path.open(encoding='utf-8') as fh:
+                for line in fh:
+                    try:
+                        self._entries.add(tuple(json.loads(line)))
+                    except ValueError:
+                        # the last line is incomplete when interrupted
+                        LOG.debug('Ignoring checkpoint line %r', line)
+        except FileNotFoundError:
+            pass
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({str(self.path)!r})'
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @staticmethod
+    def _key(artefact):
+        checksum = artefact.get('checksum') or {}
+        digest = next((checksum[name] for name in ('sha256', 'sha1', 'md5')
+                       if checksum.get(name)), None)
+        return artefact['path'], digest
+
+    def __contains__(self, artefact):
+        return self._key(artefact) in self._entries
+
+    def add(self, artefact):
+        """
+        Record an artefact as replicated.
+
+        :param artefact: as returned by
+            :meth:`~nexuscli.nexus_client.NexusClient.list_raw`.
+        :type artefact: dict
+        """
+        key = self._key(artefact)
+        with self._lock:
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = self.path.open('a', encoding='utf-8')
+            self._file.write(json.dumps(key) + '\n')
+            self._file.flush()
+            self._entries.add(key)
+
+    def close(self):
+        """Close the checkpoint file; it's re-opened when required"""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def replicate(source_client, target_client, source, destination,
+              checkpoint_path=None, nocache=False):
+    """
+    Copy the artefacts in a repository path of one Nexus service that are
+    missing (or have a different checksum) in a repository path of another
+    service. Artefacts are streamed from one service to the other, without
+    temporary files, and replicated concurrently as allowed by the
+    ``concurrency`` limiter of ``source_client``.
+
+    :param source_client: client for the service replicated from.
+    :type source_client: nexuscli.nexus_client.NexusClient
+    :param target_client: client for the service replicated to.
+    :type target_client: nexuscli.nexus_client.NexusClient
+    :param source: repository path of an artefact or directory, as given to
+        :func:`~nexuscli.remote_copy.copy`.
+    :type source: str
+    :param destination: repository path of the destination directory.
+    :type destination: str
+    :param checkpoint_path: file where the replicated artefacts are recorded
+        (see :class:`Checkpoint`). None to compare all artefacts with the
+        target listing.
+    :type checkpoint_path: str
+    :param nocache: if True, artefacts are replicated even if the target has
+        an artefact with the same checksum or the checkpoint records them.
+    :type nocache: bool
+    :return: number of artefacts replicated or already present.
+    :rtype: int
+    """
+    if checkpoint_path is None or nocache:
+        return remote_copy.copy(
+            source_client, source, destination, nocache=nocache,
+            target_client=target_client)
+
+    with Checkpoint(checkpoint_path) as checkpoint:
+        LOG.info('Resuming with %d artefacts in %s', len(checkpoint),
+                 checkpoint)
+        return remote_copy.copy(
+            source_client, source, destination, target_client=target_client,
+            checkpoint=checkpoint)
@@ -0,0 +1,197 @@
+"""Retry policy for requests made by the Nexus client"""
+import email.utils
+import random
+from datetime import datetime, timezone
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+# https://tools.ietf.org/html/rfc7231#section-4.2.2
+IDEMPOTENT_METHODS = frozenset(['delete', 'get', 'head', 'options', 'put'])
+RETRY_STATUSES = frozenset([429, 502, 503, 504])
+# the service didn't act on the request so any method can be safely re-sent
+NOT_PROCESSED_STATUSES = frozenset([429, 503])
+
+
+def parse_retry_after(value):
+    """
+    Parse the value of a ``Retry-After`` HTTP header.
+
+    :param value: the header value; either a number of seconds or a HTTP date.
+    :type value: Union[str,None]
+    :return: number of seconds to wait or None, if the value is not valid.
+    :rtype: Union[float,None]
+    """
+    if value is None:
+        return None
+
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            date = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError, IndexError):
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        seconds = (date - datetime.now(timezone.utc)).total_seconds()
+
+    return max(0.0, seconds)
+
+
+def _request_was_sent(error):
+    """False when the connection failed before the request was sent"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return False
+    reason = getattr(error.args[0] if error.args else None, 'reason', None)
+    return not isinstance(reason, NewConnectionError)
+
+
+def body_rewinder(request_kwargs):
+    """
+    Find the request body in the given :py:func:`requests.request` keyword
+    arguments and prepare to re-send it.
+
+    :param request_kwargs: as given to
+        :meth:`~nexuscli.nexus_client.NexusClient.http_request`.
+    :type request_kwargs: dict
+    :return: a callable that rewinds all streams in the request body to their
+        current position or None, if the body cannot be re-sent (e.g.: it's a
+        generator or a pipe).
+    :rtype: Union[callable,None]
+    """
+    bodies = [request_kwargs.get('data')]
+    files = request_kwargs.get('files') or {}
+    if isinstance(files, dict):
+        files = files.items()
+    for _, value in files:
+        if isinstance(value, (tuple, list)):
+            value = value[1]
+        bodies.append(value)
+
+    streams = []
+    for body in bodies:
+        if body is None or isinstance(body, (bytes, str, dict, list, tuple)):
+            continue
+        seekable = getattr(body, 'seekable', None)
+        if seekable is not None and not seekable():
+            return None
+        try:
+            streams.append((body, body.tell()))
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def rewind():
+        for stream, position in streams:
+            stream.seek(position)
+
+    return rewind
+
+
+class RetryPolicy:
+    """
+    Decides whether a failed HTTP request should be retried and how long to
+    wait before doing so. Waits grow exponentially with each retry, are
+    randomised by a jitter and honour the ``Retry-After`` header sent by the
+    service.
+
+    Requests using methods not listed in ``idempotent_methods`` are only
+    retried when the service is known not to have processed them; i.e.: the
+    connection couldn't be established or the response status is 429 or 503.
+
+    :param total: maximum number of retries for a single request. Use 0 to
+        disable retries.
+    :type total: int
+    :param backoff_factor: wait in seconds before the first retry; subsequent
+        retries wait ``backoff_factor * 2 ** (retry_number - 1)``.
+    :type backoff_factor: float
+    :param backoff_max: maximum wait in seconds calculated from the
+        ``backoff_factor``.
+    :type backoff_max: float
+    :param retry_after_max: maximum wait in seconds accepted from a
+        ``Retry-After`` header.
+    :type retry_after_max: float
+    :param jitter: when True, randomise waits between half and the full
+        calculated value.
+    :type jitter: bool
+    :param statuses: HTTP response status codes that will be retried.
+    :type statuses: typing.Iterable[int]
+    :param idempotent_methods: lowercase HTTP methods that can always be
+        safely retried.
+    :type idempotent_methods: typing.Iterable[str]
+    """
+    def __init__(self, total=3, backoff_factor=0.5, backoff_max=30.0,
+                 retry_after_max=120.0, jitter=True, statuses=RETRY_STATUSES,
+                 idempotent_methods=IDEMPOTENT_METHODS):
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+        self.jitter = jitter
+        self.statuses = frozenset(statuses)
+        self.idempotent_methods = frozenset(
+            m.lower() for m in idempotent_methods)
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(total={self.total}, '
+                f'backoff_factor={self.backoff_factor})')
+
+    def is_idempotent(self, method):
+        """True if the given HTTP method can always be safely retried"""
+        return method.lower() in self.idempotent_methods
+
+    def is_retryable(self, method, retry_number, response=None, error=None):
+        """
+        Whether a request should be retried.
+
+        :param method: HTTP method of the request.
+        :type method: str
+        :param retry_number: the retry being considered; 1 for the first retry.
+        :type retry_number: int
+        :param response: the response received, if any.
+        :type response: requests.Response
+        :param error: the exception raised by :py:func:`requests.request`, if
+            any.
+        :type error: requests.exceptions.RequestException
+        :rtype: bool
+        """
+        if retry_number > self.total:
+            return False
+
+        if error is not None:
+            return self.is_idempotent(method) or not _request_was_sent(error)
+
+        if response.status_code not in self.statuses:
+            return False
+
+        return (self.is_idempotent(method) or
+                response.status_code in NOT_PROCESSED_STATUSES)
+
+    def get_backoff(self, retry_number, response=None):
+        """
+        Calculate how long to wait before the given retry.
+
+        :param retry_number: 1 for the first retry, 2 for the second etc.
+        :type retry_number: int
+        :param response: the response that triggered the retry, if any. Its
+            ``Retry-After`` header is used when longer than the calculated
+            backoff.
+        :type response: requests.Response
+        :return: seconds to wait.
+        :rtype: float
+        """
+        backoff = min(self.backoff_max,
+                      self.backoff_factor * 2 ** (retry_number - 1))
+        if self.jitter:
+            backoff = random.uniform(backoff / 2, backoff)
+
+        if response is not None:
+            retry_after = parse_retry_after(
+                response.headers.get('Retry-After'))
+            if retry_after is not None:
+                backoff = max(backoff, min(retry_after, self.retry_after_max))
+
+        return backoff
+
+
+NO_RETRY = RetryPolicy(total=0)
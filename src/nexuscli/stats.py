@@ -0,0 +1,192 @@
+"""Time breakdown and profiling of a command, for ``nexus3 --stats`` and
+``nexus3 --profile``"""
+import collections
+import contextlib
+import cProfile
+import pstats
+import threading
+import time
+
+from nexuscli import hooks
+
+# phases timed by PhaseStats
+NETWORK = 'network'
+HASHING = 'hashing'
+JSON_DECODING = 'json decoding'
+DISK_WRITES = 'disk writes'
+PHASES = (NETWORK, HASHING, JSON_DECODING, DISK_WRITES)
+
+# the PhaseStats timing phases; see enable()
+_active = None
+
+
+@contextlib.contextmanager
+def _not_timed():
+    yield
+
+
+class PhaseStats:
+    """
+    Time spent in each phase of a command and the requests it made.
+
+    Phases are timed in the threads that run them and summed, so with
+    concurrent transfers a phase may take longer than the command. Time spent
+    on requests (until the response headers are received, including the
+    upload of any request body) is counted as :data:`NETWORK` through the
+    :class:`~nexuscli.hooks.ClientHooks` of the clients attached.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.seconds = collections.Counter()
+        self.requests = collections.Counter()
+        self.statuses = collections.Counter()
+        self.retries = 0
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({dict(self.seconds)!r})'
+
+    def add(self, phase, seconds):
+        """
+        Add ``seconds`` to the time spent in ``phase``.
+
+        :param phase: one of :data:`PHASES`.
+        :type phase: str
+        :type seconds: float
+        """
+        with self._lock:
+            self.seconds[phase] += seconds
+
+    @contextlib.contextmanager
+    def timed(self, phase):
+        """Context manager adding the time spent in it to ``phase``"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    def attach(self, client_hooks):
+        """
+        Count the requests and retries emitted to the given hooks.
+
+        :type client_hooks: nexuscli.hooks.ClientHooks
+        """
+        client_hooks.add(hooks.REQUEST_END, self._on_request_end)
+        client_hooks.add(hooks.RETRY, self._on_retry)
+
+    def _on_request_end(self, _, method, status, elapsed, error, **__):
+        with self._lock:
+            self.seconds[NETWORK] += elapsed
+            self.requests[method.upper()] += 1
+            self.statuses[status if error is None
+                          else error.__class__.__name__] += 1
+
+    def _on_retry(self, *_, **__):
+        with self._lock:
+            self.retries += 1
+
+    def report(self, wall_seconds):
+        """
+        A summary of the statistics, for people.
+
+        :param wall_seconds: how long the command took.
+        :type wall_seconds: float
+        :rtype: str
+        """
+        with self._lock:
+            lines = [f'Command took {wall_seconds:.3f}s',
+                     'Time by phase (summed across threads):']
+            for phase in PHASES:
+                lines.append(f'  {phase:<16}{self.seconds[phase]:10.3f}s')
+            total = sum(self.requests.values())
+            by_method = ', '.join(f'{method} {count}' for method, count
+                                  in sorted(self.requests.items()))
+            statuses = sorted(self.statuses.items(),
+                              key=lambda item: str(item[0]))
+            by_status = ', '.join(f'{status} {count}'
+                                  for status, count in statuses)
+            lines.append(f'Requests: {total}' +
+                         (f' ({by_method})' if total else ''))
+            if total:
+                lines.append(f'Responses: {by_status}')
+            lines.append(f'Retries: {self.retries}')
+        return '\n'.join(lines) + '\n'
+
+
+def enable():
+    """
+    Start timing phases with a new :class:`PhaseStats`.
+
+    :rtype: PhaseStats
+    """
+    global _active
+    _active = PhaseStats()
+    return _active
+
+
+def disable():
+    """Stop timing phases"""
+    global _active
+    _active = None
+
+
+def active():
+    """
+    The :class:`PhaseStats` timing phases, if any.
+
+    :rtype: Union[PhaseStats,None]
+    """
+    return _active
+
+
+def timed(phase):
+    """
+    Context manager adding the time spent in it to ``phase`` of the active
+    :class:`PhaseStats`; it does nothing if there's none.
+
+    :param phase: one of :data:`PHASES`.
+    :type phase: str
+    """
+    if _active is None:
+        return _not_timed()
+    return _active.timed(phase)
+
+
+class ThreadProfiler:
+    """
+    Profiles, with :py:mod:`cProfile`, the thread that starts it and all
+    threads started after it, e.g. those running concurrent transfers.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles = []
+
+    def _profile_thread(self, *_):
+        # called by a new thread; replaced by the thread's own profiler
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        threading.setprofile(self._profile_thread)
+        self._profile_thread()
+
+    def stop(self):
+        threading.setprofile(None)
+        with self._lock:
+            for profile in self._profiles:
+                profile.disable()
+
+    def dump(self, path):
+        """
+        Write the profiles of all threads, combined, to a file that can be
+        read with :py:class:`pstats.Stats`.
+
+        :param path: the file written.
+        :type path: str
+        """
+        with self._lock:
+            first, *others = [profile for profile in self._profiles
+                              if profile.getstats()]
+        pstats.Stats(first, *others).dump_stats(path)
@@ -0,0 +1,245 @@
+"""Content-addressed local store of downloaded artefacts"""
+import collections
+import errno
+import logging
+import os
+import shutil
+import stat
+import time
+import uuid
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+LOG = logging.getLogger(__name__)
+
+# hashes used as store keys, in order of preference
+STORE_HASHES = ('sha256', 'sha1')
+LINK_MODES = ('reflink', 'hardlink', 'copy')
+# how files are added to the store and, by default, materialised; not
+# hardlinks, so the store never shares a file with a workspace
+STORE_LINK_MODES = ('reflink', 'copy')
+# Linux ioctl sharing the extents of one file with another (copy-on-write)
+FICLONE = 0x40049409
+
+
+def reflink(source, destination):
+    """
+    Create ``destination`` as a copy-on-write clone of ``source``; only
+    supported by some file systems (e.g. btrfs, XFS).
+
+    :raises OSError: if the file system (or platform) doesn't support it.
+    """
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, 'reflink not supported')
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            dst.close()
+            os.remove(destination)
+            raise
+
+
+def link_file(source, destination, modes=LINK_MODES):
+    """
+    Make ``destination`` have the same content as ``source`` using the first
+    of the given modes supported between the two locations. An existing
+    ``destination`` is atomically replaced.
+
+    :param source: existing file.
+    :param destination: file to be created or replaced.
+    :param modes: any of :data:`LINK_MODES`, in order of preference.
+    :return: the mode used.
+    :rtype: str
+    :raises OSError: if none of the modes succeeded.
+    """
+    destination = Path(destination)
+    temp_path = destination.with_name(
+        f'.{destination.name}.{uuid.uuid4().hex}.tmp')
+    error = OSError(errno.EINVAL, 'no link mode given')
+    for mode in modes:
+        try:
+            if mode == 'reflink':
+                reflink(source, temp_path)
+            elif mode == 'hardlink':
+                os.link(source, temp_path)
+            else:
+                shutil.copyfile(source, temp_path)
+            os.replace(temp_path, destination)
+            return mode
+        except OSError as e:
+            LOG.debug('Unable to %s %s to %s: %s', mode, source,
+                      destination, e)
+            error = e
+            try:
+                os.remove(temp_path)
+            except FileNotFoundError:
+                pass
+    raise error
+
+
+class ArtefactStore:
+    """
+    A directory of artefacts shared by many downloads, named after the hash of
+    their content, so an artefact already fetched into any workspace can be
+    restored without contacting the Nexus service.
+
+    Files are added to the store as a reflink or copy, and materialised at
+    their destination according to ``link_modes``. Stored files are
+    read-only: with ``hardlink`` in ``link_modes``, a destination shares the
+    file in the store, so it must be replaced rather than modified in place.
+
+    When ``max_size`` is set, :meth:`evict` removes the least recently used
+    files until the store is within that size.
+
+    :param path: root directory of the store; created on first use.
+    :type path: str
+    :param max_size: maximum total size in bytes. None for no limit.
+    :type max_size: int
+    :param link_modes: how files are materialised, in order of preference;
+        see :func:`link_file`.
+    :type link_modes: tuple
+    """
+    def __init__(self, path, max_size=None, link_modes=STORE_LINK_MODES):
+        self.path = Path(path)
+        self.max_size = max_size
+        self.link_modes = tuple(link_modes)
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}({str(self.path)!r}, '
+                f'max_size={self.max_size})')
+
+    def _key_paths(self, hashes):
+        return [self.path.joinpath(name, hashes[name][:2], hashes[name])
+                for name in STORE_HASHES if hashes.get(name)]
+
+    def lookup(self, checksum):
+        """
+        Find a stored file with the given checksum.
+
+        :param checksum: hash algorithm name to hexadecimal digest; e.g. the
+            ``checksum`` of an artefact returned by
+            :meth:`~nexuscli.nexus_client.NexusClient.list_raw`.
+        :type checksum: dict
+        :return: the stored file or None, if not in the store.
+        :rtype: Union[pathlib.Path,None]
+        """
+        for key_path in self._key_paths(checksum):
+            if key_path.is_file():
+                return key_path
+        return None
+
+    def materialize(self, checksum, destination):
+        """
+        Create ``destination`` from the stored file with the given checksum,
+        replacing any existing file, and mark the stored file as used.
+
+        :param checksum: see :meth:`lookup`.
+        :type checksum: dict
+        :param destination: the file to be created.
+        :return: True if the file was in the store and was materialised.
+        :rtype: bool
+        """
+        stored = self.lookup(checksum)
+        if stored is None:
+            return False
+
+        try:
+            mode = link_file(stored, destination, self.link_modes)
+        except OSError as e:
+            LOG.warning('Unable to restore %s from store: %s', destination, e)
+            return False
+
+        # the access time records when the file was last used; set
+        # explicitly since file systems may not update it on read
+        now = time.time()
+        os.utime(stored, (now, stored.stat().st_mtime))
+        LOG.debug('Restored %s from store using %s', destination, mode)
+        return True
+
+    def add(self, file_path, hashes):
+        """
+        Add a file to the store under each of its hashes, unless already
+        stored. The file is reflinked or copied, never hardlinked, so the
+        stored file's size counts towards ``max_size``.
+
+        :param file_path: a local file; it's not modified.
+        :param hashes: hash algorithm name to hexadecimal digest of the file
+            content; only :data:`STORE_HASHES` are used.
+        :type hashes: dict
+        """
+        key_paths = self._key_paths(hashes)
+        if not key_paths:
+            return
+
+        stored = self.lookup(hashes)
+        try:
+            if stored is None:
+                stored = key_paths[0]
+                stored.parent.mkdir(parents=True, exist_ok=True)
+                link_file(file_path, stored, STORE_LINK_MODES)
+                mode = stat.S_IMODE(stored.stat().st_mode)
+                stored.chmod(mode & ~(stat.S_IWUSR | stat.S_IWGRP |
+                                      stat.S_IWOTH))
+            for key_path in key_paths:
+                if not key_path.exists():
+                    key_path.parent.mkdir(parents=True, exist_ok=True)
+                    link_file(stored, key_path, ('hardlink', 'copy'))
+        except OSError as e:
+            LOG.warning('Unable to add %s to store: %s', file_path, e)
+
+    def _entries(self):
+        """Stored files, with all paths to the same file grouped together"""
+        entries = collections.defaultdict(list)
+        stats = {}
+        for name in STORE_HASHES:
+            for root, _, files in os.walk(self.path.joinpath(name)):
+                for file_name in files:
+                    file_path = os.path.join(root, file_name)
+                    try:
+                        file_stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        continue
+                    inode = (file_stat.st_dev, file_stat.st_ino)
+                    entries[inode].append(file_path)
+                    stats[inode] = file_stat
+        return [(stats[inode], paths) for inode, paths in entries.items()]
+
+    def size(self):
+        """
+        :return: total size in bytes of the files in the store.
+        :rtype: int
+        """
+        return sum(file_stat.st_size for file_stat, _ in self._entries())
+
+    def evict(self):
+        """
+        Remove the least recently used files until the total size of the
+        store is within ``max_size``.
+
+        :return: number of bytes removed.
+        :rtype: int
+        """
+        if self.max_size is None:
+            return 0
+
+        entries = self._entries()
+        total = sum(file_stat.st_size for file_stat, _ in entries)
+        removed = 0
+        for file_stat, paths in sorted(
+                entries, key=lambda entry: entry[0].st_atime):
+            if total - removed <= self.max_size:
+                break
+            for file_path in paths:
+                try:
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    pass
+            removed += file_stat.st_size
+            LOG.debug('Evicted %s from store', paths[0])
+
+        return removed
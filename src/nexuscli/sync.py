@@ -0,0 +1,246 @@
+"""Mirrors a directory between a Nexus repository and the local file system"""
+import functools
+import logging
+import os
+import pathlib
+import posixpath
+
+from nexuscli import exception, nexus_util
+from nexuscli.api.repository import util
+from nexuscli.concurrency import run_concurrently
+from nexuscli.nexus_client import PARTIAL_SUFFIX
+
+LOG = logging.getLogger(__name__)
+
+PULL = 'pull'
+PUSH = 'push'
+
+
+class SyncPlan:
+    """
+    The changes needed to make a destination directory mirror a source
+    directory, as calculated by :func:`plan`.
+
+    Entries in :attr:`transfers` and :attr:`deletions` are tuples of the
+    path relative to the synchronised directories (using ``/`` as separator)
+    and the remote artefact, as returned by
+    :meth:`~nexuscli.nexus_client.NexusClient.list_raw`, or None when the
+    path doesn't exist remotely.
+
+    :param direction: :data:`PULL` from Nexus to a local directory or
+        :data:`PUSH` from a local directory to Nexus.
+    :type direction: str
+    :param remote_path: the directory in Nexus, including the repository
+        name.
+    :type remote_path: str
+    :param local_dir: the local directory.
+    :type local_dir: str
+    """
+    def __init__(self, direction, remote_path, local_dir):
+        self.direction = direction
+        self.remote_path = remote_path
+        self.local_dir = local_dir
+        self.transfers = []
+        self.deletions = []
+        self.unchanged = 0
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}({self.direction}, '
+                f'transfers={len(self.transfers)}, '
+                f'deletions={len(self.deletions)}, '
+                f'unchanged={self.unchanged})')
+
+    def describe(self):
+        """
+        Yields one line per change in the plan; e.g. ``download dir/file``.
+
+        :rtype: typing.Iterator[str]
+        """
+        verb = 'download' if self.direction == PULL else 'upload'
+        for relative_path, _ in self.transfers:
+            yield f'{verb} {relative_path}'
+        for relative_path, _ in self.deletions:
+            yield f'delete {relative_path}'
+
+    def local_path(self, relative_path):
+        """Location of a path relative to the synchronised directories in
+        :attr:`local_dir`"""
+        return pathlib.Path(self.local_dir).joinpath(
+            *relative_path.split(posixpath.sep))
+
+
+def _remote_directory(nexus_client, remote_path):
+    """Returns the repository and directory of a remote path, which is
+    always taken to be a directory"""
+    if not remote_path.endswith(posixpath.sep):
+        remote_path += posixpath.sep
+    repository, directory, _ = nexus_client.split_component_path(remote_path)
+    return remote_path, repository, directory
+
+
+def _remote_artefacts(nexus_client, remote_path):
+    """Artefacts under ``remote_path``, by path relative to it"""
+    remote_path, _, directory = _remote_directory(nexus_client, remote_path)
+    prefix = f'{directory}{posixpath.sep}' if directory else ''
+    artefacts = {}
+    for artefact in nexus_client.list_raw(remote_path):
+        path = artefact['path'].lstrip(posixpath.sep)
+        if path.startswith(prefix):
+            artefacts[path[len(prefix):]] = artefact
+    return artefacts
+
+
+def _local_files(local_dir):
+    """Files under ``local_dir``, by path relative to it"""
+    if not os.path.isdir(local_dir):
+        return {}
+    return {relative_path.replace(os.sep, posixpath.sep):
+            os.path.join(local_dir, relative_path)
+            for relative_path, _ in util.scan_files(local_dir)}
+
+
+def is_up_to_date(nexus_client, artefact, file_path):
+    """
+    Whether a local file has the same content as a remote artefact. The size
+    is compared first, when known, so files are only hashed when it matches;
+    hashes are looked up in the ``hash_cache`` of ``nexus_client``.
+
+    :param nexus_client: the client with the hash cache to be used.
+    :type nexus_client: nexuscli.nexus_client.NexusClient
+    :param artefact: as returned by
+        :meth:`~nexuscli.nexus_client.NexusClient.list_raw`.
+    :type artefact: dict
+    :param file_path: the local file.
+    :rtype: bool
+    """
+    try:
+        size = os.path.getsize(file_path)
+    except OSError:
+        return False
+    if artefact.get('fileSize') is not None and artefact['fileSize'] != size:
+        return False
+    return nexus_util.has_same_hash(
+        artefact, file_path, nexus_client.hash_cache)
+
+
+def plan(nexus_client, source, destination, delete=False):
+    """
+    Calculate the changes needed to make ``destination`` mirror ``source``.
+    When ``source`` is a local directory, it's pushed to the Nexus directory
+    ``destination``; otherwise the Nexus directory ``source`` is pulled to
+    the local directory ``destination``.
+
+    :param nexus_client: the client used to list remote artefacts.
+    :type nexus_client: nexuscli.nexus_client.NexusClient
+    :param source: the directory to be mirrored.
+    :type source: str
+    :param destination: the directory to be updated.
+    :type destination: str
+    :param delete: whether files in ``destination`` that aren't in
+        ``source`` are deleted.
+    :type delete: bool
+    :rtype: SyncPlan
+    """
+    if os.path.isdir(source):
+        sync_plan = SyncPlan(PUSH, destination, source)
+        targets = _remote_artefacts(nexus_client, destination)
+        sources = _local_files(source)
+        for relative_path, file_path in sorted(sources.items()):
+            artefact = targets.get(relative_path)
+            if artefact and is_up_to_date(nexus_client, artefact, file_path):
+                sync_plan.unchanged += 1
+            else:
+                sync_plan.transfers.append((relative_path, artefact))
+        extraneous = [(relative_path, artefact)
+                      for relative_path, artefact in targets.items()
+                      if relative_path not in sources]
+    else:
+        sync_plan = SyncPlan(PULL, source, destination)
+        sources = _remote_artefacts(nexus_client, source)
+        targets = _local_files(destination)
+        for relative_path, artefact in sorted(sources.items()):
+            file_path = targets.get(relative_path)
+            if file_path and is_up_to_date(nexus_client, artefact, file_path):
+                sync_plan.unchanged += 1
+            else:
+                sync_plan.transfers.append((relative_path, artefact))
+        # partial files are resumed by the downloads
+        extraneous = [
+            (relative_path, None) for relative_path in targets
+            if relative_path not in sources and not (
+                relative_path.endswith(PARTIAL_SUFFIX) and
+                relative_path[:-len(PARTIAL_SUFFIX)] in sources)]
+
+    if delete:
+        sync_plan.deletions = sorted(extraneous, key=lambda entry: entry[0])
+
+    return sync_plan
+
+
+def _pull(nexus_client, sync_plan, is_deletion, relative_path, artefact):
+    file_path = sync_plan.local_path(relative_path)
+    if is_deletion:
+        os.remove(file_path)
+        # remove the directories left empty, up to the synchronised one
+        for directory in file_path.parents:
+            if directory == pathlib.Path(sync_plan.local_dir):
+                break
+            try:
+                directory.rmdir()
+            except OSError:
+                break
+        return
+
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    nexus_client.download_file(artefact['downloadUrl'], file_path, artefact)
+
+
+def _push(nexus_client, sync_plan, repository, is_deletion, relative_path,
+          artefact):
+    if is_deletion:
+        response = nexus_client.http_delete(f'assets/{artefact["id"]}')
+        if response.status_code not in (204, 404):
+            raise exception.NexusClientAPIError(
+                f'Deleting {artefact["path"]}. Reason: {response.reason}')
+        return
+
+    _, _, directory = _remote_directory(nexus_client, sync_plan.remote_path)
+    sub_directory, file_name = posixpath.split(relative_path)
+    repository.upload_file(
+        str(sync_plan.local_path(relative_path)),
+        posixpath.join(directory or '', sub_directory).rstrip(posixpath.sep),
+        file_name)
+
+
+def execute(nexus_client, sync_plan):
+    """
+    Apply a plan calculated by :func:`plan`. Transfers run concurrently, as
+    allowed by the ``concurrency`` limiter of ``nexus_client``, then
+    deletions do; so directories left empty by deletions can be removed
+    without racing the downloads into them.
+
+    :param nexus_client: the client used for transfers and deletions.
+    :type nexus_client: nexuscli.nexus_client.NexusClient
+    :param sync_plan: the changes to be made.
+    :type sync_plan: SyncPlan
+    :raises exception.NexusClientBaseError: if a transfer or deletion fails;
+        changes in progress are completed, the others are abandoned.
+    :return: number of changes made.
+    :rtype: int
+    """
+    if sync_plan.direction == PULL:
+        apply = functools.partial(_pull, nexus_client, sync_plan)
+    else:
+        _, repository_name, _ = _remote_directory(
+            nexus_client, sync_plan.remote_path)
+        repository = nexus_client.repositories.get_by_name(repository_name)
+        apply = functools.partial(_push, nexus_client, sync_plan, repository)
+
+    count = 0
+    for is_deletion, entries in ((False, sync_plan.transfers),
+                                 (True, sync_plan.deletions)):
+        results = run_concurrently(
+            lambda entry: apply(is_deletion, *entry), entries,
+            nexus_client.concurrency)
+        count += sum(1 for _ in results)
+    return count
@@ -0,0 +1,553 @@
+"""
+An in-process stand-in for a Nexus 3 service, to test and benchmark
+:class:`~nexuscli.nexus_client.NexusClient` without a Nexus container.
+
+>>> with FakeNexus(latency=0.01, error_rate=0.05) as nexus:
+>>>     nexus.add_repository('my-repo')
+>>>     nexus.populate('my-repo', count=10000, size=1024)
+>>>     client = NexusClient(config=nexus.config)
+>>>     client.download('my-repo/', '/tmp/my-repo/')
+"""
+import base64
+import datetime
+import hashlib
+import http.server
+import json
+import logging
+import random
+import re
+import threading
+import time
+import urllib.parse
+
+from nexuscli import exception, nexus_config
+from nexuscli.api.cleanup_policy.collection import CleanupPolicyCollection
+from nexuscli.api.repository.collection import (
+    SCRIPT_NAME_CREATE, SCRIPT_NAME_DELETE, SCRIPT_NAME_GET)
+from nexuscli.compat import ThreadingHTTPServer
+
+LOG = logging.getLogger(__name__)
+
+SERVER_HEADER = 'Nexus/3.22.0-02 (OSS)'
+DEFAULT_PAGE_SIZE = 10
+REST_PATH = re.compile(r'^/service/rest/[^/]+/(?P<endpoint>.*)$')
+REPOSITORY_PATH = re.compile(r'^/repository/(?P<name>[^/]+)/(?P<path>.+)$')
+RANGE = re.compile(r'^bytes=(?P<start>\d+)-(?P<end>\d*)$')
+DEFAULT_ATTRIBUTES = {
+    'storage': {
+        'blobStoreName': 'default',
+        'strictContentTypeValidation': True,
+        'writePolicy': 'ALLOW',
+    },
+    'cleanup': {'policyName': None},
+}
+RECIPE_ATTRIBUTES = {
+    'maven2': {'maven': {'layoutPolicy': 'PERMISSIVE',
+                         'versionPolicy': 'RELEASE'}},
+    'yum': {'yum': {'repodataDepth': 0, 'deployPolicy': 'STRICT'}},
+}
+
+
+class Response:
+    """A response of :class:`FakeNexus` to a request"""
+    def __init__(self, status, body=b'', headers=None, content_length=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.content_length = content_length
+
+    @classmethod
+    def json(cls, status, content):
+        return cls(status, json.dumps(content).encode(),
+                   {'Content-Type': 'application/json'})
+
+
+def _generated_content(path, size):
+    """Deterministic content of a populated asset"""
+    pattern = f'{path}\n'.encode()
+    return (pattern * (size // len(pattern) + 1))[:size]
+
+
+def _split_multipart(body, content_type):
+    """Form field name to value for a ``multipart/form-data`` body"""
+    boundary = re.search(r'boundary="?([^";]+)"?', content_type).group(1)
+    fields = {}
+    for part in body.split(b'--' + boundary.encode())[1:-1]:
+        head, _, value = part[2:].partition(b'\r\n\r\n')
+        name = re.search(rb'name="([^"]*)"', head).group(1).decode()
+        fields[name] = value[:-2]
+    return fields
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format_, *args):
+        LOG.debug(format_, *args)
+
+    def version_string(self):
+        return SERVER_HEADER
+
+    def _read_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b';')[0], 16)
+                if size == 0:
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return b''.join(chunks)
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length)
+
+    def _handle(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        response = self.server.nexus.handle(
+            self.command, urllib.parse.unquote(url.path), query,
+            self.headers, self._read_body())
+
+        self.send_response(response.status)
+        for name, value in response.headers.items():
+            self.send_header(name, value)
+        content_length = response.content_length
+        if content_length is None:
+            content_length = len(response.body)
+        self.send_header('Content-Length', str(content_length))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(response.body)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_DELETE = _handle
+
+
+class FakeNexus:
+    """
+    A Nexus 3 service implemented with :mod:`http.server`, running in a
+    background thread. It implements the parts of the REST API used by
+    :class:`~nexuscli.nexus_client.NexusClient`:
+
+    - ``search/assets``, paginated ``page_size`` assets at a time;
+    - ``assets/{id}`` deletion;
+    - ``components`` uploads to raw repositories;
+    - ``repositories``;
+    - scripts: create, list, get, delete and run, where only the groovy
+      scripts bundled with nexuscli can be run; they are emulated;
+    - downloads and uploads (``PUT``) under ``/repository``, with byte
+      ranges.
+
+    Credentials aren't checked. Repository formats aren't validated either:
+    any repository accepts both raw and ``PUT`` uploads.
+
+    :param latency: seconds every request is delayed by.
+    :type latency: float
+    :param error_rate: fraction of requests, chosen at random, that fail with
+        ``error_status`` instead of being handled.
+    :type error_rate: float
+    :param error_status: HTTP status of the failed requests.
+    :type error_status: int
+    :param page_size: number of assets per page of search results.
+    :type page_size: int
+    :param seed: seed for the random choice of failed requests.
+    :type seed: int
+    """
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=503,
+                 page_size=DEFAULT_PAGE_SIZE, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.page_size = page_size
+        self.repositories = {}
+        self.scripts = {}
+        self.cleanup_policies = {}
+        # repository name to asset path to asset and its content, which is
+        # None when it's generated
+        self.assets = {}
+        self._asset_paths = {}
+        # number of requests, by method
+        self.requests = {}
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._search_cache = {}
+        self._server = None
+        self._runners = {
+            SCRIPT_NAME_GET: self._run_repository_get,
+            SCRIPT_NAME_CREATE: self._run_repository_create,
+            SCRIPT_NAME_DELETE: self._run_repository_delete,
+            CleanupPolicyCollection.GROOVY_SCRIPT_NAME:
+                self._run_cleanup_policy,
+        }
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.url!r})'
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+    def start(self):
+        """Start serving requests on a free local port"""
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.nexus = self
+        # a short poll interval so stop() returns promptly
+        threading.Thread(target=self._server.serve_forever, args=(0.05,),
+                         daemon=True).start()
+
+    def stop(self):
+        """Stop serving requests"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @property
+    def url(self):
+        """Base URL of the service; None when it's stopped"""
+        if self._server is None:
+            return None
+        return f'http://127.0.0.1:{self._server.server_port}/'
+
+    @property
+    def config(self):
+        """
+        Configuration for a client of this service.
+
+        :rtype: nexuscli.nexus_config.NexusConfig
+        """
+        return nexus_config.NexusConfig(url=self.url)
+
+    def add_repository(self, name, recipe='raw', repository_type='hosted',
+                       attributes=None):
+        """
+        Add a repository; e.g. for one that the client can't create.
+
+        :param name: name of the repository.
+        :type name: str
+        :param recipe: format of the repository; e.g. ``raw``, ``maven2``.
+        :type recipe: str
+        :param repository_type: ``hosted``, ``proxy`` or ``group``.
+        :type repository_type: str
+        :param attributes: repository attributes, as returned by Nexus;
+            defaults to those of a hosted repository.
+        :type attributes: dict
+        """
+        if attributes is None:
+            attributes = json.loads(json.dumps(DEFAULT_ATTRIBUTES))
+            attributes.update(RECIPE_ATTRIBUTES.get(recipe, {}))
+        self._create_repository({
+            'repositoryName': name,
+            'recipeName': f'{recipe}-{repository_type}',
+            'online': True,
+            'attributes': attributes,
+        })
+
+    def _create_repository(self, configuration):
+        with self._lock:
+            self.repositories[configuration['repositoryName']] = configuration
+            self.assets.setdefault(configuration['repositoryName'], {})
+
+    def _repository_assets(self, repository):
+        try:
+            return self.assets[repository]
+        except KeyError:
+            raise exception.NexusClientInvalidRepository(repository) from None
+
+    def add_asset(self, repository, path, content=None, size=None):
+        """
+        Add an asset to a repository, replacing any asset with the same path.
+
+        :param repository: name of the repository.
+        :type repository: str
+        :param path: path of the asset in the repository.
+        :type path: str
+        :param content: content of the asset; if not given, ``size`` bytes
+            derived from the path are generated when the asset is downloaded.
+        :type content: bytes
+        :param size: size of the generated content.
+        :type size: int
+        :raises exception.NexusClientInvalidRepository: if the repository
+            doesn't exist.
+        :return: the asset, as listed by ``search/assets``.
+        :rtype: dict
+        """
+        path = path.lstrip('/')
+        data = content
+        if data is None:
+            data = _generated_content(path, size or 0)
+        asset = {
+            'id': base64.urlsafe_b64encode(
+                f'{repository}:{path}'.encode()).decode().rstrip('='),
+            'repository': repository,
+            'path': path,
+            'format': self.repositories[repository]['recipeName'].split(
+                '-')[0] if repository in self.repositories else 'raw',
+            'checksum': {name: hashlib.new(name, data).hexdigest()
+                         for name in ('md5', 'sha1', 'sha256', 'sha512')},
+            'fileSize': len(data),
+            'lastModified': datetime.datetime.now(
+                datetime.timezone.utc).isoformat(timespec='milliseconds'),
+        }
+        with self._lock:
+            self._repository_assets(repository)[path] = (asset, content)
+            self._asset_paths[asset['id']] = (repository, path)
+            self._search_cache.clear()
+        return asset
+
+    def populate(self, repository, count, size=1024, directory='dataset'):
+        """
+        Add generated assets to a repository.
+
+        :param repository: name of the repository.
+        :type repository: str
+        :param count: number of assets.
+        :type count: int
+        :param size: size of each asset in bytes.
+        :type size: int
+        :param directory: directory of the assets; they are spread across 100
+            sub directories.
+        :type directory: str
+        :return: the assets added.
+        :rtype: list[dict]
+        """
+        return [self.add_asset(
+            repository, f'{directory}/{index % 100:02d}/asset-{index}.bin',
+            size=size) for index in range(count)]
+
+    def content(self, repository, path):
+        """
+        The content of an asset.
+
+        :param repository: name of the repository.
+        :type repository: str
+        :param path: path of the asset in the repository.
+        :type path: str
+        :return: the content or None if there's no such asset.
+        :rtype: Union[bytes,None]
+        """
+        path = path.lstrip('/')
+        with self._lock:
+            asset, content = self.assets.get(repository, {}).get(
+                path, (None, None))
+        if asset is None:
+            return None
+        if content is None:
+            return _generated_content(path, asset['fileSize'])
+        return content
+
+    def handle(self, method, path, query, headers, body):
+        """
+        Handle a request; called by the server for each request received.
+
+        :param method: HTTP method.
+        :type method: str
+        :param path: URL path, unquoted.
+        :type path: str
+        :param query: query string parameters.
+        :type query: dict
+        :param headers: request headers.
+        :type headers: email.message.Message
+        :param body: request body.
+        :type body: bytes
+        :rtype: Response
+        """
+        with self._lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            fails = self._random.random() < self.error_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if fails:
+            return Response(self.error_status, b'Injected failure')
+
+        match = REST_PATH.match(path)
+        if match:
+            return self._handle_rest(
+                method, match.group('endpoint'), query, headers, body)
+        match = REPOSITORY_PATH.match(path)
+        if match:
+            return self._handle_repository(
+                method, match.group('name'), match.group('path'), headers,
+                body)
+        if path == '/' and method in ('GET', 'HEAD'):
+            return Response(200, b'Nexus Repository Manager')
+        return Response(404)
+
+    def _handle_rest(self, method, endpoint, query, headers, body):
+        route = (method, endpoint.split('/')[0])
+        if route == ('GET', 'repositories'):
+            return Response.json(200, [
+                {'name': name,
+                 'format': configuration['recipeName'].split('-')[0],
+                 'type': configuration['recipeName'].split('-')[-1],
+                 'url': f'{self.url}repository/{name}'}
+                for name, configuration in self.repositories.items()])
+        if route == ('GET', 'search'):
+            return self._search_assets(query)
+        if route == ('DELETE', 'assets'):
+            return self._delete_asset(endpoint.split('/', 1)[-1])
+        if route == ('POST', 'components'):
+            return self._upload_component(query, headers, body)
+        if route[1] == 'script':
+            return self._handle_script(method, endpoint.split('/')[1:], body)
+        return Response(404)
+
+    def _search_assets(self, query):
+        repository = query.get('repository')
+        keyword = query.get('keyword', '').strip('"')
+        with self._lock:
+            key = (repository, keyword)
+            paths = self._search_cache.get(key)
+            if paths is None:
+                paths = [path for path in self.assets.get(repository, {})
+                         if keyword in path]
+                self._search_cache[key] = paths
+            offset = int(query.get('continuationToken') or 0)
+            page = []
+            for path in paths[offset:offset + self.page_size]:
+                asset, _ = self.assets[repository][path]
+                page.append(dict(
+                    asset, downloadUrl=(f'{self.url}repository/{repository}/'
+                                        f'{urllib.parse.quote(path)}')))
+
+        token = None
+        if offset + self.page_size < len(paths):
+            token = str(offset + self.page_size)
+        return Response.json(200, {'items': page, 'continuationToken': token})
+
+    def _delete_asset(self, asset_id):
+        with self._lock:
+            repository, path = self._asset_paths.pop(asset_id, (None, None))
+            if self.assets.get(repository, {}).pop(path, None) is None:
+                return Response(404)
+            self._search_cache.clear()
+        return Response(204)
+
+    def _upload_component(self, query, headers, body):
+        repository = query.get('repository')
+        if repository not in self.repositories:
+            return Response(404, b'Repository not found')
+        fields = _split_multipart(body, headers.get('Content-Type', ''))
+        directory = fields['raw.directory'].decode().strip('/')
+        file_name = fields['raw.asset1.filename'].decode()
+        self.add_asset(repository, f'{directory}/{file_name}',
+                       fields['raw.asset1'])
+        return Response(204)
+
+    def _handle_repository(self, method, repository, path, headers, body):
+        if method == 'PUT':
+            if repository not in self.repositories:
+                return Response(404)
+            self.add_asset(repository, path, body)
+            return Response(200)
+
+        content = self.content(repository, path)
+        if content is None:
+            return Response(404)
+
+        response_headers = {'Accept-Ranges': 'bytes',
+                            'Content-Type': 'application/octet-stream'}
+        match = RANGE.match(headers.get('Range', ''))
+        if not match:
+            return Response(200, content, response_headers)
+
+        start = int(match.group('start'))
+        end = min(int(match.group('end') or len(content) - 1),
+                  len(content) - 1)
+        if start >= len(content):
+            response_headers['Content-Range'] = f'bytes */{len(content)}'
+            return Response(416, b'', response_headers)
+        response_headers['Content-Range'] = \
+            f'bytes {start}-{end}/{len(content)}'
+        return Response(206, content[start:end + 1], response_headers)
+
+    def _handle_script(self, method, names, body):
+        if not names:
+            if method == 'GET':
+                return Response.json(200, list(self.scripts.values()))
+            if method == 'POST':
+                script = json.loads(body)
+                with self._lock:
+                    self.scripts[script['name']] = script
+                return Response(204)
+            return Response(405)
+
+        name = names[0]
+        if name not in self.scripts:
+            return Response(404)
+        if method in ('GET', 'HEAD'):
+            return Response.json(200, self.scripts[name])
+        if method == 'DELETE':
+            with self._lock:
+                del self.scripts[name]
+            return Response(204)
+        if method == 'PUT':
+            with self._lock:
+                self.scripts[name] = json.loads(body)
+            return Response(204)
+        if method == 'POST' and names[1:] == ['run']:
+            runner = self._runners.get(name)
+            if runner is None:
+                return Response(400, b'Only the nexuscli scripts can be run')
+            try:
+                result = runner(body.decode())
+            except (KeyError, ValueError) as e:
+                return Response(400, f'Script failed: {e!r}'.encode())
+            return Response.json(200, {'name': name, 'result': result})
+        return Response(405)
+
+    def _run_repository_get(self, args):
+        configuration = self.repositories.get(args)
+        if configuration is None:
+            return 'null'
+        return json.dumps(configuration)
+
+    def _run_repository_create(self, args):
+        configuration = json.loads(args)
+        name = configuration['name']
+        if name in self.repositories:
+            return f'Repository {name} already exists'
+        self._create_repository({
+            'repositoryName': name,
+            'recipeName': configuration['recipeName'],
+            'online': configuration.get('online', True),
+            'attributes': configuration['attributes'],
+        })
+        return 'null'
+
+    def _run_repository_delete(self, args):
+        with self._lock:
+            self.repositories.pop(args, None)
+            self.assets.pop(args, None)
+            self._search_cache.clear()
+        return 'null'
+
+    def _run_cleanup_policy(self, args):
+        try:
+            policy = json.loads(args)
+        except ValueError:
+            # "list" operation
+            return json.dumps(list(self.cleanup_policies.values()))
+
+        if len(policy) == 1:
+            return json.dumps(self.cleanup_policies[policy['name']])
+
+        criteria = {name: str(days * 86400)
+                    for name, days in policy.get('criteria', {}).items()
+                    if name in ('lastBlobUpdated', 'lastDownloaded')}
+        stored = {
+            'name': policy['name'],
+            'notes': policy.get('notes'),
+            'format': ('ALL_FORMATS' if policy.get('format') == 'all'
+                       else policy.get('format')),
+            'mode': 'deletion',
+            'criteria': criteria,
+        }
+        with self._lock:
+            stored = dict(self.cleanup_policies.get(policy['name'], stored),
+                          notes=stored['notes'], criteria=criteria)
+            self.cleanup_policies[policy['name']] = stored
+        return json.dumps(stored)
@@ -0,0 +1,102 @@
+"""Token-bucket rate limits for transfers to and from the Nexus service"""
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket. Tokens are added at a constant ``rate`` up to
+    ``capacity``; callers consuming more tokens than available are put to
+    sleep until the bucket would have refilled enough to cover them.
+
+    A single instance can be shared by many threads in order to apply a
+    global limit; e.g. bytes per second across all concurrent downloads.
+
+    :param rate: tokens added per second.
+    :type rate: float
+    :param capacity: maximum number of tokens in the bucket (i.e.: the burst
+        size). Defaults to one second's worth of tokens.
+    :type capacity: float
+    """
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f'rate must be positive; got {rate}')
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return (f'{self.__class__.__name__}(rate={self.rate}, '
+                f'capacity={self.capacity})')
+
+    def consume(self, amount=1):
+        """
+        Take ``amount`` tokens from the bucket, sleeping as long as necessary
+        to honour the rate.
+
+        Amounts larger than the capacity are allowed: the bucket goes into
+        debt and the caller (and the following callers) sleep until it has
+        been paid.
+
+        :param amount: number of tokens to take.
+        :type amount: float
+        :return: seconds slept.
+        :rtype: float
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class ThrottledReader:
+    """
+    Wraps a binary file object so that reading from it consumes one token
+    from ``bucket`` per byte read. All other attributes (e.g. ``seek``,
+    ``tell``, ``name``) are those of the wrapped file object.
+
+    :param fileobj: the file object to be wrapped.
+    :param bucket: where tokens are taken from.
+    :type bucket: TokenBucket
+    """
+    def __init__(self, fileobj, bucket):
+        self._fileobj = fileobj
+        self._bucket = bucket
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+    def __iter__(self):
+        return iter(lambda: self.read(64 * 1024), b'')
+
+    def read(self, size=-1):
+        data = self._fileobj.read(size)
+        if data:
+            self._bucket.consume(len(data))
+        return data
+
+
+def throttled(fileobj, bucket):
+    """
+    Wrap ``fileobj`` in a :class:`ThrottledReader` when a ``bucket`` is
+    given, unless ``fileobj`` was already throttled by it (see its
+    ``throttled_by`` attribute; e.g. a
+    :class:`~nexuscli.nexus_util.ChunkReader` of a download).
+
+    :param fileobj: a binary file object.
+    :param bucket: where tokens are taken from; None for no throttling.
+    :type bucket: Union[TokenBucket,None]
+    :return: ``fileobj`` or a :class:`ThrottledReader` wrapping it.
+    """
+    if bucket is None or getattr(fileobj, 'throttled_by', None) is bucket:
+        return fileobj
+    return ThrottledReader(fileobj, bucket)
@@ -0,0 +1,351 @@
+"""Uploads the files created or changed in a directory as they are written"""
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import stat
+import struct
+import sys
+import time
+
+from nexuscli import exception
+from nexuscli.api.repository import util
+from nexuscli.concurrency import run_concurrently
+
+LOG = logging.getLogger(__name__)
+
+# files are uploaded once they haven't changed for this many seconds
+SETTLE_TIME = 2.0
+POLL_INTERVAL = 1.0
+
+# from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONTFOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_ONLYDIR | IN_DONTFOLLOW)
+INOTIFY_EVENT = struct.Struct('iIII')
+INOTIFY_BUFFER_SIZE = 64 * 1024
+
+
+class Watcher:
+    """
+    Reports the files created or changed in a directory. Use
+    :func:`open_watcher` to get the best implementation available.
+
+    :param directory: the directory watched.
+    :type directory: str
+    :param recurse: whether sub directories are watched.
+    :type recurse: bool
+    """
+    def __init__(self, directory, recurse=True):
+        self.directory = directory
+        self.recurse = recurse
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.directory!r})'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _all_files(self):
+        return {relative_path for relative_path, _ in util.scan_files(
+            self.directory, self.recurse)}
+
+    def changes(self, timeout):
+        """
+        Wait up to ``timeout`` seconds for files to be created or changed.
+
+        :param timeout: seconds.
+        :type timeout: float
+        :return: the paths, relative to :attr:`directory`, of files changed
+            since the last call; possibly of files that didn't change.
+        :rtype: set
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Stop watching the directory"""
+
+
+class PollingWatcher(Watcher):
+    """
+    A :class:`Watcher` that compares the size and modification time of all
+    files every ``interval`` seconds.
+
+    :param interval: seconds between scans of the directory.
+    :type interval: float
+    :param kwargs: see :class:`Watcher`
+    """
+    def __init__(self, directory, recurse=True, interval=POLL_INTERVAL):
+        super().__init__(directory, recurse)
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._scanned_at = time.monotonic()
+
+    def _scan(self):
+        snapshot = {}
+        for relative_path, entry in util.scan_files(
+                self.directory, self.recurse):
+            try:
+                file_stat = entry.stat()
+            except OSError:
+                continue
+            snapshot[relative_path] = (file_stat.st_size,
+                                       file_stat.st_mtime_ns)
+        return snapshot
+
+    def changes(self, timeout):
+        wait = self._scanned_at + self.interval - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(wait, 0))
+
+        snapshot = self._scan()
+        self._scanned_at = time.monotonic()
+        changed = {relative_path
+                   for relative_path, signature in snapshot.items()
+                   if self._snapshot.get(relative_path) != signature}
+        self._snapshot = snapshot
+        return changed
+
+
+def _libc():
+    if not sys.platform.startswith('linux'):
+        raise OSError('inotify is only available on Linux')
+    libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    try:
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except AttributeError:
+        raise OSError('inotify is not available in the C library') from None
+    return libc
+
+
+def _checked(result):
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return result
+
+
+class InotifyWatcher(Watcher):
+    """
+    A :class:`Watcher` notified by the Linux kernel, through `inotify
+    <https://man7.org/linux/man-pages/man7/inotify.7.html>`_, of the files
+    written to.
+
+    :param kwargs: see :class:`Watcher`
+    :raises OSError: if inotify isn't available or the directory can't be
+        watched; e.g. when the user's limit of watches is reached.
+    """
+    def __init__(self, directory, recurse=True):
+        super().__init__(directory, recurse)
+        self._libc = _libc()
+        self._fd = _checked(self._libc.inotify_init1(IN_CLOEXEC))
+        # watch descriptor to the directory watched, relative to directory
+        self._watches = {}
+        try:
+            self._add_watches('')
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watches(self, relative_dir):
+        """Watch a directory and, with recurse, its sub directories;
+        returns the files already in them"""
+        files = set()
+        pending = [relative_dir]
+        while pending:
+            relative_dir = pending.pop()
+            path = os.path.join(self.directory, relative_dir)
+            try:
+                wd = _checked(self._libc.inotify_add_watch(
+                    self._fd, os.fsencode(path), WATCH_MASK))
+            except OSError:
+                if not relative_dir:
+                    raise
+                # removed since it was found
+                LOG.debug('Not watching %s', path, exc_info=True)
+                continue
+            self._watches[wd] = relative_dir
+
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        relative_path = os.path.join(relative_dir, entry.name)
+                        # like scan_files, links to directories are skipped
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recurse:
+                                pending.append(relative_path)
+                        elif not entry.is_dir():
+                            files.add(relative_path)
+            except OSError:
+                LOG.debug('Not scanning %s', path, exc_info=True)
+        return files
+
+    def _remove_watches(self, relative_dir):
+        """Stop watching a directory moved out of its location"""
+        prefix = os.path.join(relative_dir, '')
+        for wd, watched in list(self._watches.items()):
+            if watched == relative_dir or watched.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._watches[wd]
+
+    def changes(self, timeout):
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        data = os.read(self._fd, INOTIFY_BUFFER_SIZE)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                LOG.warning('Events lost for %s; checking all files',
+                            self.directory)
+                changed.update(self._all_files())
+                continue
+
+            relative_dir = self._watches.get(wd)
+            if relative_dir is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._watches[wd]
+                continue
+
+            relative_path = os.path.join(relative_dir, name)
+            if not mask & IN_ISDIR:
+                if not mask & IN_MOVED_FROM:
+                    changed.add(relative_path)
+            elif self.recurse and mask & (IN_CREATE | IN_MOVED_TO):
+                changed.update(self._add_watches(relative_path))
+            elif mask & IN_MOVED_FROM:
+                self._remove_watches(relative_path)
+        return changed
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+def open_watcher(directory, recurse=True):
+    """
+    Watch a directory with inotify when available, polling it otherwise.
+
+    :param directory: the directory watched.
+    :type directory: str
+    :param recurse: whether sub directories are watched.
+    :type recurse: bool
+    :rtype: Watcher
+    """
+    try:
+        return InotifyWatcher(directory, recurse)
+    except OSError as e:
+        LOG.warning('Polling %s for changes: %s', directory, e)
+        return PollingWatcher(directory, recurse)
+
+
+def watch(repository, src_dir, dst_dir, recurse=True, flatten=False,
+          settle=SETTLE_TIME, watcher=None):
+    """
+    Upload the files created or changed in a directory, once they haven't
+    changed for ``settle`` seconds. Files are uploaded to ``dst_dir`` as
+    :meth:`~nexuscli.api.repository.model.Repository.upload_directory` would
+    and concurrently, as allowed by the ``concurrency`` limiter of the
+    repository's ``nexus_client``.
+
+    Files already in the directory aren't uploaded. Files that can't be
+    uploaded are logged and uploaded again when they next change.
+
+    :param repository: the repository uploaded to.
+    :type repository: nexuscli.api.repository.model.Repository
+    :param src_dir: the directory watched.
+    :type src_dir: str
+    :param dst_dir: destination directory in the repository.
+    :type dst_dir: str
+    :param recurse: whether files in sub directories are uploaded.
+    :type recurse: bool
+    :param flatten: when True, the source directory tree isn't replicated
+        on the destination.
+    :type flatten: bool
+    :param settle: seconds without changes after which a file is uploaded.
+    :type settle: float
+    :param watcher: reports the changed files; by default, the one returned
+        by :func:`open_watcher`. It's closed when the generator is.
+    :type watcher: Watcher
+    :return: a generator yielding the path of each file uploaded; it never
+        stops, so it must be closed.
+    :rtype: typing.Iterator[str]
+    """
+    if watcher is None:
+        watcher = open_watcher(src_dir, recurse)
+    limiter = None
+    if repository.nexus_client is not None:
+        limiter = repository.nexus_client.concurrency
+    # relative path to the time of its last change
+    pending = {}
+    # relative path to the size and modification time uploaded
+    uploaded = {}
+
+    def _upload(relative_path):
+        file_path = os.path.join(src_dir, relative_path)
+        try:
+            file_stat = os.stat(file_path)
+        except OSError:
+            return None
+        signature = (file_stat.st_size, file_stat.st_mtime_ns)
+        if not stat.S_ISREG(file_stat.st_mode) or \
+                uploaded.get(relative_path) == signature:
+            return None
+
+        sub_directory = util.get_upload_subdirectory(
+                        dst_dir, file_path, flatten)
+        try:
+            repository.upload_file(file_path, sub_directory)
+        except (exception.NexusClientBaseError, OSError) as e:
+            LOG.error('Uploading %s: %s', file_path, e)
+            return None
+        uploaded[relative_path] = signature
+        return file_path
+
+    with watcher:
+        while True:
+            timeout = settle
+            if pending:
+                timeout = max(
+                    min(pending.values()) + settle - time.monotonic(), 0)
+            for relative_path in watcher.changes(timeout):
+                pending[relative_path] = time.monotonic()
+
+            now = time.monotonic()
+            ready = [relative_path
+                     for relative_path, changed_at in pending.items()
+                     if now - changed_at >= settle]
+            for relative_path in ready:
+                del pending[relative_path]
+
+            for file_path in run_concurrently(_upload, ready, limiter):
+                if file_path is not None:
+                    yield file_path
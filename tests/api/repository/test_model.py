@@ -1,3 +1,4 @@
+import hashlib
 import itertools
 import pytest
 from semver import VersionInfo
@@ -87,26 +88,91 @@ def test_upload_directory(repo_class, recurse, flatten, mocker, faker):
     x_file_path = faker.pystr()
 
     util = mocker.patch('nexuscli.api.repository.model.util')
-    util.get_files.return_value = faker.pylist(10, True, str)
+    x_files = faker.pylist(10, True, str)
+    util.scan_files.return_value = [(f, None) for f in x_files]
     util.get_upload_subdirectory.return_value = x_subdirectory
     mocker.patch('os.path.join', return_value=x_file_path)
 
     x_get_upload_subdirectory_calls = [
         mocker.call(dst_dir, x_file_path, flatten)
-        for _ in util.get_files.return_value  # just need the count of calls
+        for _ in x_files  # just need the count of calls
     ]
 
     repo = repo_class(faker.word())
     repo.upload_file = mocker.Mock()
 
-    repo.upload_directory(src_dir, dst_dir, recurse=recurse, flatten=flatten)
+    count = repo.upload_directory(
+        src_dir, dst_dir, recurse=recurse, flatten=flatten)
 
-    util.get_files.assert_called_with(src_dir, recurse)
+    assert count == len(x_files)
+    util.scan_files.assert_called_with(src_dir, recurse)
     util.get_upload_subdirectory.assert_has_calls(
         x_get_upload_subdirectory_calls)
     repo.upload_file.assert_called_with(x_file_path, x_subdirectory)
 
 
+def test_upload_directory_skip_existing(tmp_path, mocker):
+    """
+    Ensure only files missing or different in the repository are uploaded
+    and the files already present are counted.
+    """
+    for name in ('same', 'changed', 'resized', 'missing'):
+        (tmp_path / name).write_bytes(name.encode())
+    calculate_hash = model.nexus_util.calculate_hash
+
+    def _artefact(name, content):
+        return {'path': f'/dst/{name}', 'fileSize': len(content),
+                'checksum': {'sha1': hashlib.sha1(content).hexdigest()}}
+
+    nexus_client = mocker.Mock(hash_cache=None)
+    nexus_client.concurrency = model.AdaptiveLimiter.fixed(2)
+    nexus_client.list_raw.return_value = [
+        _artefact('same', b'same'),
+        _artefact('changed', b'other!!'),
+        _artefact('resized', b'other'),
+    ]
+    mocker.patch.object(
+        model.nexus_util, 'calculate_hash', wraps=calculate_hash)
+    repo = model.RawHostedRepository('repo', nexus_client=nexus_client)
+    repo.upload_file = mocker.Mock()
+
+    count = repo.upload_directory(
+        str(tmp_path), 'dst', flatten=True, skip_existing=True)
+
+    assert count == 4
+    nexus_client.list_raw.assert_called_once_with('repo/dst/')
+    assert sorted(call[0][0] for call in repo.upload_file.call_args_list) == [
+        str(tmp_path / name) for name in ('changed', 'missing', 'resized')]
+    # only files with the same size as their artefact are hashed
+    assert model.nexus_util.calculate_hash.call_count == 2
+    nexus_client.metrics.increment.assert_called_once_with('upload_skipped')
+
+
+@pytest.mark.parametrize('flatten', [True, False])
+def test_upload_archive(flatten, mocker):
+    """
+    Ensure the method calls upload_stream for each file read from the archive
+    and closes it.
+    """
+    members = [('a', 1, mocker.MagicMock()), ('dir/b', 2, mocker.MagicMock())]
+    read_archive = mocker.patch(
+        'nexuscli.api.repository.model.archive.read_archive',
+        return_value=iter(members))
+
+    repo = model.RawHostedRepository('repo')
+    repo.upload_stream = mocker.Mock()
+
+    assert repo.upload_archive('build.tar', 'dst', False, flatten) == 2
+
+    read_archive.assert_called_with('build.tar', False)
+    repo.upload_stream.assert_has_calls([
+        mocker.call(members[0][2], 'dst', 'a', 1),
+        mocker.call(members[1][2], 'dst' if flatten else 'dst/dir', 'b', 2),
+    ], any_order=True)
+    for _, _, fileobj in members:
+        fileobj.__exit__.assert_called()
+
+
 @pytest.mark.parametrize(
     'repo_class',
     pytest.helpers.repositories_by_type(['hosted', 'proxy', 'group']))
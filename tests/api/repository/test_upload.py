@@ -1,6 +1,9 @@
+import email.parser
+import io
 import pytest
+import requests
 
-from nexuscli import exception
+from nexuscli import exception, nexus_util, retry
 from nexuscli.api.repository import upload
 
 SEP = upload.REMOTE_PATH_SEPARATOR  # for shorter lines in the tests
@@ -32,3 +35,91 @@ def test_upload_file_yum_error(mocker, tmpdir, faker):
             repository, src_file, faker.file_path(), faker.file_path())
 
     repository.nexus_client.http_put.assert_called_once()
+
+
+def _parse_multipart(body):
+    message = email.parser.BytesParser().parsebytes(
+        f'Content-Type: {body.content_type}\r\n\r\n'.encode() + body.read())
+    return {part.get_param('name', header='content-disposition'):
+            part.get_payload(decode=True) for part in message.get_payload()}
+
+
+@pytest.mark.parametrize('size', [None, 7])
+def test_multipart_reader(size):
+    body = upload.MultipartReader(
+        {'raw.directory': 'dir'}, 'raw.asset1', 'file',
+        io.BytesIO(b'content'), size)
+
+    if size is None:
+        assert not hasattr(body, 'len')
+    else:
+        assert body.len == len(b''.join(
+            upload.MultipartReader({'raw.directory': 'dir'}, 'raw.asset1',
+                                   'file', io.BytesIO(b'content'))))
+    assert _parse_multipart(body) == {
+        'raw.directory': b'dir', 'raw.asset1': b'content'}
+
+
+def test_multipart_reader_rewind():
+    """A body read from a seekable file can be sent again"""
+    fileobj = io.BytesIO(b'skipped content')
+    fileobj.seek(8)
+    body = upload.MultipartReader({}, 'file', 'file', fileobj)
+    rewind = retry.body_rewinder({'data': body})
+
+    first = body.read(5) + body.read()
+    rewind()
+
+    assert body.read() == first
+    assert body.tell() == len(first)
+    assert _parse_multipart(body.__class__(
+        {}, 'file', 'file', io.BytesIO(b'content')))['file'] == b'content'
+
+
+def test_multipart_reader_not_rewindable():
+    chunks = nexus_util.ChunkReader([b'content'])
+    body = upload.MultipartReader({}, 'file', 'file', chunks)
+
+    assert retry.body_rewinder({'data': body}) is None
+
+
+def test_sized_reader_rewind():
+    """A sized yum upload read from a seekable file can be sent again"""
+    fileobj = io.BytesIO(b'skipped content')
+    fileobj.seek(8)
+    body = upload.SizedReader(fileobj, 7)
+    rewind = retry.body_rewinder({'data': body})
+
+    first = body.read(3) + body.read()
+    rewind()
+
+    assert first == b'content'
+    assert body.read() == first
+    assert requests.utils.super_len(
+        upload.SizedReader(io.BytesIO(b'content'), 7)) == 7
+
+
+def test_sized_reader_not_rewindable():
+    body = upload.SizedReader(nexus_util.ChunkReader([b'content']), 7)
+
+    assert retry.body_rewinder({'data': body}) is None
+    assert requests.utils.super_len(body) == 7
+
+
+@pytest.mark.parametrize('recipe, x_method', [
+    ('raw', 'http_post'), ('yum', 'http_put')])
+def test_upload_stream(recipe, x_method, mocker):
+    """Ensure the content is streamed with its size as Content-Length"""
+    repository = mocker.Mock()
+    repository.name = 'repo'
+    repository.nexus_client.bandwidth_limiter = None
+    getattr(repository.nexus_client, x_method).return_value = mocker.Mock(
+        status_code=204 if recipe == 'raw' else 200)
+    fileobj = nexus_util.ChunkReader([b'con', b'tent'])
+
+    getattr(upload, f'upload_stream_{recipe}')(
+        repository, fileobj, 'dir', 'file', size=7)
+
+    data = getattr(repository.nexus_client, x_method).call_args[1]['data']
+    assert data.len >= 7
+    assert b'content' in data.read()
@@ -0,0 +1,49 @@
+import os
+import pytest
+
+from nexuscli.api.repository import util
+
+
+def test_get_files(deep_file_tree):
+    """Ensure all files in the tree are found, relative to the directory"""
+    src_dir, x_file_set = deep_file_tree
+
+    assert util.get_files(src_dir) == x_file_set
+
+
+def test_get_files_norecurse(deep_file_tree):
+    """Ensure only files on the root of the directory are found"""
+    src_dir, x_file_set = deep_file_tree
+
+    assert util.get_files(src_dir, recurse=False) == {
+        path for path in x_file_set if os.sep not in path}
+
+
+def test_scan_files(tmp_path):
+    """
+    Ensure files are yielded with their directory entry, symbolic links to
+    directories aren't followed and broken links are yielded as files.
+    """
+    (tmp_path / 'dir' / 'sub').mkdir(parents=True)
+    (tmp_path / 'dir' / 'sub' / 'file').write_bytes(b'content')
+    (tmp_path / 'link').symlink_to(tmp_path / 'dir')
+    (tmp_path / 'broken').symlink_to(tmp_path / 'missing')
+
+    files = dict(util.scan_files(str(tmp_path)))
+
+    assert sorted(files) == ['broken', os.path.join('dir', 'sub', 'file')]
+    assert files[os.path.join('dir', 'sub', 'file')].stat().st_size == 7
+
+
+@pytest.mark.skipif(os.getuid() == 0, reason='root can read any directory')
+def test_scan_files_unreadable(tmp_path):
+    """Ensure directories that can't be read are skipped"""
+    (tmp_path / 'dir').mkdir()
+    (tmp_path / 'dir' / 'file').touch()
+    (tmp_path / 'file').touch()
+    (tmp_path / 'dir').chmod(0)
+
+    try:
+        assert util.get_files(str(tmp_path)) == {'file'}
+    finally:
+        (tmp_path / 'dir').chmod(0o755)
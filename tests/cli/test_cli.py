@@ -14,6 +14,53 @@ def test_login(mocker):
     mock_cmd_login.assert_called_once()
 
 
+def test_sync_dry_run(mocker, capsys):
+    """Ensure the plan is printed and not executed"""
+    sync_plan = mocker.Mock(describe=lambda: iter(['download file']))
+    mocker.patch('nexuscli.cli.util.get_client')
+    mock_plan = mocker.patch(
+        'nexuscli.sync.plan', return_value=sync_plan)
+    mock_execute = mocker.patch('nexuscli.sync.execute')
+
+    exit_code = cli.main(argv=['sync', 'repo/dir', 'dir', '--dry-run',
+                               '--delete'])
+
+    assert exit_code == cli.errors.CliReturnCode.SUCCESS.value
+    assert mock_plan.call_args[1] == {'delete': True}
+    mock_execute.assert_not_called()
+    assert capsys.readouterr().out == 'download file\n'
+
+
+@pytest.mark.parametrize('argv, x_argv, x_stats, x_profile', [
+    (['--stats', 'list', 'repo'], ['list', 'repo'], True, None),
+    (['list', 'repo', '--profile', 'out'], ['list', 'repo'], None, 'out'),
+    (['--profile=out', 'script', 'list'], ['script', 'list'], None, 'out'),
+    (['up', 'f', 'r/', '--', '--stats'], ['up', 'f', 'r/', '--', '--stats'],
+     None, None),
+])
+def test_pop_global_options(argv, x_argv, x_stats, x_profile):
+    remaining, options = cli._pop_global_options(argv)
+
+    assert remaining == x_argv
+    assert options['--stats'] == x_stats
+    assert options['--profile'] == x_profile
+
+
+def test_stats_profile(mocker, tmp_path, capsys):
+    """Ensure --stats prints the phases and --profile writes a dump"""
+    mocker.patch('nexuscli.cli.util.get_client')
+    mocker.patch('nexuscli.cli.root_commands.cmd_list', return_value=0)
+    profile_path = tmp_path / 'nexus3.prof'
+
+    exit_code = cli.main(argv=[
+        'list', 'repo', '--stats', f'--profile={profile_path}'])
+
+    assert exit_code == cli.errors.CliReturnCode.SUCCESS.value
+    assert 'hashing' in capsys.readouterr().err
+    assert profile_path.stat().st_size > 0
+    assert cli.stats.active() is None
+
+
 @pytest.mark.integration
 def test_list(nexus_client, faker):
     repo_name = faker.pystr()
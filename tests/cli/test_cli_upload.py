@@ -2,7 +2,7 @@ import itertools
 import os
 import pytest
 
-from nexuscli import cli
+from nexuscli import cli, exception
 
 
 @pytest.mark.integration
@@ -71,3 +71,59 @@ def test_upload(upload, flatten, norecurse, nexus_mock_client, faker, mocker):
     cli.main(argv=argv)
 
     mock_cmd_upload.assert_called_once()
+
+
+def test_upload_stdin(mocker):
+    """Ensure - uploads standard input to the destination file"""
+    nexus_client = mocker.Mock()
+    nexus_client.upload_stream.return_value = 1
+    mocker.patch('nexuscli.cli.util.get_client', return_value=nexus_client)
+    stdin = mocker.patch('sys.stdin')
+
+    exit_code = cli.main(argv=['upload', '-', 'repo/dir/file'])
+
+    assert exit_code == cli.errors.CliReturnCode.SUCCESS.value
+    nexus_client.upload_stream.assert_called_once_with(
+        stdin.buffer, 'repo/dir/file')
+    nexus_client.upload.assert_not_called()
+
+
+@pytest.mark.parametrize('destination, x_dir, x_file', [
+    ('repo/file', None, 'file'), ('repo/dir/sub/file', 'dir/sub', 'file')])
+def test_upload_stream(destination, x_dir, x_file, nexus_mock_client, mocker):
+    """Ensure the stream is uploaded to the destination repository"""
+    repository = mocker.Mock()
+    mocker.patch.object(
+        nexus_mock_client.repositories, 'get_by_name',
+        return_value=repository)
+    fileobj = mocker.Mock()
+
+    assert nexus_mock_client.upload_stream(fileobj, destination) == 1
+
+    nexus_mock_client.repositories.get_by_name.assert_called_with('repo')
+    repository.upload_stream.assert_called_with(fileobj, x_dir, x_file, None)
+
+
+def test_upload_stream_directory(nexus_mock_client, mocker):
+    """Ensure a file name is required"""
+    with pytest.raises(exception.NexusClientInvalidRepositoryPath):
+        nexus_mock_client.upload_stream(mocker.Mock(), 'repo/dir/')
+
+
+def test_upload_watch(tmp_path, mocker, capsys):
+    """Ensure uploads are reported until interrupted"""
+    def _uploads():
+        yield 'file'
+        raise KeyboardInterrupt
+
+    nexus_client = mocker.Mock()
+    nexus_client.split_component_path.return_value = ('repo', 'dir', None)
+    mocker.patch('nexuscli.cli.util.get_client', return_value=nexus_client)
+    mock_watch = mocker.patch('nexuscli.watch.watch', return_value=_uploads())
+
+    exit_code = cli.main(argv=[
+        'upload', str(tmp_path), 'repo/dir/', '--watch', '--settle=0.5'])
+
+    assert exit_code == cli.errors.CliReturnCode.SUCCESS.value
+    assert mock_watch.call_args[1]['settle'] == 0.5
+    assert 'Uploaded 1 file to repo/dir/' in capsys.readouterr().err
@@ -30,3 +30,20 @@ def test_delete(faker, nexus_mock_client, mocker):
     assert delete_count == x_count
     nexus.list_raw.assert_called_with(x_repository)
     nexus.http_delete.assert_called()
+
+
+def test_delete_error(faker, nexus_mock_client, mocker):
+    """
+    Ensure the method stops deleting and returns -1 on an unexpected response
+    from the service.
+    """
+    nexus = nexus_mock_client
+    x_artefacts = [faker.file_path()[1:] for _ in range(500)]
+    nexus.list_raw = mocker.Mock(
+        return_value=list(pytest.helpers.nexus_raw_response(x_artefacts)))
+
+    ResponseMock = pytest.helpers.get_ResponseMock()
+    nexus.http_delete = mocker.Mock(return_value=ResponseMock(500, 'Oops'))
+
+    assert nexus.delete(faker.uri_path()) == -1
+    assert nexus.http_delete.call_count < len(x_artefacts)
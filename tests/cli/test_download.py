@@ -1,9 +1,17 @@
+import hashlib
+import io
 import itertools
 import os
+import pathlib
 import pytest
+import requests
 
 from faker import Faker
 
+from nexuscli import exception, nexus_client, nexus_util, retry
+from nexuscli.hash_cache import HashCache
+from nexuscli.store import ArtefactStore
+
 
 @pytest.mark.parametrize('flatten, remote, destination, x_local_path', [
     # no rename (file to dir)
@@ -145,3 +153,438 @@ def test_download_tree(
 
     assert count_uploaded == count_downloaded
     assert file_set_uploaded == x_file_set
+
+
+class FakeDownloadResponse:
+    """A streamed response that optionally fails after sending its chunks"""
+    def __init__(self, status_code, chunks=(), headers=None, error=None):
+        self.status_code = status_code
+        self.reason = str(status_code)
+        self.headers = headers or {}
+        self._chunks = chunks
+        self._error = error
+
+    def iter_content(self, chunk_size):
+        for chunk in self._chunks:
+            yield chunk
+        if self._error:
+            raise self._error
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def download_client(nexus_mock_client, mocker):
+    """nexus_mock_client with download_file's requests stubbed"""
+    mocker.patch('nexuscli.nexus_client.time.sleep')
+
+    def _stub(*responses):
+        nexus_mock_client.http_request = mocker.Mock(side_effect=responses)
+        return nexus_mock_client
+
+    return _stub
+
+
+def _artefact(content):
+    return {'checksum': {'sha1': hashlib.sha1(content).hexdigest()}}
+
+
+def test_download_file_resume(download_client, tmp_path):
+    """
+    Ensure an interrupted download is resumed with a range request and the
+    complete file renamed into place.
+    """
+    error = requests.exceptions.ChunkedEncodingError('interrupted')
+    nexus = download_client(
+        FakeDownloadResponse(200, [b'abc'], error=error),
+        FakeDownloadResponse(
+            206, [b'def'], headers={'Content-Range': 'bytes 3-5/6'}))
+    destination = tmp_path.joinpath('file')
+
+    nexus.download_file('url', destination, _artefact(b'abcdef'))
+
+    assert destination.read_bytes() == b'abcdef'
+    assert not os.path.exists(nexus_client.partial_path(destination))
+    assert nexus.http_request.call_args_list[1][1]['headers'] == {
+        'Range': 'bytes=3-'}
+    assert nexus.metrics.get(
+        'retries', method='get', reason='interrupted') == 1
+
+
+def test_download_file_resume_previous(download_client, tmp_path):
+    """Ensure a partial file left by a previous run is resumed"""
+    nexus = download_client(FakeDownloadResponse(
+        206, [b'def'], headers={'Content-Range': 'bytes 3-5/6'}))
+    destination = tmp_path.joinpath('file')
+    pathlib.Path(nexus_client.partial_path(destination)).write_bytes(b'abc')
+
+    nexus.download_file('url', destination)
+
+    assert destination.read_bytes() == b'abcdef'
+
+
+def test_download_file_resume_ignored(download_client, tmp_path):
+    """Ensure the download restarts when the service ignores the range"""
+    nexus = download_client(FakeDownloadResponse(200, [b'abcdef']))
+    destination = tmp_path.joinpath('file')
+    pathlib.Path(nexus_client.partial_path(destination)).write_bytes(b'xyz')
+
+    nexus.download_file('url', destination)
+
+    assert destination.read_bytes() == b'abcdef'
+
+
+@pytest.mark.parametrize('content_range, x_responses', [
+    ('bytes */3', 1), ('bytes */6', 2)])
+def test_download_file_resume_complete(
+        content_range, x_responses, download_client, tmp_path):
+    """
+    Ensure a partial file that's already complete is used and one that's
+    longer than the asset is discarded.
+    """
+    nexus = download_client(
+        FakeDownloadResponse(416, headers={'Content-Range': content_range}),
+        FakeDownloadResponse(200, [b'abcdef']))
+    destination = tmp_path.joinpath('file')
+    pathlib.Path(nexus_client.partial_path(destination)).write_bytes(b'abc')
+
+    nexus.download_file('url', destination)
+
+    assert nexus.http_request.call_count == x_responses
+    assert destination.read_bytes() == [b'abc', b'abcdef'][x_responses - 1]
+
+
+def test_download_file_checksum_mismatch(download_client, tmp_path):
+    nexus = download_client(FakeDownloadResponse(200, [b'abcdef']))
+    destination = tmp_path.joinpath('file')
+
+    with pytest.raises(exception.DownloadError):
+        nexus.download_file('url', destination, _artefact(b'other'))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_download_file_checksum_mismatch_resumed(download_client, tmp_path):
+    """A stale partial file is discarded and the download restarted"""
+    nexus = download_client(
+        FakeDownloadResponse(
+            206, [b'def'], headers={'Content-Range': 'bytes 3-5/6'}),
+        FakeDownloadResponse(200, [b'ABCdef']))
+    destination = tmp_path.joinpath('file')
+    pathlib.Path(nexus_client.partial_path(destination)).write_bytes(b'abc')
+
+    nexus.download_file('url', destination, _artefact(b'ABCdef'))
+
+    assert destination.read_bytes() == b'ABCdef'
+
+
+def test_download_file_retries_exhausted(download_client, tmp_path):
+    """Ensure the partial file is kept for a later run"""
+    error = requests.exceptions.ConnectionError('reset')
+    nexus = download_client(*[
+        FakeDownloadResponse(200, [b'abc'], error=error) for _ in range(4)])
+    destination = tmp_path.joinpath('file')
+
+    with pytest.raises(exception.DownloadError):
+        nexus.download_file('url', destination)
+
+    assert not destination.exists()
+    assert os.path.exists(nexus_client.partial_path(destination))
+
+
+def test_download_file_retries_not_nested(mocker, tmp_path):
+    """Ensure retry_policy.total bounds the requests made for a part file"""
+    mocker.patch('nexuscli.nexus_client.time.sleep')
+    mocker.patch('nexuscli.nexus_client.RepositoryCollection')
+    request = mocker.patch('requests.request', side_effect=[
+        requests.exceptions.ConnectionError('reset') for _ in range(16)])
+    nexus = nexus_client.NexusClient()
+
+    with pytest.raises(exception.DownloadError):
+        nexus.download_file('url', tmp_path.joinpath('file'))
+
+    assert request.call_count == nexus.retry_policy.total + 1
+
+
+def test_download_file_retry_status(download_client, tmp_path):
+    nexus = download_client(
+        FakeDownloadResponse(503, headers={'Retry-After': '0'}),
+        FakeDownloadResponse(200, [b'abcdef']))
+    destination = tmp_path.joinpath('file')
+
+    nexus.download_file('url', destination)
+
+    assert destination.read_bytes() == b'abcdef'
+    assert nexus.http_request.call_args[1]['retry_policy'] is retry.NO_RETRY
+    assert nexus.metrics.get('retries', method='get', reason='503') == 1
+
+
+def test_download_file_error(download_client, tmp_path):
+    nexus = download_client(FakeDownloadResponse(404))
+
+    with pytest.raises(exception.DownloadError):
+        nexus.download_file('url', tmp_path.joinpath('file'))
+
+
+def test_download_file_hash_cache(download_client, tmp_path, mocker):
+    """
+    Ensure hashes are calculated while downloading and stored in the cache,
+    so the file isn't read again when checking whether it's up-to-date.
+    """
+    content = b'abcdef'
+    artefact = _artefact(content)
+    artefact['checksum']['sha256'] = hashlib.sha256(content).hexdigest()
+    nexus = download_client(FakeDownloadResponse(200, [content]))
+    nexus.hash_cache = HashCache(tmp_path.joinpath('hashes'))
+    destination = tmp_path.joinpath('file')
+    calculate_hash = mocker.spy(nexus_util, 'calculate_hash')
+
+    nexus.download_file('url', destination, artefact)
+
+    assert nexus.hash_cache.get(destination, 'sha256') == \
+        artefact['checksum']['sha256']
+    assert nexus._should_skip_download('url', destination, artefact, False)
+    calculate_hash.assert_not_called()
+
+
+def test_download_file_store(download_client, tmp_path):
+    """
+    Ensure downloaded files are added to the store and later materialised
+    from there without a request.
+    """
+    content = b'abcdef'
+    artefact = _artefact(content)
+    nexus = download_client(FakeDownloadResponse(200, [content]))
+    nexus.store = ArtefactStore(tmp_path.joinpath('store'))
+    nexus.download_file('url', tmp_path.joinpath('file'), artefact)
+
+    destination = tmp_path.joinpath('workspace', 'file')
+    destination.parent.mkdir()
+    nexus.download_file('url', destination, artefact)
+
+    assert destination.read_bytes() == content
+    assert nexus.http_request.call_count == 1
+    assert nexus.metrics.get('store', result='miss') == 1
+    assert nexus.metrics.get('store', result='hit') == 1
+
+
+def test_stream_file(download_client):
+    nexus = download_client(
+        FakeDownloadResponse(200, [b'abc', b'def'],
+                             headers={'Content-Length': '6'}),
+        FakeDownloadResponse(
+            200, [b'abc'], headers={'Content-Encoding': 'gzip'},
+            error=requests.exceptions.ChunkedEncodingError('interrupted')),
+        FakeDownloadResponse(404))
+
+    size, chunks = nexus.stream_file('url')
+    assert (size, b''.join(chunks)) == (6, b'abcdef')
+
+    size, chunks = nexus.stream_file('url')
+    assert size is None
+    with pytest.raises(exception.DownloadError, match='interrupted'):
+        list(chunks)
+
+    with pytest.raises(exception.DownloadError):
+        nexus.stream_file('url')
+
+
+def test_group_by_checksum():
+    artefacts = [
+        {'path': 'a', 'checksum': {'sha1': '1', 'sha256': '2'}},
+        {'path': 'b', 'checksum': {'sha1': '3'}},
+        {'path': 'c', 'checksum': {'sha1': '1', 'sha256': '2'}},
+        {'path': 'd', 'checksum': {}},
+        {'path': 'e'},
+        {'path': 'f', 'checksum': {'sha1': '3'}},
+    ]
+
+    groups = nexus_client.group_by_checksum(artefacts)
+
+    assert [[a['path'] for a in group] for group in groups] == [
+        ['a', 'c'], ['b', 'f'], ['d'], ['e']]
+
+
+def test_download_deduplicated(download_client, tmp_path, mocker):
+    """
+    Ensure artefacts with the same content are downloaded once and copied to
+    the other destinations.
+    """
+    content = b'abcdef'
+    artefacts = [
+        dict(_artefact(content), path=path, downloadUrl=f'url/{path}')
+        for path in ['dir/a', 'b', 'other']]
+    artefacts[2]['checksum'] = {'sha1': hashlib.sha1(b'other').hexdigest()}
+    nexus = download_client()
+    # the two groups are downloaded concurrently, in any order
+    nexus.http_request.side_effect = lambda method, url, **_: \
+        FakeDownloadResponse(
+            200, [b'other' if url == 'url/other' else content])
+    mocker.patch.object(nexus, 'list_raw', return_value=artefacts)
+
+    count = nexus.download('repo/', str(tmp_path) + os.sep)
+
+    assert count == 3
+    assert nexus.http_request.call_count == 2
+    assert nexus.metrics.total('deduplicated') == 1
+    assert tmp_path.joinpath('dir', 'a').read_bytes() == content
+    assert tmp_path.joinpath('b').read_bytes() == content
+    assert tmp_path.joinpath('other').read_bytes() == b'other'
+
+
+def test_download_deduplicated_first_fails(download_client, tmp_path, mocker):
+    """
+    Ensure the duplicates of an artefact that can't be downloaded are still
+    downloaded, and copied from the first one that is.
+    """
+    content = b'abcdef'
+    artefacts = [
+        dict(_artefact(content), path=path, downloadUrl=f'url/{path}')
+        for path in ['a', 'b', 'c']]
+    nexus = download_client()
+    nexus.http_request.side_effect = lambda method, url, **_: \
+        FakeDownloadResponse(404 if url == 'url/a' else 200, [content])
+    mocker.patch.object(nexus, 'list_raw', return_value=artefacts)
+
+    count = nexus.download('repo/', str(tmp_path) + os.sep)
+
+    assert count == 2
+    assert nexus.http_request.call_count == 2
+    assert nexus.metrics.total('deduplicated') == 1
+    assert not tmp_path.joinpath('a').exists()
+    assert tmp_path.joinpath('b').read_bytes() == content
+    assert tmp_path.joinpath('c').read_bytes() == content
+
+
+@pytest.fixture
+def segmented_client(nexus_mock_client, mocker, monkeypatch):
+    """
+    nexus_mock_client serving the returned content, with range support and
+    a segment threshold suitable for tests.
+    """
+    content = os.urandom(10000)
+    mocker.patch('nexuscli.nexus_client.time.sleep')
+    monkeypatch.setattr(nexus_client, 'MIN_SEGMENT_SIZE', 1000)
+    nexus_mock_client.segment_threshold = 2000
+    nexus_mock_client.segment_count = 4
+    failures = []
+
+    def fake_request(method, url, stream, headers, retry_policy):
+        range_ = headers.get('Range')
+        if range_ is None:
+            return FakeDownloadResponse(200, [content], headers={
+                'Accept-Ranges': 'bytes',
+                'Content-Length': str(len(content))})
+        start, end = (int(i) for i in range_[6:].split('-'))
+        body = content[start:end + 1]
+        error = None
+        if failures and failures.pop():
+            body = body[:10]
+            error = requests.exceptions.ConnectionError('reset')
+        return FakeDownloadResponse(
+            206, [body[i:i + 100] for i in range(0, len(body), 100)],
+            headers={'Content-Range': f'bytes {start}-{end}/{len(content)}'},
+            error=error)
+
+    nexus_mock_client.http_request = mocker.Mock(side_effect=fake_request)
+    return nexus_mock_client, content, failures
+
+
+def test_download_file_segmented(segmented_client, tmp_path):
+    """Ensure large assets are downloaded as parallel byte ranges"""
+    nexus, content, failures = segmented_client
+    failures.extend([True, False, True])
+    destination = tmp_path.joinpath('file')
+
+    nexus.download_file('url', destination, _artefact(content))
+
+    assert destination.read_bytes() == content
+    ranges = set(
+        call[1]['headers'].get('Range', '')
+        for call in nexus.http_request.call_args_list)
+    assert {'', 'bytes=2500-4999', 'bytes=5000-7499',
+            'bytes=7500-9999'} < ranges
+    assert nexus.metrics.get(
+        'retries', method='get', reason='interrupted') == 2
+
+
+@pytest.mark.parametrize('threshold, headers', [
+    (None, {}),
+    (20000, {}),
+    (2000, {'Accept-Ranges': 'none'}),
+    (2000, {'Content-Encoding': 'gzip'}),
+])
+def test_download_file_not_segmented(
+        threshold, headers, segmented_client, tmp_path):
+    nexus, content, _ = segmented_client
+    nexus.segment_threshold = threshold
+    response = FakeDownloadResponse(200, [content], headers={
+        'Accept-Ranges': 'bytes', 'Content-Length': str(len(content))})
+    response.headers.update(headers)
+    nexus.http_request.side_effect = [response]
+    destination = tmp_path.joinpath('file')
+
+    nexus.download_file('url', destination)
+
+    assert destination.read_bytes() == content
+
+
+def test_download_file_segmented_error(segmented_client, tmp_path):
+    """The pre-allocated partial file can't be resumed so it's removed"""
+    nexus, content, failures = segmented_client
+    failures.extend([True] * 100)
+    destination = tmp_path.joinpath('file')
+
+    with pytest.raises(exception.DownloadError):
+        nexus.download_file('url', destination)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize('chunk_size, received, elapsed, x_chunk_size', [
+    (65536, 100, 1.0, 65536),             # short read at the end
+    (65536, 65536, 0.0, 131072),          # too fast to measure
+    (65536, 65536, 0.001, 131072),        # fast
+    (65536, 65536, 10.0, 65536),          # slow but at the minimum
+    (1048576, 1048576, 10.0, 524288),     # slow
+    (1048576, 1048576, 0.05, 1048576),    # on target
+    (8388608, 8388608, 0.001, 8388608),   # fast but at the maximum
+])
+def test_adapt_chunk_size(chunk_size, received, elapsed, x_chunk_size):
+    assert nexus_client.adapt_chunk_size(
+        chunk_size, received, elapsed) == x_chunk_size
+
+
+@pytest.mark.parametrize('chunk_size, headers', [
+    (None, {}),
+    (1000, {}),
+    (None, {'Content-Encoding': 'gzip'}),
+    (1000, {'Content-Encoding': 'gzip'}),
+])
+def test_download_file_chunks(
+        chunk_size, headers, download_client, tmp_path, mocker):
+    """
+    Ensure the content is read directly into a buffer, unless it's encoded,
+    in chunks of the given or of an adaptive size.
+    """
+    content = os.urandom(300000)
+    response = FakeDownloadResponse(200, [content], headers=headers)
+    response.raw = io.BytesIO(content)
+    iter_content = mocker.spy(response, 'iter_content')
+    readinto = mocker.spy(response.raw, 'readinto')
+    nexus = download_client(response)
+    nexus.download_chunk_size = chunk_size
+    destination = tmp_path.joinpath('file')
+
+    nexus.download_file('url', destination)
+
+    assert destination.read_bytes() == content
+    if headers:
+        readinto.assert_not_called()
+        iter_content.assert_called_once_with(
+            chunk_size=chunk_size or nexus_client.MAX_CHUNK_SIZE)
+    else:
+        iter_content.assert_not_called()
+        if chunk_size:
+            assert readinto.call_count == 301
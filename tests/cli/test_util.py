@@ -1,3 +1,6 @@
+import pytest
+
+from nexuscli import exception, hooks
 from nexuscli.cli import util
 
 
@@ -13,3 +16,80 @@ def test_get_client(mocker):
     nexus_config_mock.return_value.load.assert_called_once()
     nexus_client_mock.assert_called_once()
     assert nexus_client == nexus_client_mock.return_value
+
+
+def test_get_client_required(tmp_path):
+    with pytest.raises(exception.NexusClientConfigNotFound):
+        util.get_client(tmp_path.joinpath('missing'), required=True)
+
+
+@pytest.mark.parametrize('value, x_bytes', [
+    ('0', 0),
+    ('512', 512),
+    ('64k', 64 * 1024),
+    ('64KB', 64 * 1024),
+    ('1.5M', 1536 * 1024),
+    ('10MiB', 10 * 1024 ** 2),
+    (' 2g ', 2 * 1024 ** 3),
+])
+def test_parse_size(value, x_bytes):
+    assert util.parse_size(value) == x_bytes
+
+
+@pytest.mark.parametrize('value', ['', 'M', '10X', '-1', 'ten'])
+def test_parse_size_invalid(value):
+    with pytest.raises(ValueError):
+        util.parse_size(value)
+
+
+@pytest.mark.parametrize('max_rate, max_rps, x_rate, x_rps', [
+    (None, None, None, None),
+    ('1M', None, 1024 ** 2, None),
+    (None, '2.5', None, 2.5),
+    ('100', '10', 100, 10),
+])
+def test_set_rate_limits(max_rate, max_rps, x_rate, x_rps, mocker):
+    nexus_client = mocker.Mock()
+
+    util.set_rate_limits(
+        nexus_client, {'--max-rate': max_rate, '--max-rps': max_rps})
+
+    nexus_client.set_rate_limits.assert_called_once_with(
+        max_rate=x_rate, max_rps=x_rps)
+
+
+def test_export_metrics(tmp_path, mocker):
+    """Ensure the metrics file is written even if the command fails"""
+    nexus_client = mocker.Mock()
+    nexus_client.hooks = hooks.ClientHooks()
+    path = tmp_path / 'nexus3.prom'
+
+    with pytest.raises(exception.NexusClientAPIError):
+        with util.export_metrics(
+                nexus_client, 'delete', {'--metrics-file': str(path)}):
+            nexus_client.hooks.emit(
+                hooks.ASSET_SKIPPED, direction='download', url='u', path='p')
+            raise exception.NexusClientAPIError('boom')
+
+    assert 'nexus3_assets_total{direction="download",result="skipped"} 1' \
+        in path.read_text().splitlines()
+
+
+def test_export_metrics_disabled(mocker):
+    with util.export_metrics(mocker.Mock(), 'delete', {}) as job_metrics:
+        assert job_metrics is None
+
+
+@pytest.mark.parametrize('metrics_port, x_address', [
+    ('9100', '127.0.0.1'), ('0.0.0.0:9100', '0.0.0.0'),
+])
+def test_export_metrics_port(metrics_port, x_address, mocker):
+    """Ensure metrics are only served beyond this host when asked to"""
+    serve = mocker.patch('nexuscli.openmetrics.JobMetrics.serve',
+                         return_value=9100)
+
+    with util.export_metrics(
+            mocker.Mock(), 'list', {'--metrics-port': metrics_port}):
+        pass
+
+    serve.assert_called_once_with(9100, x_address)
@@ -0,0 +1,200 @@
+import hashlib
+import io
+import os
+import tarfile
+import threading
+import zipfile
+
+import pytest
+
+from nexuscli import archive, exception
+
+CONTENTS = {'dir/a': b'a' * 1000, 'dir/sub/b': b'b' * 10, 'c': b''}
+
+
+class Unseekable(io.RawIOBase):
+    """A write-only stream, like a pipe to stdout"""
+    def __init__(self):
+        self.data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+
+@pytest.fixture
+def archive_client(mocker):
+    """A NexusClient stand-in serving CONTENTS"""
+    def _stream_file(url):
+        content = CONTENTS[url]
+        return len(content), iter([content[:7], content[7:]])
+
+    client = mocker.Mock()
+    client.list_raw.return_value = [
+        {'path': path, 'downloadUrl': path,
+         'checksum': {'sha1': hashlib.sha1(content).hexdigest()},
+         'lastModified': '2021-03-10T10:56:57.181+00:00'}
+        for path, content in CONTENTS.items()]
+    client.stream_file.side_effect = _stream_file
+    return client
+
+
+@pytest.mark.parametrize('last_modified, x_mtime', [
+    ('2021-03-10T10:56:57.181+00:00', 1615373817.181),
+    ('2021-03-10T11:56:57+01:00', 1615373817),
+    ('2021-03-10T10:56:57Z', 1615373817),
+    ('yesterday', 0),
+    (None, 0),
+])
+def test_mtime(last_modified, x_mtime):
+    assert archive._mtime({'lastModified': last_modified}) == \
+        pytest.approx(x_mtime)
+
+
+def _tar_contents(data):
+    with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+        return {member.name: tar.extractfile(member).read()
+                for member in tar.getmembers()}
+
+
+@pytest.mark.parametrize('archive_format', ['tar', 'tar.gz'])
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_write_tar(archive_format, prefetch, archive_client):
+    output = Unseekable()
+
+    count = archive.write_archive(
+        archive_client, 'repo/', output, archive_format, prefetch=prefetch)
+
+    assert count == len(CONTENTS)
+    assert _tar_contents(bytes(output.data)) == CONTENTS
+
+
+def test_write_tar_unknown_size(archive_client):
+    """Without a Content-Length, assets are spooled before being written"""
+    archive_client.stream_file.side_effect = lambda url: (
+        None, iter([CONTENTS[url]]))
+    output = io.BytesIO()
+
+    archive.write_archive(archive_client, 'repo/', output, flatten=True)
+
+    assert _tar_contents(output.getvalue()) == {
+        'a': CONTENTS['dir/a'], 'b': CONTENTS['dir/sub/b'], 'c': b''}
+
+
+@pytest.mark.parametrize('size', [len, lambda _: None])
+def test_write_zip(size, archive_client):
+    archive_client.stream_file.side_effect = lambda url: (
+        size(CONTENTS[url]), iter([CONTENTS[url]]))
+    output = Unseekable()
+
+    archive.write_archive(archive_client, 'repo/', output, 'zip')
+
+    with zipfile.ZipFile(io.BytesIO(bytes(output.data))) as zip_file:
+        assert {name: zip_file.read(name)
+                for name in zip_file.namelist()} == CONTENTS
+        assert zip_file.getinfo('c').date_time == (2021, 3, 10, 10, 56, 56)
+
+
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_write_archive_checksum_mismatch(prefetch, archive_client):
+    archive_client.list_raw.return_value[1]['checksum']['sha1'] = 'bad'
+
+    with pytest.raises(exception.DownloadError, match='sha1 mismatch'):
+        archive.write_archive(
+            archive_client, 'repo/', io.BytesIO(), prefetch=prefetch)
+
+
+def test_write_archive_invalid_format(archive_client):
+    with pytest.raises(exception.DownloadError):
+        archive.write_archive(archive_client, 'repo/', io.BytesIO(), 'rar')
+
+
+def _local_archive(tmp_path, archive_format):
+    """A local archive of CONTENTS, with a directory entry"""
+    path = tmp_path / f'build.{archive_format}'
+    if archive_format == 'zip':
+        with zipfile.ZipFile(path, 'w') as zip_file:
+            zip_file.writestr('dir/', b'')
+            for name, content in CONTENTS.items():
+                zip_file.writestr(name, content)
+        return path
+
+    mode = 'w:gz' if archive_format == 'tar.gz' else 'w'
+    with tarfile.open(path, mode) as tar:
+        directory = tarfile.TarInfo('dir')
+        directory.type = tarfile.DIRTYPE
+        tar.addfile(directory)
+        for name, content in CONTENTS.items():
+            info = tarfile.TarInfo(f'./{name}')
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return path
+
+
+@pytest.mark.parametrize('archive_format', archive.ARCHIVE_FORMATS)
+@pytest.mark.parametrize('recurse', [True, False])
+def test_read_archive(archive_format, recurse, tmp_path):
+    """Ensure all files are read, with independent file objects"""
+    path = _local_archive(tmp_path, archive_format)
+
+    members = list(archive.read_archive(str(path), recurse))
+    contents = {}
+    for name, size, fileobj in members:
+        with fileobj:
+            contents[name] = fileobj.read()
+        assert size == len(contents[name])
+
+    if recurse:
+        assert contents == CONTENTS
+    else:
+        assert contents == {'c': b''}
+
+
+def test_read_archive_read_ahead(tmp_path):
+    """Ensure tar members aren't read far ahead of those being used"""
+    path = tmp_path / 'build.tar'
+    with tarfile.open(path, 'w') as tar:
+        for index in range(archive.READ_AHEAD + 1):
+            info = tarfile.TarInfo(str(index))
+            info.size = 1
+            tar.addfile(info, io.BytesIO(b'x'))
+    members = archive.read_archive(str(path))
+    opened = [next(members) for _ in range(archive.READ_AHEAD)]
+
+    reader = threading.Thread(target=lambda: opened.append(next(members)))
+    reader.start()
+    reader.join(0.2)
+    assert reader.is_alive()
+    opened[0][2].close()
+    reader.join(5)
+
+    assert not reader.is_alive()
+    assert opened[-1][0] == str(archive.READ_AHEAD)
+    for _, _, fileobj in opened[1:]:
+        fileobj.close()
+
+
+@pytest.mark.parametrize('mode', ['w', 'w:gz'])
+def test_read_archive_truncated(mode, tmp_path):
+    path = tmp_path / 'build.tar'
+    content = os.urandom(100000)
+    with tarfile.open(path, mode) as tar:
+        info = tarfile.TarInfo('file')
+        info.size = len(content)
+        tar.addfile(info, io.BytesIO(content))
+    path.write_bytes(path.read_bytes()[:len(content) // 2])
+
+    with pytest.raises(exception.DownloadError):
+        for _, _, fileobj in archive.read_archive(str(path)):
+            fileobj.close()
+
+
+def test_read_archive_invalid(tmp_path):
+    path = tmp_path / 'file'
+    path.write_bytes(b'not an archive')
+
+    with pytest.raises(exception.NexusClientInvalidRepositoryPath):
+        list(archive.read_archive(str(path)))
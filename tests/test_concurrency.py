@@ -0,0 +1,130 @@
+import threading
+import time
+
+import pytest
+
+from nexuscli import concurrency
+
+
+@pytest.mark.parametrize('values, fraction, x_percentile', [
+    ([1], 0.95, 1),
+    ([3, 1, 2], 0.5, 2),
+    (list(range(1, 101)), 0.95, 95),
+    (list(range(1, 21)), 0.95, 19),
+])
+def test_percentile(values, fraction, x_percentile):
+    assert concurrency.percentile(values, fraction) == x_percentile
+
+
+def test_limiter_invalid():
+    with pytest.raises(ValueError):
+        concurrency.AdaptiveLimiter(initial=10, maximum=5)
+
+
+def test_limiter_increase():
+    """The limit grows while latency is flat"""
+    limiter = concurrency.AdaptiveLimiter(initial=2, maximum=4)
+
+    for _ in range(100):
+        limiter.record(0.1, 200)
+
+    assert limiter.limit == 4
+
+
+@pytest.mark.parametrize('status_code', [429, 503])
+def test_limiter_overload_status(status_code):
+    """The limit is cut multiplicatively on overload, at most once per
+    cooldown period"""
+    limiter = concurrency.AdaptiveLimiter(initial=16, cooldown=60)
+
+    limiter.record(0.1, status_code)
+    limiter.record(0.1, status_code)
+
+    assert limiter.limit == 8
+
+
+def test_limiter_overload_cooldown():
+    limiter = concurrency.AdaptiveLimiter(initial=16, cooldown=0)
+
+    limiter.record(0.1, 503)
+    limiter.record(0.1, 503)
+    for _ in range(10):
+        limiter.record(0.1, 429)
+
+    assert limiter.limit == 1
+
+
+def test_limiter_overload_latency(caplog):
+    """The limit is cut when p95 latency rises and the decision logged"""
+    limiter = concurrency.AdaptiveLimiter(
+        initial=32, maximum=32, window=10, latency_tolerance=2.0)
+    for _ in range(10):
+        limiter.record(0.1, 200)
+
+    with caplog.at_level('INFO', logger='nexuscli.concurrency'):
+        for _ in range(5):
+            limiter.record(1.0, 200)
+
+    assert limiter.limit == 16
+    assert 'Concurrency limit 32 -> 16: p95 latency' in caplog.text
+
+
+def test_limiter_fixed():
+    limiter = concurrency.AdaptiveLimiter.fixed(3)
+
+    limiter.record(0.1, 503)
+    for _ in range(100):
+        limiter.record(0.1, 200)
+
+    assert limiter.limit == 3
+
+
+def test_run_concurrently_limit():
+    """Ensure no more than limit calls run at the same time"""
+    limiter = concurrency.AdaptiveLimiter.fixed(3)
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def work(item):
+        with lock:
+            running.append(item)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.remove(item)
+        return item * 2
+
+    results = concurrency.run_concurrently(work, range(20), limiter)
+
+    assert sorted(results) == [i * 2 for i in range(20)]
+    assert max(peak) == 3
+
+
+def test_run_concurrently_sequential():
+    results = concurrency.run_concurrently(lambda i: i + 1, [1, 2, 3])
+
+    assert list(results) == [2, 3, 4]
+
+
+def test_run_concurrently_exception():
+    def work(item):
+        if item == 5:
+            raise RuntimeError(item)
+        return item
+
+    with pytest.raises(RuntimeError):
+        list(concurrency.run_concurrently(
+            work, range(10), concurrency.AdaptiveLimiter.fixed(2)))
+
+
+def test_run_concurrently_close():
+    """Operations not yet started are cancelled when the caller gives up"""
+    calls = []
+    results = concurrency.run_concurrently(
+        calls.append, range(1000), concurrency.AdaptiveLimiter.fixed(1))
+
+    next(results)
+    results.close()
+
+    assert len(calls) < 10
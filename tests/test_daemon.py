@@ -0,0 +1,141 @@
+import json
+import os
+import socket
+import threading
+
+import pytest
+from clint.textui import progress
+
+from nexuscli import daemon, exception
+from nexuscli.cli import util
+from nexuscli.nexus_client import NexusClient
+from nexuscli.testing import FakeNexus
+
+
+@pytest.mark.parametrize('argv, x_forwardable', [
+    (['list', 'raw/'], True),
+    (['download', 'raw/dir/', 'out/', '--max-rps=5'], True),
+    (['repository', 'delete', 'raw', '--force'], True),
+    (['--help'], True),
+    ([], False),
+    (['login'], False),
+    (['daemon'], False),
+    (['upload', '-', 'raw/file'], False),
+    (['download', 'raw/dir/', '-', '--archive=tar'], False),
+    (['upload', 'dir/', 'raw/', '--watch'], False),
+    (['list', 'raw/', '--record=session.zip'], False),
+    (['list', 'raw/', '--stats'], False),
+    (['repository', 'del', 'raw'], False),
+])
+def test_forwardable(argv, x_forwardable):
+    assert daemon.forwardable(argv) == x_forwardable
+
+
+@pytest.fixture
+def command_server(tmp_path, mocker):
+    """A daemon serving commands with a client of a FakeNexus"""
+    path = str(tmp_path / 'nexus3.sock')
+    with FakeNexus() as nexus:
+        nexus.add_repository('raw')
+        nexus.populate('raw', 3, size=10)
+        nexus_client = NexusClient(config=nexus.config)
+        # commands must use the daemon's client
+        mocker.patch('nexuscli.cli.util.NexusClient',
+                     side_effect=AssertionError)
+        server = daemon.CommandServer(path, nexus_client)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        yield path, nexus_client
+        server.shutdown()
+        thread.join()
+        server.server_close()
+
+
+def test_forward(command_server, capsys, tmp_path, monkeypatch):
+    """Ensure commands run by the daemon in the caller's directory"""
+    path, nexus_client = command_server
+    monkeypatch.chdir(tmp_path)
+
+    assert daemon.forward(['list', 'raw/'], path) == 0
+    listed = capsys.readouterr().out.splitlines()
+    assert daemon.forward(['download', 'raw/dataset/', 'out/',
+                           '--max-rate=1M'], path) == 0
+
+    assert len(listed) == 3
+    assert len(list((tmp_path / 'out').rglob('*.bin'))) == 3
+    assert 'Downloaded 3 files' in capsys.readouterr().err
+    assert nexus_client.bandwidth_limiter is not None
+    assert util._shared_client is None
+
+
+def test_forward_streamed(command_server, mocker):
+    """Ensure output, including progress bars, is sent as it's written"""
+    path, _ = command_server
+    release = threading.Event()
+    progress_stream = progress.STREAM
+
+    def _cmd_list(*_):
+        print('listing')
+        release.wait(5)
+        progress.STREAM.write('progress')
+        return 0
+
+    mocker.patch('nexuscli.cli.root_commands.cmd_list', side_effect=_cmd_list)
+    request = {'argv': ['list', 'raw/'], 'cwd': os.getcwd()}
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(path)
+        channel = sock.makefile('rwb')
+        channel.write(json.dumps(request).encode() + b'\n')
+        channel.flush()
+        first = json.loads(channel.readline())
+        release.set()
+        rest = [json.loads(line) for line in channel]
+
+    assert first == {'stdout': 'listing'}
+    assert rest == [{'stdout': '\n'}, {'stderr': 'progress'},
+                    {'exit_code': 0}]
+    assert progress.STREAM is progress_stream
+
+
+def test_forward_exit(command_server, capsys):
+    """Ensure docopt's exit is the command's exit"""
+    path, _ = command_server
+
+    assert daemon.forward(['--help'], path) == 0
+    assert 'Usage:' in capsys.readouterr().out
+
+
+def test_forward_no_daemon(tmp_path):
+    assert daemon.forward(['list', 'raw/'], str(tmp_path / 'none')) is None
+
+
+def test_main_fallback(tmp_path, mocker, monkeypatch):
+    """Ensure commands run locally when the daemon isn't running"""
+    monkeypatch.setenv(daemon.SOCKET_ENV, str(tmp_path / 'none'))
+    cli_main = mocker.patch('nexuscli.cli.main', return_value=3)
+
+    assert daemon.main(['list', 'raw/']) == 3
+
+    cli_main.assert_called_once_with(['list', 'raw/'])
+
+
+def test_serve_running(command_server):
+    path, nexus_client = command_server
+
+    with pytest.raises(exception.NexusClientDaemonError):
+        daemon.serve(nexus_client, path)
+
+
+def test_serve_stale_socket(tmp_path, mocker):
+    """Ensure the socket left by a daemon that was killed is replaced"""
+    path = str(tmp_path / 'nexus3.sock')
+    socket.socket(socket.AF_UNIX).bind(path)
+    server = mocker.patch('nexuscli.daemon.CommandServer')
+    server.return_value.serve_forever.side_effect = KeyboardInterrupt
+    nexus_client = mocker.Mock(transport=None)
+
+    daemon.serve(nexus_client, path)
+
+    server.assert_called_once_with(path, nexus_client)
+    assert not os.path.exists(path)
+    assert nexus_client.transport is None
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from nexuscli import hash_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    fixture = hash_cache.HashCache(tmp_path.joinpath('sub', 'hashes.db'))
+    yield fixture
+    fixture.close()
+
+
+@pytest.fixture
+def cached_file(tmp_path):
+    path = tmp_path.joinpath('file')
+    path.write_bytes(b'content')
+    return path
+
+
+def test_default_path(monkeypatch, tmp_path):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+
+    assert hash_cache._default_cache_path() == str(
+        tmp_path.joinpath('nexus3-cli', 'hashes.sqlite3'))
+
+
+def test_put_get(cache, cached_file):
+    cache.put(cached_file, {'sha1': 'a'})
+    cache.put(str(cached_file), {'sha256': 'b'})
+
+    assert cache.get(cached_file, 'sha1') == 'a'
+    assert cache.get(str(cached_file), 'sha256') == 'b'
+    assert cache.get(cached_file, 'md5') is None
+
+
+def test_persisted(cache, cached_file):
+    cache.put(cached_file, {'sha1': 'a'})
+    cache.close()
+
+    assert hash_cache.HashCache(cache.path).get(cached_file, 'sha1') == 'a'
+
+
+def test_invalidated(cache, cached_file):
+    """Entries for files that changed since they were cached are ignored"""
+    cache.put(cached_file, {'sha1': 'a'})
+    stat = os.stat(cached_file)
+
+    os.utime(cached_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+    assert cache.get(cached_file, 'sha1') is None
+
+    cache.put(cached_file, {'md5': 'b'})
+    assert cache.get(cached_file, 'md5') == 'b'
+    # stale hashes aren't merged into the new entry
+    assert cache.get(cached_file, 'sha1') is None
+
+
+def test_missing_file(cache, tmp_path):
+    missing = tmp_path.joinpath('missing')
+
+    cache.put(missing, {'sha1': 'a'})
+
+    assert cache.get(missing, 'sha1') is None
+
+
+def test_unwritable(tmp_path, cached_file, caplog):
+    """Ensure a cache that can't be created is a warning, not an error"""
+    blocker = tmp_path.joinpath('blocker')
+    blocker.write_bytes(b'')
+    cache = hash_cache.HashCache(blocker.joinpath('hashes.db'))
+
+    cache.put(cached_file, {'sha1': 'a'})
+
+    assert cache.get(cached_file, 'sha1') is None
+    assert len(caplog.records) == 1
+    assert 'Not caching file hashes' in caplog.text
@@ -0,0 +1,107 @@
+import pytest
+
+from nexuscli import hooks
+from nexuscli.nexus_client import NexusClient
+from nexuscli.retry import RetryPolicy
+from nexuscli.testing import FakeNexus
+
+
+@pytest.fixture
+def recorded():
+    """ClientHooks recording all events as (event, fields) tuples"""
+    client_hooks = hooks.ClientHooks()
+    events = []
+
+    def _record(event, **fields):
+        events.append((event, fields))
+
+    for event in hooks.EVENTS:
+        client_hooks.add(event, _record)
+    return client_hooks, events
+
+
+def _of(events, name):
+    return [fields for event, fields in events if event == name]
+
+
+def test_emit_without_callbacks():
+    client_hooks = hooks.ClientHooks()
+
+    client_hooks.emit(hooks.REQUEST_START, method='get')
+
+    assert hooks.REQUEST_START not in client_hooks
+
+
+def test_add_remove(mocker):
+    client_hooks = hooks.ClientHooks()
+    callback = mocker.Mock()
+
+    client_hooks.add(hooks.RETRY, callback)
+    client_hooks.emit(hooks.RETRY, reason='503')
+    client_hooks.emit(hooks.PAGE_FETCHED, page=1)
+    client_hooks.remove(hooks.RETRY, callback)
+    client_hooks.emit(hooks.RETRY, reason='503')
+
+    callback.assert_called_once_with(hooks.RETRY, reason='503')
+    assert hooks.RETRY not in client_hooks
+    with pytest.raises(ValueError):
+        client_hooks.remove(hooks.RETRY, callback)
+
+
+def test_add_unknown_event(mocker):
+    with pytest.raises(ValueError):
+        hooks.ClientHooks().add('unknown', mocker.Mock())
+
+
+def test_callback_error(mocker):
+    """A failing callback doesn't prevent the others from being called"""
+    client_hooks = hooks.ClientHooks()
+    callback = mocker.Mock()
+    client_hooks.add(hooks.RETRY, mocker.Mock(side_effect=KeyError))
+    client_hooks.add(hooks.RETRY, callback)
+
+    client_hooks.emit(hooks.RETRY, reason='503')
+
+    callback.assert_called_once()
+
+
+def test_client_events(recorded, tmp_path, mocker):
+    """Ensure the client emits events for requests, retries, pages and
+    assets transferred or skipped"""
+    mocker.patch('time.sleep')
+    client_hooks, events = recorded
+    upload = tmp_path / 'upload'
+    upload.mkdir()
+    upload.joinpath('file').write_bytes(b'content')
+
+    with FakeNexus(page_size=2) as nexus:
+        nexus.add_repository('raw')
+        nexus.populate('raw', 3, size=10)
+        client = NexusClient(
+            config=nexus.config, hooks=client_hooks, segment_threshold=None,
+            retry_policy=RetryPolicy(total=1))
+
+        assert client.download('raw/dataset/', f'{tmp_path}/') == 3
+        assert client.download('raw/dataset/', f'{tmp_path}/') == 3
+        assert client.upload(str(upload), 'raw/up/', flatten=True) == 1
+
+        nexus.error_rate = 1
+        client.http_request('get', 'assets')
+
+    pages = _of(events, hooks.PAGE_FETCHED)
+    assert [(page['page'], page['items']) for page in pages] == [
+        (1, 2), (2, 1)] * 2
+
+    downloads = _of(events, hooks.ASSET_TRANSFERRED)[:3]
+    assert {download['direction'] for download in downloads} == {'download'}
+    assert [download['size'] for download in downloads] == [10] * 3
+    skipped = _of(events, hooks.ASSET_SKIPPED)
+    assert len(skipped) == 3
+    assert _of(events, hooks.ASSET_TRANSFERRED)[3]['url'] == 'raw/up/file'
+
+    starts = _of(events, hooks.REQUEST_START)
+    ends = _of(events, hooks.REQUEST_END)
+    assert len(starts) == len(ends)
+    assert ends[-2]['status'] == 503
+    assert ends[-1]['attempt'] == 2
+    assert [retry['reason'] for retry in _of(events, hooks.RETRY)] == ['503']
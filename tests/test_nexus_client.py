@@ -6,6 +6,7 @@ import nexuscli
 from nexuscli import exception
 from nexuscli.nexus_client import NexusClient
 from nexuscli.nexus_config import DEFAULTS, NexusConfig
+from nexuscli.retry import RetryPolicy
 
 
 def test_repositories(mocker):
@@ -87,3 +88,113 @@ def test_nexus_context_path(url, expected_base, mocker):
         auth=(DEFAULTS['username'], DEFAULTS['password']), method='get',
         stream=True, url=(expected_base + 'service/rest/v1/repositories'),
         verify=True)
+
+
+@pytest.fixture
+def retry_responses(mocker):
+    """Patch requests.request to return the given sequence of status codes"""
+    def _patch(*status_codes):
+        responses = [
+            mocker.Mock(status_code=code, headers={}) for code in status_codes]
+        return mocker.patch('requests.request', side_effect=responses)
+
+    mocker.patch('nexuscli.nexus_client.RepositoryCollection')
+    mocker.patch('nexuscli.nexus_client.time.sleep')
+    return _patch
+
+
+def test_http_request_retry(retry_responses):
+    """Ensure retryable responses are retried and counted in the metrics"""
+    request = retry_responses(503, 429, 200)
+    client = NexusClient()
+
+    response = client.http_request('get', 'endpoint')
+
+    assert response.status_code == 200
+    assert request.call_count == 3
+    assert client.metrics.total('retries') == 2
+    assert client.metrics.get('retries', method='get', reason='503') == 1
+    assert client.metrics.get('requests', method='get') == 3
+
+
+def test_http_request_retry_exhausted(retry_responses):
+    """Ensure the last response is returned once retries are exhausted"""
+    retry_responses(502, 502)
+    client = NexusClient(retry_policy=RetryPolicy(total=1))
+
+    response = client.http_request('delete', 'assets/id')
+
+    assert response.status_code == 502
+    assert client.metrics.total('retries') == 1
+
+
+def test_http_request_retry_not_idempotent(retry_responses):
+    """A POST that may have been processed by the service isn't retried"""
+    request = retry_responses(502, 200)
+    client = NexusClient()
+
+    assert client.http_request('post', 'components').status_code == 502
+    request.assert_called_once()
+
+
+def test_http_request_retry_connection_error(mocker):
+    mocker.patch('nexuscli.nexus_client.RepositoryCollection')
+    mocker.patch('nexuscli.nexus_client.time.sleep')
+    mocker.patch('requests.request',
+                 side_effect=requests.exceptions.ConnectionError('boom'))
+    client = NexusClient(retry_policy=RetryPolicy(total=2))
+
+    with pytest.raises(exception.NexusClientConnectionError):
+        client.http_request('get', 'endpoint')
+
+    assert requests.request.call_count == 3
+    assert client.metrics.get(
+        'retries', method='get', reason='ConnectionError') == 2
+
+
+def test_http_request_retry_rewinds_body(mocker, tmp_path):
+    """Ensure an upload body is sent from the start on every attempt"""
+    mocker.patch('nexuscli.nexus_client.RepositoryCollection')
+    mocker.patch('nexuscli.nexus_client.time.sleep')
+    status_codes = iter([503, 200])
+    sent = []
+
+    def fake_request(data, **_):
+        sent.append(data.read())
+        return mocker.Mock(status_code=next(status_codes), headers={})
+
+    mocker.patch('requests.request', side_effect=fake_request)
+    upload = tmp_path.joinpath('upload')
+    upload.write_bytes(b'content')
+    client = NexusClient()
+
+    with upload.open('rb') as fh:
+        client.http_request('put', 'repository/yum/file.rpm', data=fh)
+
+    assert sent == [b'content', b'content']
+
+
+def test_http_request_max_rps(retry_responses, mocker):
+    """Ensure every request, including retries, takes a token"""
+    retry_responses(503, 200)
+    client = NexusClient(max_rps=5)
+    consume = mocker.spy(client.request_limiter, 'consume')
+
+    client.http_request('get', 'endpoint')
+
+    assert consume.call_count == 2
+
+
+@pytest.mark.parametrize('max_rate, max_rps', [
+    (None, None), (1024, None), (None, 10), (1024, 10)])
+def test_set_rate_limits(max_rate, max_rps, mocker):
+    mocker.patch('nexuscli.nexus_client.RepositoryCollection')
+
+    client = NexusClient(max_rate=max_rate, max_rps=max_rps)
+
+    assert (client.bandwidth_limiter is None) == (max_rate is None)
+    assert (client.request_limiter is None) == (max_rps is None)
+    if max_rate:
+        assert client.bandwidth_limiter.rate == max_rate
+    if max_rps:
+        assert client.request_limiter.rate == max_rps
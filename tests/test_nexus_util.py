@@ -2,6 +2,7 @@ import itertools
 import pytest
 
 from nexuscli import nexus_util
+from nexuscli.hash_cache import HashCache
 from nexuscli.nexus_util import calculate_hash, filtered_list_gen
 
 
@@ -93,3 +94,29 @@ def test_ensure_exists(is_dir, tmp_path, faker):
     assert path.exists()
     assert is_dir == path.is_dir()
     assert is_dir != path.is_file()
+
+
+def test_has_same_hash_cache(mocker, tmp_path):
+    """Ensure cached hashes are used and calculated hashes are cached"""
+    file_path = tmp_path.joinpath('file')
+    file_path.write_bytes(b'content')
+    artefact = {'checksum': {'sha1': nexus_util.calculate_hash(
+        'sha1', str(file_path))}}
+    cache = HashCache(tmp_path.joinpath('hashes'))
+    spy = mocker.spy(nexus_util, 'calculate_hash')
+
+    assert nexus_util.has_same_hash(artefact, file_path, cache)
+    assert nexus_util.has_same_hash(artefact, file_path, cache)
+    spy.assert_called_once()
+
+
+@pytest.mark.parametrize('checksum, hashes, x_mismatches', [
+    ({}, {'sha1': 'a'}, None),
+    ({'md5': 'a'}, {'sha1': 'a'}, None),
+    ({'sha1': 'a'}, {'sha1': 'a'}, []),
+    ({'sha1': 'a', 'sha256': 'b'}, {'sha1': 'a', 'sha256': 'c'}, ['sha256']),
+    ({'sha1': 'a'}, {'sha1': 'b', 'sha256': 'c'}, ['sha1']),
+])
+def test_checksum_mismatches(checksum, hashes, x_mismatches):
+    assert nexus_util.checksum_mismatches(
+        {'checksum': checksum}, hashes) == x_mismatches
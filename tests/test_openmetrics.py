@@ -0,0 +1,98 @@
+import pytest
+import requests
+
+from nexuscli import hooks, openmetrics
+from nexuscli.nexus_client import NexusClient
+from nexuscli.retry import RetryPolicy
+from nexuscli.testing import FakeNexus
+
+
+@pytest.mark.parametrize('url, x_endpoint', [
+    ('http://nexus/service/rest/v1/assets/abc', 'assets'),
+    ('http://nexus/service/rest/v1/search/assets?repository=r', 'search'),
+    ('http://nexus/ctx/service/rest/beta/script/name/run', 'script'),
+    ('http://nexus/service/rest/v1/', 'other'),
+    ('http://nexus/repository/raw/dir/file', 'repository'),
+    ('http://nexus/', 'other'),
+])
+def test_endpoint_of(url, x_endpoint):
+    assert openmetrics.endpoint_of(url) == x_endpoint
+
+
+@pytest.fixture
+def job_metrics():
+    """JobMetrics collecting a download with a failed request"""
+    client_hooks = hooks.ClientHooks()
+    job_metrics = openmetrics.JobMetrics('download')
+    job_metrics.attach(client_hooks)
+    with FakeNexus(page_size=2) as nexus:
+        nexus.add_repository('raw')
+        nexus.populate('raw', 3, size=10)
+        client = NexusClient(
+            config=nexus.config, hooks=client_hooks,
+            retry_policy=RetryPolicy(total=0))
+        nexus.error_rate = 1
+        client.http_request('get', 'assets')
+        nexus.error_rate = 0
+        yield job_metrics, client
+    job_metrics.close()
+
+
+def test_render(job_metrics, tmp_path):
+    """Ensure the events collected are rendered in both formats"""
+    job_metrics, client = job_metrics
+    assert client.download('raw/dataset/', f'{tmp_path}/') == 3
+
+    text = job_metrics.render()
+    prometheus = job_metrics.render(openmetrics=False)
+
+    assert text.endswith('# EOF\n')
+    assert '# TYPE nexus3_assets counter' in text
+    assert '# TYPE nexus3_assets_total counter' in prometheus
+    assert '# EOF' not in prometheus
+    for output in (text, prometheus):
+        lines = output.splitlines()
+        assert 'nexus3_assets_total{direction="download",' \
+               'result="transferred"} 3' in lines
+        assert 'nexus3_transferred_bytes_total{direction="download"} 30' \
+            in lines
+        assert 'nexus3_pages_total{endpoint="search"} 2' in lines
+        assert 'nexus3_request_errors_total{endpoint="assets",' \
+               'method="get",reason="503"} 1' in lines
+        assert 'nexus3_request_duration_seconds_count{endpoint="search",' \
+               'method="get"} 2' in lines
+        assert 'nexus3_request_duration_seconds_bucket{endpoint="search",' \
+               'le="+Inf",method="get"} 2' in lines
+        assert any(line.startswith(
+            'nexus3_job_duration_seconds{command="download"} ')
+            for line in lines)
+
+
+def test_write(job_metrics, tmp_path):
+    job_metrics, _ = job_metrics
+    path = tmp_path / 'nexus3.prom'
+
+    job_metrics.write(str(path))
+
+    lines = path.read_text().splitlines()
+    assert '# TYPE nexus3_request_errors_total counter' in lines
+    assert lines[-1] != '# EOF'
+    assert [p.name for p in tmp_path.iterdir()] == ['nexus3.prom']
+
+
+@pytest.mark.parametrize('accept, x_content_type', [
+    ('application/openmetrics-text; version=1.0.0',
+     openmetrics.OPENMETRICS_CONTENT_TYPE),
+    ('*/*', openmetrics.PROMETHEUS_CONTENT_TYPE),
+])
+def test_serve(accept, x_content_type, job_metrics):
+    job_metrics, _ = job_metrics
+    port = job_metrics.serve(0)
+
+    response = requests.get(
+        f'http://127.0.0.1:{port}/metrics', headers={'Accept': accept})
+    missing = requests.get(f'http://127.0.0.1:{port}/')
+
+    assert response.headers['Content-Type'] == x_content_type
+    assert 'nexus3_request_errors_total' in response.text
+    assert missing.status_code == 404
@@ -0,0 +1,176 @@
+import hashlib
+import io
+import json
+import zipfile
+
+import pytest
+import requests
+
+from nexuscli import cli, recording
+from nexuscli.nexus_client import NexusClient
+from nexuscli.nexus_config import NexusConfig
+from nexuscli.testing import FakeNexus
+
+
+@pytest.fixture
+def recorded(tmp_path):
+    """A recording of a download and of a failed request"""
+    path = str(tmp_path / 'session.zip')
+    with FakeNexus(page_size=2) as nexus:
+        nexus.add_repository('raw')
+        nexus.populate('raw', 3, size=100)
+        with recording.Recorder(path) as recorder:
+            client = NexusClient(config=nexus.config, transport=recorder)
+            assert client.download(
+                'raw/dataset/', f'{tmp_path}/recorded/') == 3
+            client.http_request('get', 'missing')
+    return path
+
+
+def test_recorder(recorded):
+    """Ensure requests are recorded, with credentials redacted"""
+    with zipfile.ZipFile(recorded) as archive:
+        index = json.loads(archive.read(recording.INDEX_NAME))
+        bodies = [name for name in archive.namelist()
+                  if name.startswith(recording.BODIES_DIR)]
+
+    requests_ = index['requests']
+    assert index['version'] == recording.ARCHIVE_VERSION
+    assert [entry['status'] for entry in requests_].count(200) == \
+        len(requests_) - 1
+    assert any('continuationToken=' in entry['url'] for entry in requests_)
+    assert all(entry['request_headers']['Authorization'] ==
+               recording.REDACTED for entry in requests_)
+    assert len(bodies) == len(
+        {entry['body'] for entry in requests_ if entry['body']})
+
+
+@pytest.mark.parametrize('latency_scale', [0, 1])
+def test_replay(latency_scale, recorded, tmp_path):
+    """Ensure a recording is replayed with another service URL"""
+    with recording.ReplayTransport(recorded, latency_scale) as transport:
+        client = NexusClient(config=NexusConfig(url='http://offline:1234'),
+                             transport=transport)
+
+        assert client.download('raw/dataset/', f'{tmp_path}/replayed/') == 3
+        assert client.http_request('get', 'missing').status_code == 404
+        assert client.http_request('get', 'unknown').reason == \
+            'Not recorded'
+
+    for recorded_file in (tmp_path / 'recorded').rglob('*.bin'):
+        replayed_file = tmp_path / 'replayed' / recorded_file.relative_to(
+            tmp_path / 'recorded')
+        assert replayed_file.read_bytes() == recorded_file.read_bytes()
+
+
+def test_replay_ranges(tmp_path):
+    """Ensure byte ranges of an asset get their recorded responses, in any
+    order; e.g. for segmented and resumed downloads"""
+    path = str(tmp_path / 'session.zip')
+    ranges = ['bytes=0-9', 'bytes=10-19', 'bytes=20-']
+    with FakeNexus() as nexus:
+        nexus.add_repository('raw')
+        nexus.populate('raw', 1, size=30)
+        with recording.Recorder(path) as recorder:
+            client = NexusClient(config=nexus.config, transport=recorder)
+            asset, = client.list_raw('raw/dataset/')
+            recorded = [client.http_request(
+                'get', asset['downloadUrl'], headers={'Range': range_}
+            ).content for range_ in ranges]
+
+    with recording.ReplayTransport(path, latency_scale=0) as transport:
+        client = NexusClient(config=NexusConfig(url='http://offline:1234'),
+                             transport=transport)
+        replayed = [client.http_request(
+            'get', asset['downloadUrl'], headers={'range': range_}
+        ).content for range_ in reversed(ranges)]
+
+    assert replayed[::-1] == recorded
+    assert len(b''.join(recorded)) == 30
+
+
+def test_replay_error(tmp_path):
+    """Ensure recorded connection errors are raised again"""
+    path = str(tmp_path / 'session.zip')
+    transport = requests.Session()
+    with recording.Recorder(path, transport) as recorder:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            recorder.request('get', 'http://127.0.0.1:1/', timeout=1)
+
+    with recording.ReplayTransport(path, latency_scale=0) as transport:
+        with pytest.raises(requests.exceptions.ConnectionError):
+            transport.request('get', 'http://nexus:1/')
+
+
+def test_recorder_streamed(tmp_path):
+    """Ensure a streamed body is recorded as it's read, not read in advance"""
+    path = str(tmp_path / 'session.zip')
+    with FakeNexus() as nexus:
+        nexus.add_repository('raw')
+        nexus.populate('raw', 1, size=100000)
+        asset, = NexusClient(config=nexus.config).list_raw('raw/dataset/')
+        with recording.Recorder(path) as recorder:
+            response = recorder.request(
+                'get', asset['downloadUrl'], stream=True,
+                auth=nexus.config.auth)
+            assert response.raw._raw.tell() == 0
+            content = b''.join(response.iter_content(4096))
+
+    with zipfile.ZipFile(path) as archive:
+        entry, = json.loads(archive.read(recording.INDEX_NAME))['requests']
+        body = archive.read(f'{recording.BODIES_DIR}/{entry["body"]}')
+    assert len(content) == 100000
+    assert body == content
+    assert entry['body'] == hashlib.sha256(content).hexdigest()
+
+
+class _InterruptedBody(io.BytesIO):
+    def read(self, size=-1):
+        data = super().read(size)
+        if not data:
+            raise requests.exceptions.ChunkedEncodingError('reset')
+        return data
+
+
+def test_replay_body_error(tmp_path, mocker):
+    """Ensure a body interrupted while recorded is interrupted again"""
+    path = str(tmp_path / 'session.zip')
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = _InterruptedBody(b'abc')
+    transport = mocker.Mock()
+    transport.request.return_value = response
+    with recording.Recorder(path, transport) as recorder:
+        response = recorder.request('get', 'http://nexus/file', stream=True)
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            response.content
+
+    with recording.ReplayTransport(path, latency_scale=0) as transport:
+        response = transport.request('get', 'http://other/file', stream=True)
+        chunks = response.iter_content(2)
+        assert next(chunks) + next(chunks) == b'abc'
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            next(chunks)
+
+
+def test_replay_invalid(tmp_path):
+    path = tmp_path / 'session.zip'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('other', 'content')
+
+    with pytest.raises(ValueError):
+        recording.ReplayTransport(str(path))
+
+
+def test_cli_record(tmp_path, mocker):
+    """Ensure --record gives the transport to the command's client"""
+    path = tmp_path / 'session.zip'
+    get_client = mocker.patch('nexuscli.cli.util.NexusClient')
+    mocker.patch('nexuscli.cli.root_commands.cmd_list', return_value=0)
+
+    cli.main(argv=['list', 'repo', f'--record={path}'])
+
+    transport = get_client.call_args[1]['transport']
+    assert isinstance(transport, recording.Recorder)
+    assert zipfile.is_zipfile(path)
+    assert cli.util._transport is None
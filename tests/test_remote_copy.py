@@ -0,0 +1,68 @@
+import pytest
+
+from nexuscli import exception, remote_copy
+from nexuscli.nexus_client import NexusClient
+from nexuscli.testing import FakeNexus
+
+
+def _artefact(path, sha1):
+    return {'path': path, 'downloadUrl': f'url/{path}',
+            'checksum': {'sha1': sha1}}
+
+
+@pytest.fixture
+def copy_client(nexus_mock_client, mocker):
+    """nexus_mock_client with a source listing and a destination repository"""
+    listings = {
+        'src/dir/': [_artefact('dir/a', '1'), _artefact('dir/sub/b', '2')],
+        'src/dir/a': [_artefact('dir/a', '1')],
+        'dst/': [],
+        'dst/out/': [_artefact('out/a', '1'), _artefact('out/sub/b', 'x')],
+    }
+    nexus_mock_client.list_raw = mocker.Mock(side_effect=listings.get)
+    nexus_mock_client.stream_file = mocker.Mock(
+        side_effect=lambda url: (3, iter([b'abc'])))
+    nexus_mock_client.repositories.get_by_name = mocker.Mock()
+    return nexus_mock_client
+
+
+@pytest.mark.parametrize(
+    'source, destination, flatten, nocache, x_uploads', [
+        ('src/dir/', 'dst/', False, False, [('', 'a'), ('sub', 'b')]),
+        ('src/dir/', 'dst/', True, False, [('', 'a'), ('', 'b')]),
+        ('src/dir/a', 'dst/new', False, False, [('', 'new')]),
+        # out/a has the same checksum
+        ('src/dir/', 'dst/out/', False, False, [('out/sub', 'b')]),
+        ('src/dir/', 'dst/out/', False, True,
+         [('out', 'a'), ('out/sub', 'b')]),
+    ])
+def test_copy(source, destination, flatten, nocache, x_uploads, copy_client):
+    count = remote_copy.copy(
+        copy_client, source, destination, flatten, nocache)
+
+    repository = copy_client.repositories.get_by_name.return_value
+    copy_client.repositories.get_by_name.assert_called_with('dst')
+    uploads = sorted(call[0][1:3]
+                     for call in repository.upload_stream.call_args_list)
+    assert uploads == x_uploads
+    assert count == len(copy_client.list_raw(source))
+    fileobj = repository.upload_stream.call_args[0][0]
+    assert (fileobj.len, repository.upload_stream.call_args[0][3]) == (3, 3)
+
+
+def test_copy_directory_to_file(copy_client):
+    with pytest.raises(exception.NexusClientInvalidRepositoryPath):
+        remote_copy.copy(copy_client, 'src/dir/', 'dst/file')
+
+
+def test_copy_throttled_once(mocker):
+    """Ensure a copy is charged once to the client's bandwidth limit"""
+    with FakeNexus() as nexus:
+        nexus.add_repository('raw')
+        nexus.populate('raw', 3, size=1000)
+        client = NexusClient(config=nexus.config, max_rate=10 ** 9)
+        consume = mocker.spy(client.bandwidth_limiter, 'consume')
+
+        assert remote_copy.copy(client, 'raw/dataset/', 'raw/copy/') == 3
+
+    assert sum(call[0][0] for call in consume.call_args_list) == 3000
@@ -0,0 +1,70 @@
+import pytest
+
+from nexuscli import replicate
+
+
+def _artefact(path, sha1):
+    return {'path': path, 'downloadUrl': f'url/{path}',
+            'checksum': {'sha1': sha1}}
+
+
+def test_checkpoint(tmp_path):
+    path = tmp_path.joinpath('sub', 'checkpoint')
+    with replicate.Checkpoint(path) as checkpoint:
+        checkpoint.add(_artefact('a', '1'))
+        assert _artefact('a', '1') in checkpoint
+
+    # interrupted while writing a line
+    with path.open('a') as fh:
+        fh.write('["b", ')
+
+    checkpoint = replicate.Checkpoint(path)
+    assert len(checkpoint) == 1
+    assert _artefact('a', '1') in checkpoint
+    # changed since it was replicated
+    assert _artefact('a', '2') not in checkpoint
+
+
+@pytest.fixture
+def replicate_clients(mocker):
+    """Source and target clients; the target has one of the artefacts"""
+    source = mocker.Mock()
+    source.split_component_path.side_effect = lambda path: (
+        path.split('/')[0], 'dir', None)
+    source.list_raw.return_value = [
+        _artefact('dir/a', '1'), _artefact('dir/b', '2'),
+        _artefact('dir/c', '3')]
+    source.stream_file.return_value = (1, iter([b'x']))
+    source.concurrency = None
+
+    target = mocker.Mock()
+    target.list_raw.return_value = [_artefact('dir/a', '1')]
+    return source, target
+
+
+def test_replicate(replicate_clients, tmp_path):
+    source, target = replicate_clients
+    checkpoint_path = tmp_path.joinpath('checkpoint')
+    replicate.Checkpoint(checkpoint_path).add(_artefact('dir/b', '2'))
+
+    count = replicate.replicate(source, target, 'src/dir/', 'dst/dir/',
+                                checkpoint_path=checkpoint_path)
+
+    assert count == 3
+    target.list_raw.assert_called_once_with('dst/dir/')
+    repository = target.repositories.get_by_name.return_value
+    repository.upload_stream.assert_called_once()
+    assert repository.upload_stream.call_args[0][1:3] == ('dir', 'c')
+    source.repositories.get_by_name.assert_not_called()
+    assert _artefact('dir/c', '3') in replicate.Checkpoint(checkpoint_path)
+
+
+def test_replicate_nocache(replicate_clients, tmp_path):
+    source, target = replicate_clients
+
+    replicate.replicate(source, target, 'src/dir/', 'dst/dir/',
+                        checkpoint_path=tmp_path.joinpath('c'), nocache=True)
+
+    repository = target.repositories.get_by_name.return_value
+    assert repository.upload_stream.call_count == 3
+    target.list_raw.assert_not_called()
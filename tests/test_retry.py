@@ -0,0 +1,129 @@
+import email.utils
+import io
+import time
+
+import pytest
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from nexuscli import retry
+
+
+@pytest.mark.parametrize('value, x_seconds', [
+    (None, None),
+    ('', None),
+    ('not a date', None),
+    ('0', 0.0),
+    ('-5', 0.0),
+    ('12', 12.0),
+    ('Wed, 21 Oct 2015 07:28:00 GMT', 0.0),  # in the past
+])
+def test_parse_retry_after(value, x_seconds):
+    assert retry.parse_retry_after(value) == x_seconds
+
+
+def test_parse_retry_after_date():
+    """Ensure a HTTP date in the future is converted to seconds from now"""
+    value = email.utils.formatdate(time.time() + 60, usegmt=True)
+
+    assert 50 < retry.parse_retry_after(value) <= 60
+
+
+@pytest.mark.parametrize('method, status_code, x_retryable', [
+    ('get', 503, True),
+    ('GET', 502, True),
+    ('delete', 504, True),
+    ('put', 429, True),
+    ('get', 500, False),
+    ('get', 404, False),
+    ('post', 502, False),
+    ('post', 504, False),
+    ('post', 503, True),
+    ('post', 429, True),
+])
+def test_is_retryable_status(method, status_code, x_retryable, mocker):
+    response = mocker.Mock(status_code=status_code)
+
+    assert retry.RetryPolicy().is_retryable(
+        method, 1, response=response) == x_retryable
+
+
+def test_is_retryable_total(mocker):
+    """Ensure the policy gives up after the configured number of retries"""
+    policy = retry.RetryPolicy(total=2)
+    response = mocker.Mock(status_code=503)
+
+    assert policy.is_retryable('get', 2, response=response)
+    assert not policy.is_retryable('get', 3, response=response)
+    assert not retry.NO_RETRY.is_retryable('get', 1, response=response)
+
+
+@pytest.mark.parametrize('method, error, x_retryable', [
+    ('get', requests.exceptions.ConnectionError(), True),
+    ('get', requests.exceptions.ReadTimeout(), True),
+    ('post', requests.exceptions.ConnectionError(), False),
+    ('post', requests.exceptions.ReadTimeout(), False),
+    ('post', requests.exceptions.ConnectTimeout(), True),
+    ('post', requests.exceptions.ConnectionError(
+        requests.packages.urllib3.exceptions.MaxRetryError(
+            None, 'url', NewConnectionError(None, 'refused'))), True),
+])
+def test_is_retryable_error(method, error, x_retryable):
+    assert retry.RetryPolicy().is_retryable(
+        method, 1, error=error) == x_retryable
+
+
+@pytest.mark.parametrize('retry_number, x_backoff', [
+    (1, 0.5), (2, 1.0), (3, 2.0), (10, 30.0)])
+def test_get_backoff(retry_number, x_backoff):
+    """Ensure the backoff grows exponentially up to the maximum"""
+    policy = retry.RetryPolicy(backoff_factor=0.5, backoff_max=30,
+                               jitter=False)
+
+    assert policy.get_backoff(retry_number) == x_backoff
+
+
+def test_get_backoff_jitter():
+    policy = retry.RetryPolicy(backoff_factor=2)
+
+    assert all(1 <= policy.get_backoff(1) <= 2 for _ in range(100))
+
+
+@pytest.mark.parametrize('retry_after, x_backoff', [
+    ('10', 10), ('0', 0.5), ('1000', 120), ('bad', 0.5)])
+def test_get_backoff_retry_after(retry_after, x_backoff, mocker):
+    """Ensure Retry-After is honoured when longer than the backoff"""
+    policy = retry.RetryPolicy(backoff_factor=0.5, jitter=False)
+    response = mocker.Mock(headers={'Retry-After': retry_after})
+
+    assert policy.get_backoff(1, response) == x_backoff
+
+
+def test_body_rewinder():
+    data = io.BytesIO(b'0123456789')
+    data.seek(2)
+    upload = io.BytesIO(b'abc')
+    rewind = retry.body_rewinder(
+        {'data': data, 'files': {'a': b'x', 'b': ('name', upload)}})
+
+    data.read()
+    upload.read()
+    rewind()
+
+    assert data.read() == b'23456789'
+    assert upload.read() == b'abc'
+
+
+@pytest.mark.parametrize('kwargs', [
+    {},
+    {'data': b'bytes'},
+    {'json': {'a': 1}, 'data': 'text'},
+    {'files': [('raw.asset1', b'content')]},
+])
+def test_body_rewinder_static(kwargs):
+    assert retry.body_rewinder(kwargs) is not None
+
+
+def test_body_rewinder_unseekable():
+    """A generator body can't be sent twice"""
+    assert retry.body_rewinder({'data': (c for c in [b'a'])}) is None
@@ -0,0 +1,53 @@
+import pstats
+import threading
+
+from nexuscli import hooks, stats
+
+
+def test_timed_inactive():
+    """Without active stats, timing does nothing"""
+    with stats.timed(stats.HASHING):
+        pass
+
+    assert stats.active() is None
+
+
+def test_phase_stats():
+    client_hooks = hooks.ClientHooks()
+    phase_stats = stats.enable()
+    try:
+        phase_stats.attach(client_hooks)
+        with stats.timed(stats.DISK_WRITES):
+            pass
+        client_hooks.emit(hooks.REQUEST_END, method='get', status=503,
+                          elapsed=0.5, error=None)
+        client_hooks.emit(hooks.RETRY, reason='503')
+        client_hooks.emit(hooks.REQUEST_END, method='get', status=None,
+                          elapsed=0.25, error=ConnectionError())
+    finally:
+        stats.disable()
+
+    report = phase_stats.report(1.0)
+
+    assert phase_stats.seconds[stats.NETWORK] == 0.75
+    assert phase_stats.seconds[stats.DISK_WRITES] > 0
+    assert 'Requests: 2 (GET 2)' in report
+    assert 'Responses: 503 1, ConnectionError 1' in report
+    assert 'Retries: 1' in report
+
+
+def test_thread_profiler(tmp_path):
+    """Ensure threads started while profiling are in the dump"""
+    def _in_thread():
+        sum(range(10))
+
+    profiler = stats.ThreadProfiler()
+    profiler.start()
+    thread = threading.Thread(target=_in_thread)
+    thread.start()
+    thread.join()
+    profiler.stop()
+    profiler.dump(str(tmp_path / 'out.prof'))
+
+    functions = pstats.Stats(str(tmp_path / 'out.prof')).stats
+    assert '_in_thread' in {name for _, _, name in functions}
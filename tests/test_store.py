@@ -0,0 +1,110 @@
+import hashlib
+import os
+
+import pytest
+
+from nexuscli import store
+
+
+@pytest.fixture
+def artefact_store(tmp_path):
+    return store.ArtefactStore(tmp_path.joinpath('store'))
+
+
+def _stored_file(tmp_path, content, name='file'):
+    path = tmp_path.joinpath(name)
+    path.write_bytes(content)
+    hashes = {'sha1': hashlib.sha1(content).hexdigest(),
+              'sha256': hashlib.sha256(content).hexdigest()}
+    return path, hashes
+
+
+def test_add_materialize(artefact_store, tmp_path):
+    source, hashes = _stored_file(tmp_path, b'content')
+    artefact_store.add(source, hashes)
+
+    # either hash finds the file
+    for name in ['sha1', 'sha256']:
+        destination = tmp_path.joinpath(f'restored-{name}')
+        assert artefact_store.materialize({name: hashes[name]}, destination)
+        assert destination.read_bytes() == b'content'
+
+    assert artefact_store.lookup({'sha1': 'other'}) is None
+    assert not artefact_store.materialize(
+        {'sha1': 'other'}, tmp_path.joinpath('missing'))
+    # all names of the same file count once
+    assert artefact_store.size() == len(b'content')
+
+
+def test_stored_read_only(artefact_store, tmp_path):
+    """A hardlinked destination can't corrupt the store in place, and the
+    file added isn't shared with the store"""
+    source, hashes = _stored_file(tmp_path, b'content')
+    artefact_store.add(source, hashes)
+
+    stored = artefact_store.lookup(hashes)
+    assert not os.stat(stored).st_mode & 0o222
+    assert os.stat(source).st_mode & 0o200
+    assert not os.path.samefile(source, stored)
+
+
+def test_materialize_hardlink(tmp_path):
+    artefact_store = store.ArtefactStore(
+        tmp_path.joinpath('store'), link_modes=('hardlink', 'copy'))
+    source, hashes = _stored_file(tmp_path, b'content')
+    artefact_store.add(source, hashes)
+    destination = tmp_path.joinpath('restored')
+
+    assert artefact_store.materialize(hashes, destination)
+
+    assert os.path.samefile(destination, artefact_store.lookup(hashes))
+    assert not os.path.samefile(source, destination)
+
+
+@pytest.mark.parametrize('modes, x_mode', [
+    (store.LINK_MODES, None),
+    (('hardlink', 'copy'), 'hardlink'),
+    (('copy',), 'copy'),
+])
+def test_link_file(modes, x_mode, tmp_path):
+    source = tmp_path.joinpath('source')
+    source.write_bytes(b'content')
+    destination = tmp_path.joinpath('destination')
+    destination.write_bytes(b'old')
+
+    mode = store.link_file(source, destination, modes)
+
+    if x_mode is not None:
+        assert mode == x_mode
+    assert destination.read_bytes() == b'content'
+    assert sorted(os.listdir(tmp_path)) == ['destination', 'source']
+
+
+def test_link_file_fallback(tmp_path, mocker):
+    mocker.patch('nexuscli.store.reflink', side_effect=OSError('nope'))
+    mocker.patch('nexuscli.store.os.link', side_effect=OSError('cross-dev'))
+    source = tmp_path.joinpath('source')
+    source.write_bytes(b'content')
+
+    assert store.link_file(source, tmp_path.joinpath('dst')) == 'copy'
+
+    with pytest.raises(OSError):
+        store.link_file(source, tmp_path.joinpath('dst'), ('hardlink',))
+
+
+def test_evict(tmp_path):
+    """The least recently used files are removed first"""
+    artefact_store = store.ArtefactStore(tmp_path.joinpath('store'),
+                                         max_size=10)
+    stored = {}
+    for index, name in enumerate(['old', 'used', 'new']):
+        path, stored[name] = _stored_file(tmp_path, name.encode() * 2, name)
+        artefact_store.add(path, stored[name])
+        os.utime(artefact_store.lookup(stored[name]), (index, index))
+    artefact_store.materialize(stored['used'], tmp_path.joinpath('restored'))
+
+    assert artefact_store.evict() == len(b'oldold' + b'newnew')
+
+    assert artefact_store.size() == len(b'usedused')
+    assert artefact_store.lookup(stored['used']) is not None
+    assert artefact_store.lookup(stored['old']) is None
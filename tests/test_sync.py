@@ -0,0 +1,101 @@
+import hashlib
+
+import pytest
+
+from nexuscli import sync
+
+
+def _artefact(path, content):
+    return {'path': path, 'id': f'id-{path}', 'downloadUrl': f'url/{path}',
+            'fileSize': len(content),
+            'checksum': {'sha1': hashlib.sha1(content).hexdigest()}}
+
+
+@pytest.fixture
+def local_tree(tmp_path):
+    """A local directory to be synchronised with REMOTE"""
+    local_dir = tmp_path.joinpath('local')
+    for path, content in {'same': b'same', 'changed': b'old',
+                          'extra/file': b'extra',
+                          'new.part': b'ne'}.items():
+        local_dir.joinpath(path).parent.mkdir(parents=True, exist_ok=True)
+        local_dir.joinpath(path).write_bytes(content)
+    return local_dir
+
+
+@pytest.fixture
+def sync_client(nexus_mock_client, mocker):
+    """nexus_mock_client listing REMOTE under repo/dir/"""
+    remote = [_artefact('dir/same', b'same'),
+              _artefact('dir/changed', b'new'),
+              _artefact('dir/sub/new', b'new')]
+    nexus_mock_client.list_raw = mocker.Mock(return_value=remote)
+    return nexus_mock_client
+
+
+@pytest.mark.parametrize('delete', [False, True])
+def test_plan_pull(delete, sync_client, local_tree):
+    sync_plan = sync.plan(sync_client, 'repo/dir', str(local_tree), delete)
+
+    sync_client.list_raw.assert_called_with('repo/dir/')
+    assert sync_plan.direction == sync.PULL
+    assert sync_plan.unchanged == 1
+    assert [path for path, _ in sync_plan.transfers] == ['changed', 'sub/new']
+    # only sub/new.part would be kept, as a partial download
+    x_deletions = ['extra/file', 'new.part'] if delete else []
+    assert [path for path, _ in sync_plan.deletions] == x_deletions
+    assert list(sync_plan.describe()) == [
+        'download changed', 'download sub/new'] + [
+        f'delete {path}' for path in x_deletions]
+
+
+def test_execute_pull(sync_client, local_tree, mocker):
+    sync_client.download_file = mocker.Mock()
+    sync_plan = sync.plan(sync_client, 'repo/dir/', str(local_tree), True)
+
+    assert sync.execute(sync_client, sync_plan) == 4
+
+    sync_client.download_file.assert_any_call(
+        'url/dir/sub/new', local_tree.joinpath('sub', 'new'),
+        sync_plan.transfers[1][1])
+    assert local_tree.joinpath('sub').is_dir()
+    # empty directories are removed with the files deleted
+    assert not local_tree.joinpath('extra').exists()
+    assert sorted(p.name for p in local_tree.iterdir()) == [
+        'changed', 'same', 'sub']
+
+
+def test_execute_pull_deletions_last(sync_client, local_tree, mocker):
+    """Ensure nothing is deleted, and no directory removed, while downloads
+    are in progress"""
+    deleted = []
+    sync_client.download_file = mocker.Mock(side_effect=lambda *_: (
+        deleted.append(not local_tree.joinpath('extra', 'file').exists())))
+    sync_plan = sync.plan(sync_client, 'repo/dir/', str(local_tree), True)
+
+    assert sync.execute(sync_client, sync_plan) == 4
+
+    assert deleted == [False, False]
+    assert not local_tree.joinpath('extra').exists()
+
+
+def test_sync_push(sync_client, local_tree, mocker):
+    repository = mocker.Mock()
+    sync_client.repositories.get_by_name = mocker.Mock(
+        return_value=repository)
+    ResponseMock = pytest.helpers.get_ResponseMock()
+    sync_client.http_delete = mocker.Mock(return_value=ResponseMock(204, ''))
+
+    sync_plan = sync.plan(sync_client, str(local_tree), 'repo/dir/', True)
+    assert sync_plan.direction == sync.PUSH
+    assert list(sync_plan.describe()) == [
+        'upload changed', 'upload extra/file', 'upload new.part',
+        'delete sub/new']
+
+    sync.execute(sync_client, sync_plan)
+
+    sync_client.repositories.get_by_name.assert_called_with('repo')
+    repository.upload_file.assert_any_call(
+        str(local_tree.joinpath('extra', 'file')), 'dir/extra', 'file')
+    assert repository.upload_file.call_count == 3
+    sync_client.http_delete.assert_called_once_with('assets/id-dir/sub/new')
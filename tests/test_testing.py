@@ -0,0 +1,123 @@
+import io
+
+import pytest
+
+from nexuscli import exception, nexus_util
+from nexuscli.api.cleanup_policy import CleanupPolicy
+from nexuscli.api.repository import model
+from nexuscli.nexus_client import NexusClient
+from nexuscli.testing import FakeNexus
+
+
+@pytest.fixture
+def fake_nexus():
+    with FakeNexus(page_size=3) as nexus:
+        nexus.add_repository('raw')
+        yield nexus
+
+
+@pytest.fixture
+def fake_client(fake_nexus):
+    return NexusClient(config=fake_nexus.config, segment_threshold=None)
+
+
+def test_list_paginated(fake_nexus, fake_client):
+    """Ensure all pages of search results are listed"""
+    assets = fake_nexus.populate('raw', 10, size=100)
+    fake_nexus.add_asset('raw', 'other/file', b'content')
+
+    listed = list(fake_client.list('raw/dataset/'))
+
+    assert sorted(listed) == sorted(asset['path'] for asset in assets)
+    assert fake_client.server_version.major == 3
+
+
+@pytest.mark.parametrize('segment_threshold', [None, 1])
+def test_download(segment_threshold, fake_nexus, tmp_path):
+    """Ensure downloads match the content, including in segments"""
+    fake_nexus.add_asset('raw', 'dir/file', size=3 * 1024 ** 2)
+    client = NexusClient(
+        config=fake_nexus.config, segment_threshold=segment_threshold)
+
+    assert client.download('raw/dir/', f'{tmp_path}/') == 1
+
+    assert (tmp_path / 'dir' / 'file').read_bytes() == \
+        fake_nexus.content('raw', 'dir/file')
+
+
+@pytest.mark.parametrize('recipe', ['raw', 'yum'])
+def test_upload_stream(recipe, fake_nexus, fake_client):
+    """Ensure raw and PUT uploads are stored, with and without a size"""
+    fake_nexus.add_repository('repo', recipe)
+
+    fake_client.upload_stream(io.BytesIO(b'content'), 'repo/dir/file', 7)
+    fake_client.upload_stream(
+        nexus_util.ChunkReader(iter([b'chunked'])), 'repo/dir/chunked')
+
+    assert fake_nexus.content('repo', 'dir/file') == b'content'
+    assert fake_nexus.content('repo', 'dir/chunked') == b'chunked'
+
+
+def test_delete(fake_nexus, fake_client):
+    fake_nexus.populate('raw', 4, directory='delete')
+    fake_nexus.add_asset('raw', 'keep/file', b'content')
+
+    assert fake_client.delete('raw/delete/') == 4
+
+    assert list(fake_client.list('raw/')) == ['keep/file']
+
+
+def test_repositories(fake_client):
+    """Ensure repositories are created, listed, read and deleted"""
+    fake_client.repositories.create(
+        model.YumHostedRepository('yum', depth=2, nexus_client=fake_client))
+
+    repository = fake_client.repositories.get_by_name('yum')
+    names = [r['name'] for r in fake_client.repositories.raw_list()]
+    fake_client.repositories.delete('yum')
+
+    assert isinstance(repository, model.YumHostedRepository)
+    assert repository.depth == 2
+    assert names == ['raw', 'yum']
+    with pytest.raises(exception.NexusClientInvalidRepository):
+        fake_client.repositories.get_by_name('yum')
+
+
+def test_cleanup_policies(fake_client):
+    fake_client.cleanup_policies.create_or_update(CleanupPolicy(
+        fake_client, name='policy', format='all', mode='delete',
+        criteria={'lastDownloaded': 2}))
+
+    policy = fake_client.cleanup_policies.get_by_name('policy')
+
+    assert policy.configuration['criteria'] == {'lastDownloaded': 172800}
+    assert len(fake_client.cleanup_policies.list()) == 1
+    with pytest.raises(exception.NexusClientInvalidCleanupPolicy):
+        fake_client.cleanup_policies.get_by_name('missing')
+
+
+def test_scripts(fake_client):
+    """Ensure scripts are managed but only the bundled scripts are run"""
+    fake_client.scripts.create('script', 'return 1')
+
+    assert fake_client.scripts.get('script')['content'] == 'return 1'
+    with pytest.raises(exception.NexusClientAPIError):
+        fake_client.scripts.run('script')
+
+    fake_client.scripts.delete('script')
+    assert not fake_client.scripts.exists('script')
+
+
+def test_faults(mocker):
+    """Ensure requests are delayed and injected failures retried"""
+    # also skips the client's delays between retries
+    sleep = mocker.patch('time.sleep')
+    with FakeNexus(latency=0.5, error_rate=0.3, seed=1) as nexus:
+        nexus.add_repository('raw')
+        nexus.populate('raw', 30)
+        client = NexusClient(config=nexus.config)
+
+        assert len(list(client.list('raw/'))) == 30
+
+    assert mocker.call(0.5) in sleep.call_args_list
+    assert client.metrics.total('retries') > 0
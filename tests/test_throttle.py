@@ -0,0 +1,84 @@
+import io
+
+import pytest
+
+from nexuscli import nexus_util, throttle
+
+
+@pytest.fixture
+def clock(mocker):
+    """Patch the throttle module's clock; time.sleep advances it"""
+    now = [1000.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    mocker.patch(
+        'nexuscli.throttle.time.monotonic', side_effect=lambda: now[0])
+    mocker.patch('nexuscli.throttle.time.sleep', side_effect=sleep)
+    return now
+
+
+def test_token_bucket_invalid():
+    with pytest.raises(ValueError):
+        throttle.TokenBucket(0)
+
+
+def test_token_bucket_burst(clock):
+    """Up to capacity tokens can be taken without waiting"""
+    bucket = throttle.TokenBucket(10)
+
+    assert sum(bucket.consume() for _ in range(10)) == 0
+    assert bucket.consume() == pytest.approx(0.1)
+
+
+def test_token_bucket_rate(clock):
+    """Ensure the average rate is honoured, including amounts over capacity"""
+    bucket = throttle.TokenBucket(1000, capacity=100)
+    start = clock[0]
+
+    for _ in range(10):
+        bucket.consume(500)
+
+    # the initial 100 tokens were free
+    assert clock[0] - start == pytest.approx(4.9)
+
+
+def test_token_bucket_refill(clock):
+    bucket = throttle.TokenBucket(10)
+    bucket.consume(10)
+
+    clock[0] += 100
+
+    # refill is capped at capacity
+    assert bucket.consume(10) == 0
+    assert bucket.consume(10) == pytest.approx(1)
+
+
+def test_throttled_reader(clock):
+    bucket = throttle.TokenBucket(100, capacity=1)
+    fileobj = io.BytesIO(b'x' * 301)
+    reader = throttle.throttled(fileobj, bucket)
+
+    assert b''.join(reader) == fileobj.getvalue()
+    assert clock[0] - 1000 == pytest.approx(3)
+    # attributes are those of the wrapped file
+    assert reader.tell() == 301
+    reader.seek(0)
+    assert reader.read(1) == b'x'
+
+
+def test_throttled_none():
+    fileobj = io.BytesIO()
+
+    assert throttle.throttled(fileobj, None) is fileobj
+
+
+def test_throttled_already():
+    """Ensure content already throttled by a bucket isn't throttled again"""
+    bucket = throttle.TokenBucket(100)
+    fileobj = nexus_util.ChunkReader([b'x'], 1, throttled_by=bucket)
+
+    assert throttle.throttled(fileobj, bucket) is fileobj
+    assert isinstance(throttle.throttled(fileobj, throttle.TokenBucket(100)),
+                      throttle.ThrottledReader)
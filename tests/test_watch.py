@@ -0,0 +1,105 @@
+import os
+import sys
+
+import pytest
+
+from nexuscli import exception, watch
+
+
+class ScriptedWatcher(watch.Watcher):
+    """Reports the given changes, one set per call"""
+    def __init__(self, directory, *changes):
+        super().__init__(directory)
+        self.script = list(changes)
+        self.closed = False
+
+    def changes(self, timeout):
+        return self.script.pop(0) if self.script else set()
+
+    def close(self):
+        self.closed = True
+
+
+def _wait_for(watcher, x_changes, attempts=20):
+    changes = set()
+    for _ in range(attempts):
+        changes |= watcher.changes(0.1)
+        if changes >= x_changes:
+            break
+    return changes
+
+
+def test_polling_watcher(tmp_path):
+    """Ensure new and changed files are reported, and only them"""
+    (tmp_path / 'old').write_bytes(b'old')
+    (tmp_path / 'changed').write_bytes(b'old')
+
+    with watch.PollingWatcher(str(tmp_path), interval=0) as watcher:
+        (tmp_path / 'changed').write_bytes(b'changed')
+        (tmp_path / 'dir').mkdir()
+        (tmp_path / 'dir' / 'new').write_bytes(b'new')
+
+        assert watcher.changes(0) == {'changed', os.path.join('dir', 'new')}
+        assert watcher.changes(0) == set()
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'),
+                    reason='inotify is only available on Linux')
+def test_inotify_watcher(tmp_path):
+    """
+    Ensure files written are reported, including in new directories and
+    files moved into the directory.
+    """
+    (tmp_path / 'old').write_bytes(b'old')
+    outside = tmp_path.parent / f'{tmp_path.name}-outside'
+    outside.write_bytes(b'moved')
+
+    with watch.InotifyWatcher(str(tmp_path)) as watcher:
+        (tmp_path / 'new').write_bytes(b'new')
+        (tmp_path / 'dir' / 'sub').mkdir(parents=True)
+        (tmp_path / 'dir' / 'sub' / 'file').write_bytes(b'file')
+        os.rename(outside, tmp_path / 'moved')
+        x_changes = {'new', 'moved', os.path.join('dir', 'sub', 'file')}
+
+        assert _wait_for(watcher, x_changes) == x_changes
+        assert watcher.changes(0) == set()
+
+
+def test_open_watcher_fallback(tmp_path, mocker):
+    """Ensure the directory is polled when inotify isn't available"""
+    mocker.patch('nexuscli.watch._libc', side_effect=OSError('unavailable'))
+
+    watcher = watch.open_watcher(str(tmp_path))
+
+    assert isinstance(watcher, watch.PollingWatcher)
+
+
+@pytest.mark.parametrize('flatten', [True, False])
+def test_watch(flatten, tmp_path, mocker):
+    """
+    Ensure changed files are uploaded once, unless they change again, and
+    files that can't be uploaded don't stop the others.
+    """
+    for name in ('a', 'b', 'failed'):
+        (tmp_path / name).write_bytes(name.encode())
+    watcher = ScriptedWatcher(
+        str(tmp_path), {'a', 'failed', 'deleted'}, {'a', 'b'})
+    repository = mocker.Mock()
+    repository.nexus_client.concurrency = None
+
+    def _upload_file(file_path, sub_directory):
+        if file_path.endswith('failed'):
+            raise exception.NexusClientAPIError('failed')
+    repository.upload_file.side_effect = _upload_file
+
+    uploads = watch.watch(repository, str(tmp_path), 'dst', flatten=flatten,
+                          settle=0, watcher=watcher)
+    uploaded = [next(uploads), next(uploads)]
+    uploads.close()
+
+    assert uploaded == [str(tmp_path / 'a'), str(tmp_path / 'b')]
+    x_sub_directory = 'dst' if flatten else f'dst{tmp_path}'
+    repository.upload_file.assert_called_with(
+        str(tmp_path / 'b'), x_sub_directory)
+    assert repository.upload_file.call_count == 3
+    assert watcher.closed